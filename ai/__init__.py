@@ -0,0 +1,3 @@
+"""
+Pacote ai - Avaliação e infraestrutura do treinamento NEAT
+"""
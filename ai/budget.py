@@ -0,0 +1,78 @@
+"""Critérios para encerrar mais cedo a avaliação de uma geração."""
+
+from __future__ import annotations
+
+import time
+
+import numpy as np
+
+
+def ordem_top_k(fitness, k: int) -> tuple:
+    """Índices dos ``k`` maiores fitness, em ordem; empates ficam com o menor índice."""
+
+    fitness = np.asarray(fitness, dtype=float)
+    return tuple(np.argsort(-fitness, kind="stable")[:k].tolist())
+
+
+class OrcamentoAvaliacao:
+    """Decide quando a avaliação de uma geração pode parar antes do fim natural.
+
+    Três critérios independentes e experimentais, todos desligados por
+    padrão (formato de ``app.TRAINING_SETTINGS``):
+
+    - ``stable_frames``: encerra quando a ordem dos ``top_k`` melhores não
+      muda por N frames seguidos (heurística: quem ainda está vivo pararia
+      de somar recompensas);
+    - ``max_eval_seconds``: limite de tempo de parede por geração;
+    - ``cull``: retira os agentes cujo fitness, mesmo somando o maior ganho
+      possível até o fim da geração, não alcança o ``top_k``-ésimo fitness
+      atual. Esse corte é conservador: os ``top_k`` melhores e seus valores
+      de fitness saem idênticos aos da avaliação completa.
+
+    Os demais agentes, porém, terminam com menos fitness do que teriam: com
+    qualquer um dos três o fitness ajustado das espécies, e com ele a seleção
+    do NEAT, difere do de uma avaliação completa. Nenhum deles é uma
+    otimização sem perdas.
+    """
+
+    def __init__(self, ajustes, relogio=time.perf_counter):
+        self.top_k = max(1, int(ajustes.get("top_k", 5)))
+        self.frames_estaveis = max(0, int(ajustes.get("stable_frames", 0)))
+        self.tempo_maximo = max(0.0, float(ajustes.get("max_eval_seconds", 0)))
+        self.cortar = bool(ajustes.get("cull", False))
+        self.relogio = relogio
+        self.inicio = relogio()
+        self._ordem = None
+        self._repeticoes = 0
+
+    @property
+    def ativo(self) -> bool:
+        return bool(self.frames_estaveis or self.tempo_maximo or self.cortar)
+
+    def deve_parar(self, fitness) -> bool:
+        """Chamado a cada frame com o fitness atual de toda a população."""
+
+        if self.tempo_maximo and self.relogio() - self.inicio > self.tempo_maximo:
+            return True
+        if self.frames_estaveis:
+            ordem = ordem_top_k(fitness, self.top_k)
+            if ordem == self._ordem:
+                self._repeticoes += 1
+            else:
+                self._ordem = ordem
+                self._repeticoes = 0
+            return self._repeticoes >= self.frames_estaveis
+        return False
+
+    def limiar_corte(self, fitness, ganho_maximo: float) -> float:
+        """Fitness abaixo do qual um agente vivo não alcança mais o ``top_k``.
+
+        ``ganho_maximo`` é o maior fitness que um agente ainda pode somar até
+        o fim da geração. Retorna ``-inf`` quando o corte está desligado.
+        """
+
+        if not self.cortar or len(fitness) <= self.top_k:
+            return float("-inf")
+        fitness = np.asarray(fitness, dtype=float)
+        limiar = np.partition(fitness, len(fitness) - self.top_k)[len(fitness) - self.top_k]
+        return float(limiar) - ganho_maximo
@@ -0,0 +1,212 @@
+"""Checkpoints gravados em segundo plano.
+
+``neat.Checkpointer`` serializa e comprime a população inteira dentro do
+laço de gerações. Aqui o laço só tira o retrato (``pickle.dumps``, que
+precisa ver o estado daquele instante); compressão, escrita e limpeza dos
+arquivos antigos ficam com uma thread de gravação. A escrita é atômica
+(arquivo temporário + ``os.replace``), então um checkpoint nunca fica pela
+metade, e o formato continua o do NEAT: ``neat.Checkpointer.restore_checkpoint``
+lê os arquivos normalmente.
+"""
+
+from __future__ import annotations
+
+import gzip
+import json
+import os
+import pickle
+import queue
+import random
+import re
+import threading
+from itertools import count
+from pathlib import Path
+
+import neat
+
+_PADRAO_CHECKPOINT = re.compile(r"neat-checkpoint-(\d+)")
+
+
+def retrato(config, population, species_set, geracao) -> bytes:
+    """Estado do checkpoint serializado, no formato de ``neat.Checkpointer``.
+
+    Serializar a configuração do NEAT consome um valor do contador de nós;
+    o contador volta ao valor gravado, para que gravar um checkpoint não
+    mude a evolução e retomar dele siga como a execução sem interrupção.
+    """
+
+    genome_config = config.genome_config
+    proximo = None
+    if genome_config.node_indexer is not None:
+        proximo = next(genome_config.node_indexer)
+        genome_config.node_indexer = count(proximo)
+    try:
+        dados = (geracao, config, population, species_set, random.getstate())
+        return pickle.dumps(dados, protocol=pickle.HIGHEST_PROTOCOL)
+    finally:
+        if proximo is not None:
+            genome_config.node_indexer = count(proximo)
+
+
+def gravar_atomico(caminho, dados: bytes) -> None:
+    """Escreve ``dados`` em um temporário e só então o renomeia para ``caminho``."""
+
+    caminho = Path(caminho)
+    temporario = caminho.with_name(caminho.name + ".tmp")
+    with open(temporario, "wb") as arquivo:
+        arquivo.write(dados)
+    os.replace(temporario, caminho)
+
+
+class GravadorAssincrono:
+    """Thread que comprime e grava arquivos enquanto o treinamento continua.
+
+    A fila guarda no máximo ``pendentes`` arquivos: se o disco ficar para
+    trás, ``gravar`` espera em vez de acumular retratos na memória. Um erro
+    de escrita é relançado na próxima chamada de ``gravar`` ou ``fechar``.
+    """
+
+    def __init__(self, pendentes=2):
+        self._fila = queue.Queue(maxsize=pendentes)
+        self._erro = None
+        self._thread = threading.Thread(target=self._trabalhar, name="gravador", daemon=True)
+        self._thread.start()
+
+    def _trabalhar(self) -> None:
+        while True:
+            tarefa = self._fila.get()
+            try:
+                if tarefa is None:
+                    return
+                caminho, dados, nivel, depois = tarefa
+                if nivel:
+                    dados = gzip.compress(dados, compresslevel=nivel)
+                gravar_atomico(caminho, dados)
+                if depois is not None:
+                    depois()
+            except Exception as erro:  # relançado na thread principal
+                self._erro = erro
+            finally:
+                self._fila.task_done()
+
+    def _verificar(self) -> None:
+        if self._erro is not None:
+            erro, self._erro = self._erro, None
+            raise erro
+
+    def gravar(self, caminho, dados: bytes, nivel=0, depois=None) -> None:
+        """Enfileira ``dados`` (comprimidos com gzip se ``nivel`` > 0); ``depois`` roda após a escrita."""
+
+        self._verificar()
+        if not self._thread.is_alive():
+            raise RuntimeError("Gravador já foi fechado")
+        self._fila.put((caminho, dados, nivel, depois))
+
+    def esperar(self) -> None:
+        """Bloqueia até todos os arquivos enfileirados estarem no disco."""
+
+        self._fila.join()
+        self._verificar()
+
+    def fechar(self) -> None:
+        if self._thread.is_alive():
+            self._fila.put(None)
+            self._thread.join()
+        self._verificar()
+
+
+class CheckpointerAssincrono(neat.Checkpointer):
+    """``neat.Checkpointer`` que grava em segundo plano e limpa os arquivos antigos.
+
+    Com ``manter`` > 0 ficam no disco só os ``manter`` checkpoints mais
+    recentes e o melhor até agora: o gravado logo após a geração de maior
+    fitness. A lista dos checkpoints e do fitness de cada um fica em
+    ``<prefixo>indice.json``, então a limpeza continua valendo depois de
+    retomar o treinamento. Cada função de ``anexos`` retorna ``(caminho,
+    dados)`` de um arquivo gravado junto com cada checkpoint (o cache de
+    fitness, por exemplo). ``fechar`` espera as gravações pendentes.
+    """
+
+    def __init__(self, generation_interval, filename_prefix="neat-checkpoint-", manter=0, nivel=5):
+        super().__init__(generation_interval, filename_prefix=filename_prefix)
+        self.manter = manter
+        self.nivel = nivel
+        self.gravador = GravadorAssincrono()
+        self.anexos = []
+        self._fitness_geracao = None
+        # (geração, melhor fitness da geração que a originou), em ordem de gravação
+        self._gravados = self._ler_indice()
+        self._trava = threading.Lock()
+
+    @property
+    def _caminho_indice(self) -> Path:
+        return Path(f"{self.filename_prefix}indice.json")
+
+    def _ler_indice(self):
+        """Checkpoints já no disco: os do índice, na ordem dele, e depois os desconhecidos."""
+
+        prefixo = Path(self.filename_prefix)
+        no_disco = set()
+        for arquivo in prefixo.parent.glob(prefixo.name + "*"):
+            encontrado = re.fullmatch(re.escape(prefixo.name) + r"(\d+)", arquivo.name)
+            if encontrado:
+                no_disco.add(int(encontrado.group(1)))
+        gravados = []
+        if self._caminho_indice.exists():
+            with open(self._caminho_indice, encoding="utf-8") as arquivo:
+                for geracao, fitness in json.load(arquivo):
+                    if geracao in no_disco:
+                        gravados.append((geracao, fitness))
+        conhecidas = {geracao for geracao, _ in gravados}
+        desconhecidas = sorted(no_disco - conhecidas)
+        return [(geracao, None) for geracao in desconhecidas] + gravados
+
+    def __getstate__(self):
+        # As espécies guardam os reporters e vão junto no checkpoint; a thread não
+        return dict(self.__dict__, gravador=None, _trava=None, anexos=[])
+
+    def post_evaluate(self, config, population, species, best_genome):
+        self._fitness_geracao = best_genome.fitness
+
+    def save_checkpoint(self, config, population, species_set, generation):
+        caminho = f"{self.filename_prefix}{generation}"
+        print(f"Salvando checkpoint em {caminho}")
+        dados = retrato(config, population, species_set, generation)
+        fitness = self._fitness_geracao
+        self.gravador.gravar(
+            caminho, dados, self.nivel, lambda: self._registrar(generation, fitness)
+        )
+        for anexo in self.anexos:
+            self.gravador.gravar(*anexo())
+
+    def _registrar(self, geracao, fitness) -> None:
+        """Chamado pela thread de gravação depois que o arquivo está no disco."""
+
+        with self._trava:
+            self._gravados = [item for item in self._gravados if item[0] != geracao]
+            self._gravados.append((geracao, fitness))
+            if self.manter > 0:
+                com_fitness = [item for item in self._gravados if item[1] is not None]
+                melhor = max(com_fitness, key=lambda item: item[1])[0] if com_fitness else None
+                recentes = {item[0] for item in self._gravados[-self.manter:]}
+                for item in list(self._gravados):
+                    if item[0] not in recentes and item[0] != melhor:
+                        Path(f"{self.filename_prefix}{item[0]}").unlink(missing_ok=True)
+                        self._gravados.remove(item)
+            gravar_atomico(self._caminho_indice, json.dumps(self._gravados).encode())
+
+    def fechar(self) -> None:
+        self.gravador.fechar()
+
+
+def ultimo_checkpoint(pasta) -> Path:
+    """Checkpoint mais recente de uma pasta (arquivos ``.tmp`` incompletos são ignorados)."""
+
+    geracoes = {}
+    for arquivo in Path(pasta).glob("neat-checkpoint-*"):
+        encontrado = _PADRAO_CHECKPOINT.fullmatch(arquivo.name)
+        if encontrado:
+            geracoes[int(encontrado.group(1))] = arquivo
+    if not geracoes:
+        raise FileNotFoundError(f"Nenhum checkpoint em {pasta}")
+    return geracoes[max(geracoes)]
@@ -0,0 +1,240 @@
+"""Avaliação em lote das redes feed-forward de uma população inteira.
+
+As redes de todos os genomas viram um único programa em arrays: cada nó
+ganha uma posição em um vetor de valores compartilhado e os nós são
+agrupados por profundidade. Em cada nível, a soma ponderada das entradas de
+todos os nós (de todas as redes) é feita com algumas operações NumPy, na
+mesma ordem de ligações de ``FeedForwardNetwork.activate``.
+
+``criar_rede`` substitui ``FeedForwardNetwork.create``: a ordem de avaliação
+(camadas e ligações de cada nó) depende só da topologia e fica em cache;
+para cada genoma só os pesos, bias e funções são lidos.
+"""
+
+from __future__ import annotations
+
+from collections import OrderedDict
+
+import neat
+import numpy as np
+from neat.graphs import feed_forward_layers, required_for_output
+
+
+def _sigmoid(z):
+    z = np.clip(5.0 * z, -60.0, 60.0)
+    return 1.0 / (1.0 + np.exp(-z))
+
+
+def _tanh(z):
+    return np.tanh(np.clip(2.5 * z, -60.0, 60.0))
+
+
+def _sin(z):
+    return np.sin(np.clip(5.0 * z, -60.0, 60.0))
+
+
+def _gauss(z):
+    z = np.clip(z, -3.4, 3.4)
+    return np.exp(-5.0 * z ** 2)
+
+
+def _relu(z):
+    return np.where(z > 0.0, z, 0.0)
+
+
+def _identity(z):
+    return z
+
+
+def _clamped(z):
+    return np.clip(z, -1.0, 1.0)
+
+
+def _abs(z):
+    return np.abs(z)
+
+
+# Equivalentes vetorizados das ativações embutidas do neat-python
+ATIVACOES = {
+    "sigmoid": _sigmoid,
+    "tanh": _tanh,
+    "sin": _sin,
+    "gauss": _gauss,
+    "relu": _relu,
+    "identity": _identity,
+    "clamped": _clamped,
+    "abs": _abs,
+}
+
+
+class CacheTopologias:
+    """Ordem de avaliação das redes feed-forward por topologia (LRU).
+
+    A chave é a sequência de conexões habilitadas, na ordem do dicionário do
+    genoma, que é tudo o que ``FeedForwardNetwork.create`` usa para ordenar
+    camadas e ligações. Genomas com a mesma sequência recebem exatamente os
+    mesmos ``node_evals``, trocando só pesos, bias, response e funções.
+    """
+
+    def __init__(self, capacidade=4096):
+        self.capacidade = capacidade
+        self._ordens = OrderedDict()
+        self.acertos = 0
+        self.faltas = 0
+
+    def __len__(self):
+        return len(self._ordens)
+
+    def ordem(self, conexoes, genome_config):
+        """[(nó, [chaves das conexões de entrada])] na ordem de avaliação."""
+
+        chave = (tuple(genome_config.input_keys), tuple(genome_config.output_keys), conexoes)
+        ordem = self._ordens.get(chave)
+        if ordem is not None:
+            self._ordens.move_to_end(chave)
+            self.acertos += 1
+            return ordem
+
+        self.faltas += 1
+        camadas = feed_forward_layers(
+            genome_config.input_keys, genome_config.output_keys, conexoes
+        )
+        if isinstance(camadas, tuple):
+            camadas, necessarios = camadas
+        else:
+            # neat-python < 1.0 devolve só as camadas
+            necessarios = required_for_output(
+                genome_config.input_keys, genome_config.output_keys, conexoes
+            )
+        necessarios = set(necessarios).union(genome_config.input_keys)
+        ordem = tuple(
+            (node, tuple(c for c in conexoes if c[1] == node and c[0] in necessarios))
+            for camada in camadas
+            for node in camada
+        )
+        self._ordens[chave] = ordem
+        while len(self._ordens) > self.capacidade:
+            self._ordens.popitem(last=False)
+        return ordem
+
+    def criar(self, genome, config):
+        """Mesma rede de ``FeedForwardNetwork.create(genome, config)``."""
+
+        genome_config = config.genome_config
+        ligacoes = genome.connections
+        conexoes = tuple(cg.key for cg in ligacoes.values() if cg.enabled)
+        node_evals = []
+        for node, entradas in self.ordem(conexoes, genome_config):
+            ng = genome.nodes[node]
+            node_evals.append((
+                node,
+                genome_config.activation_defs.get(ng.activation),
+                genome_config.aggregation_function_defs.get(ng.aggregation),
+                ng.bias,
+                ng.response,
+                [(c[0], ligacoes[c].weight) for c in entradas],
+            ))
+        return neat.nn.FeedForwardNetwork(
+            genome_config.input_keys, genome_config.output_keys, node_evals
+        )
+
+
+# Cache compartilhado por todas as avaliações do processo
+TOPOLOGIAS = CacheTopologias()
+
+
+def criar_rede(genome, config):
+    """``FeedForwardNetwork.create`` com a ordem de avaliação em cache."""
+
+    return TOPOLOGIAS.criar(genome, config)
+
+
+class RedesCompiladas:
+    """Conjunto de redes feed-forward avaliadas em uma única chamada.
+
+    ``ativar`` recebe uma matriz (redes, entradas) e devolve (redes, saídas)
+    com os mesmos valores de ``FeedForwardNetwork.activate`` para cada linha,
+    a menos de arredondamentos de ponto flutuante (as funções ``np.tanh`` e
+    ``np.exp`` podem diferir de ``math`` no último bit).
+    """
+
+    def __init__(self, genomas, config):
+        genome_config = config.genome_config
+        self.quantidade = len(genomas)
+        self.num_entradas = len(genome_config.input_keys)
+        self.num_saidas = len(genome_config.output_keys)
+
+        # Posição 0 do vetor de valores é sempre zero (ligações ausentes/padding)
+        proxima = 1 + self.quantidade * self.num_entradas
+        niveis = {}
+        self.saidas = np.zeros((self.quantidade, self.num_saidas), dtype=np.intp)
+
+        for indice, genome in enumerate(genomas):
+            rede = criar_rede(genome, config)
+            posicoes = {
+                chave: 1 + indice * self.num_entradas + k
+                for k, chave in enumerate(rede.input_nodes)
+            }
+            profundidade = {chave: 0 for chave in rede.input_nodes}
+
+            for node, _, _, bias, response, links in rede.node_evals:
+                ng = genome.nodes[node]
+                if ng.aggregation != "sum":
+                    raise ValueError(f"Agregação não suportada em lote: {ng.aggregation}")
+                if ng.activation not in ATIVACOES:
+                    raise ValueError(f"Ativação não suportada em lote: {ng.activation}")
+
+                origens = [(posicoes.get(i, 0), w) for i, w in links]
+                nivel = 1 + max((profundidade.get(i, 0) for i, _ in links), default=0)
+                profundidade[node] = nivel
+                posicoes[node] = proxima
+                proxima += 1
+                niveis.setdefault(nivel, []).append(
+                    (posicoes[node], ng.activation, bias, response, origens)
+                )
+
+            for k, chave in enumerate(rede.output_nodes):
+                self.saidas[indice, k] = posicoes.get(chave, 0)
+
+        self.tamanho = proxima
+        self.niveis = [self._montar_nivel(niveis[n]) for n in sorted(niveis)]
+
+    @staticmethod
+    def _montar_nivel(nos):
+        """Converte os nós de um nível em arrays preenchidos até o maior grau de entrada."""
+
+        grau = max((len(origens) for *_, origens in nos), default=0)
+        destinos = np.array([no[0] for no in nos], dtype=np.intp)
+        bias = np.array([no[2] for no in nos])
+        response = np.array([no[3] for no in nos])
+        fontes = np.zeros((len(nos), grau), dtype=np.intp)
+        pesos = np.zeros((len(nos), grau))
+        for linha, (*_, origens) in enumerate(nos):
+            for coluna, (fonte, peso) in enumerate(origens):
+                fontes[linha, coluna] = fonte
+                pesos[linha, coluna] = peso
+
+        grupos = []
+        ativacoes = np.array([no[1] for no in nos])
+        for nome in np.unique(ativacoes):
+            grupos.append((ATIVACOES[str(nome)], np.flatnonzero(ativacoes == nome)))
+        return destinos, bias, response, fontes, pesos, grupos
+
+    def ativar(self, entradas):
+        """Avalia todas as redes; a linha ``i`` de ``entradas`` alimenta a rede ``i``."""
+
+        valores = np.zeros(self.tamanho)
+        valores[1:1 + self.quantidade * self.num_entradas] = np.ravel(entradas)
+
+        for destinos, bias, response, fontes, pesos, grupos in self.niveis:
+            soma = np.zeros(len(destinos))
+            # Soma sequencial por ligação, na mesma ordem da lista de links
+            for coluna in range(fontes.shape[1]):
+                soma += pesos[:, coluna] * valores[fontes[:, coluna]]
+            z = bias + response * soma
+            resultado = np.empty_like(z)
+            for funcao, linhas in grupos:
+                resultado[linhas] = funcao(z[linhas])
+            valores[destinos] = resultado
+
+        return valores[self.saidas]
@@ -0,0 +1,37 @@
+"""Leitura e validação da configuração NEAT do Mario Runner."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import neat
+
+from utils.constants import ACTION_COUNT, SENSOR_COUNT
+
+
+def validar_config(config: neat.Config) -> None:
+    """Garante que a configuração do NEAT corresponde aos sensores/ações do jogo."""
+
+    genome_cfg = config.genome_config
+    if genome_cfg.num_inputs != SENSOR_COUNT:
+        raise RuntimeError(
+            f"Configuração NEAT espera {genome_cfg.num_inputs} inputs, \n"
+            f"mas o ambiente fornece {SENSOR_COUNT}. Atualize 'num_inputs'."
+        )
+    if genome_cfg.num_outputs != ACTION_COUNT:
+        raise RuntimeError(
+            f"Configuração NEAT espera {genome_cfg.num_outputs} saídas, \n"
+            f"mas o ambiente exige {ACTION_COUNT}. Atualize 'num_outputs'."
+        )
+
+
+def carregar_config(config_path: Path) -> neat.Config:
+    config = neat.Config(
+        neat.DefaultGenome,
+        neat.DefaultReproduction,
+        neat.DefaultSpeciesSet,
+        neat.DefaultStagnation,
+        str(config_path),
+    )
+    validar_config(config)
+    return config
@@ -0,0 +1,138 @@
+"""Ambiente vetorizado: N mundos independentes avançados com ``reset``/``step``.
+
+Permite treinar o Mario com outros otimizadores (estratégias evolutivas,
+aprendizado por reforço) sem passar pelo NEAT. Cada mundo tem um Mario;
+observações são as linhas de ``Mario.get_sensores`` e as recompensas vêm
+de ``aplicar_recompensas``, as mesmas da avaliação NEAT. A ordem dos passos
+também é a da avaliação, então a soma exata das recompensas de um episódio
+(``info["retorno"]``) é o fitness que o NEAT daria à mesma política.
+"""
+
+from __future__ import annotations
+
+import numpy as np
+
+from ai.evaluation import aplicar_recompensas, estagnados
+from game.simulation import SimulacaoMario
+from utils.constants import ACTION_COUNT, SENSOR_COUNT
+
+
+class AmbienteVetorizado:
+    """``reset(sementes)`` e ``step(acoes)`` sobre N mundos, com reinício automático.
+
+    ``step`` recebe uma matriz (N, 2) de ações (pular, abaixar), booleanas
+    ou saídas de rede (pressionada acima de 0.5, como no treinamento), e retorna
+    ``(observacoes, recompensas, terminados, info)``. Um episódio termina
+    na colisão, na vitória, ao passar de ``max_score`` ou, com
+    ``estagnacao=True``, quando o Mario fica ``FPS * 6`` frames sem
+    melhorar (a mesma regra da avaliação NEAT). O mundo que termina é
+    reiniciado na hora com a semente seguinte (``semente + N``), e a linha
+    de ``observacoes`` já é a primeira do novo episódio; ``info`` traz o
+    retorno e o resultado do episódio que acabou.
+    """
+
+    def __init__(self, max_score=50000, estagnacao=True):
+        self.max_score = max_score
+        self.estagnacao = estagnacao
+        self.jogos = []
+        self.marios = []
+
+    def reset(self, sementes):
+        """Reinicia um mundo por semente e retorna as observações (N, 6)."""
+
+        sementes = [int(semente) for semente in sementes]
+        while len(self.jogos) < len(sementes):
+            self.jogos.append(SimulacaoMario(modo='ia'))
+            self.marios.append(None)
+        del self.jogos[len(sementes):]
+        del self.marios[len(sementes):]
+
+        quantidade = len(sementes)
+        self.sementes = np.array(sementes, dtype=np.int64)
+        self.observacoes = np.zeros((quantidade, SENSOR_COUNT))
+        self.retornos = np.zeros(quantidade)
+        self.ultimos_retornos = np.zeros(quantidade)
+        self.frames_sem_melhoria = np.zeros(quantidade, dtype=int)
+        self.frames = np.zeros(quantidade, dtype=int)
+        for k in range(quantidade):
+            self._iniciar(k)
+        return self.observacoes.copy()
+
+    def _iniciar(self, k):
+        """Começa um episódio no mundo ``k`` com a semente atual dele."""
+
+        jogo = self.jogos[k]
+        jogo.semente = int(self.sementes[k])
+        jogo.resetar()
+        self.marios[k] = jogo.reutilizar_marios(1)[0]
+        self.retornos[k] = 0.0
+        self.ultimos_retornos[k] = 0.0
+        self.frames_sem_melhoria[k] = 0
+        self.frames[k] = 0
+        self._avancar_mundo(k)
+
+    def _avancar_mundo(self, k):
+        """Início de frame: o mundo anda e o Mario lê os sensores."""
+
+        jogo = self.jogos[k]
+        jogo.atualizar()
+        self.frames[k] += 1
+        self.observacoes[k] = jogo.sensores(self.marios[k])
+
+    def step(self, acoes):
+        # Mesmo limiar da avaliação NEAT: uma saída 0.3 não aperta o botão
+        acoes = (np.asarray(acoes) > 0.5).reshape(len(self.jogos), ACTION_COUNT)
+        salto, abaixar = acoes[:, 0], acoes[:, 1]
+        quantidade = len(self.jogos)
+        colidiu = np.zeros(quantidade, dtype=bool)
+        velocidade_y = np.empty(quantidade)
+        distancia = np.empty(quantidade)
+        velocidade = np.empty(quantidade)
+        vitoria = np.zeros(quantidade, dtype=bool)
+
+        for k, (jogo, mario) in enumerate(zip(self.jogos, self.marios)):
+            mario.aplicar_comandos(pular=bool(salto[k]), abaixar=bool(abaixar[k]))
+            mario.atualizar()
+            colidiu[k] = jogo.verificar_colisao(mario)
+            velocidade_y[k] = mario.velocidade_y
+            distancia[k] = jogo.distancia_percorrida
+            velocidade[k] = jogo.velocidade
+            vitoria[k] = jogo.vitoria
+
+        anteriores = self.retornos.copy()
+        vivos = aplicar_recompensas(
+            self.retornos,
+            self.observacoes,
+            salto,
+            abaixar,
+            velocidade_y,
+            np.ones(quantidade, dtype=bool),
+            colidiu,
+            distancia,
+            velocidade,
+            vitoria,
+        )
+        recompensas = self.retornos - anteriores
+        terminados = colidiu | vitoria
+        if self.estagnacao:
+            terminados |= estagnados(
+                self.retornos, self.ultimos_retornos, self.frames_sem_melhoria, vivos
+            )
+
+        info = {
+            "retorno": np.where(terminados, self.retornos, np.nan),
+            "frames": np.where(terminados, self.frames, 0),
+            "vitoria": vitoria,
+            "semente": self.sementes.copy(),
+        }
+        for k, jogo in enumerate(self.jogos):
+            if not terminados[k] and jogo.pontuacao > self.max_score:
+                terminados[k] = True
+                info["retorno"][k] = self.retornos[k]
+                info["frames"][k] = self.frames[k]
+            if terminados[k]:
+                self.sementes[k] = (self.sementes[k] + quantidade) % 2**32
+                self._iniciar(k)
+            else:
+                self._avancar_mundo(k)
+        return self.observacoes.copy(), recompensas, terminados, info
@@ -0,0 +1,95 @@
+"""Avaliação de cada genoma em vários percursos por geração.
+
+Um único percurso por geração deixa o fitness ruidoso: um genoma pode ter
+sorte com a sequência de obstáculos. Com M episódios, cada genoma joga M
+percursos (sementes derivadas da semente da geração) e o fitness final
+combina os M resultados por média, mínimo ou quantil.
+"""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+
+from ai.evaluation import avaliar_genomas, avaliar_mundos
+
+
+def sementes_episodios(semente: int, quantidade: int) -> list[int]:
+    """Sementes dos ``quantidade`` percursos de uma geração (a primeira é ``semente``)."""
+
+    return [(semente + i) % 2**32 for i in range(max(1, quantidade))]
+
+
+def validar_agregacao(modo: str) -> str:
+    """Aceita ``mean``, ``min`` ou ``qNN`` (quantil NN%, ex.: ``q25``)."""
+
+    if modo in ("mean", "min"):
+        return modo
+    if modo.startswith("q") and modo[1:].isdigit() and 0 <= int(modo[1:]) <= 100:
+        return modo
+    raise ValueError(f"Agregação desconhecida: {modo!r} (use mean, min ou qNN)")
+
+
+def agregar(fitness_por_episodio, modo: str = "mean") -> np.ndarray:
+    """Combina uma matriz (episódios, genomas) em um fitness por genoma."""
+
+    valores = np.asarray(fitness_por_episodio, dtype=float)
+    modo = validar_agregacao(modo)
+    if modo == "mean":
+        return valores.mean(axis=0)
+    if modo == "min":
+        return valores.min(axis=0)
+    return np.quantile(valores, int(modo[1:]) / 100, axis=0)
+
+
+def ajustes_do_episodio(ajustes, episodio: int, quantidade: int):
+    """Com vários episódios, cada um grava seus replays em ``record_dir/episodio-N``."""
+
+    if quantidade > 1 and ajustes.get("record_dir"):
+        pasta = Path(ajustes["record_dir"]) / f"episodio-{episodio + 1}"
+        return dict(ajustes, record_dir=str(pasta))
+    return ajustes
+
+
+def avaliar_episodios(
+    genomas, config, ajustes, sementes, geracao=1, perfil=None
+) -> int:
+    """Avalia ``genomas`` em cada semente de ``sementes`` e agrega o fitness.
+
+    Com ``ajustes["vectorized"]`` os M percursos avançam juntos neste
+    processo (``avaliar_mundos``), com o mesmo fitness de rodá-los um após o
+    outro; sem ela os episódios rodam em sequência. Para rodá-los em
+    processos separados, use ``AvaliadorParalelo.avaliar_episodios``.
+    Retorna o total de frames simulados.
+    """
+
+    ajustes_mundos = [
+        ajustes_do_episodio(ajustes, episodio, len(sementes)) for episodio in range(len(sementes))
+    ]
+    if ajustes.get("vectorized"):
+        fitness, frames = avaliar_mundos(
+            genomas, config, ajustes, sementes, geracao, perfil, ajustes_mundos
+        )
+        _aplicar_agregado(genomas, fitness, ajustes)
+        return frames
+
+    fitness = np.zeros((len(sementes), len(genomas)))
+    frames = 0
+    for episodio, semente in enumerate(sementes):
+        frames += avaliar_genomas(
+            genomas,
+            config,
+            ajustes_mundos[episodio],
+            semente,
+            geracao,
+            perfil,
+        )
+        fitness[episodio] = [genome.fitness for genome in genomas]
+    _aplicar_agregado(genomas, fitness, ajustes)
+    return frames
+
+
+def _aplicar_agregado(genomas, fitness, ajustes) -> None:
+    for genome, valor in zip(genomas, agregar(fitness, ajustes.get("episode_aggregate", "mean"))):
+        genome.fitness = float(valor)
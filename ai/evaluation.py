@@ -0,0 +1,519 @@
+"""Simulação de uma geração NEAT dentro do jogo."""
+
+from __future__ import annotations
+
+from pathlib import Path
+
+import numpy as np
+
+from ai.budget import OrcamentoAvaliacao
+from ai.compiled import RedesCompiladas, criar_rede
+from game.replay import GravadorReplay
+from game.simulation import SimulacaoMario
+from game.track import obter_pista
+from game.vectorized import ObstaculosVetorizados, PopulacaoVetorizada
+from utils.constants import (
+    ACTION_COUNT,
+    CHAO_Y,
+    DISTANCIA_PARA_VENCER,
+    FPS,
+    PONTOS_POR_FRAME,
+    SENSOR_COUNT,
+    VELOCIDADE_MAXIMA,
+)
+from utils.profiling import medir_etapa, relogio_desligado
+
+
+# Regras de recompensa de ``aplicar_recompensas``, usadas por todas as avaliações
+RECOMPENSA_SOBREVIVER = 0.3
+RECOMPENSA_POR_VELOCIDADE = 0.015
+RECOMPENSA_PULO_UTIL = 1.2
+RECOMPENSA_ABAIXAR_UTIL = 1.5
+PENALIDADE_ACAO_INUTIL = 0.05
+BONUS_VITORIA = 2000.0
+BONUS_POR_DISTANCIA = 0.01
+# Maior recompensa de um frame (sobrevivência, velocidade, pulo e agachamento
+# úteis) e maiores bônus finais, derivados das regras acima
+_RECOMPENSA_MAXIMA_FRAME = (
+    RECOMPENSA_SOBREVIVER
+    + VELOCIDADE_MAXIMA * RECOMPENSA_POR_VELOCIDADE
+    + RECOMPENSA_PULO_UTIL
+    + RECOMPENSA_ABAIXAR_UTIL
+)
+_BONUS_MAXIMO_FINAL = BONUS_VITORIA + (DISTANCIA_PARA_VENCER + VELOCIDADE_MAXIMA) * BONUS_POR_DISTANCIA
+# No modo turbo com janela, os eventos do pygame são lidos a cada N frames
+# mesmo sem prévia, para a janela responder e ESC/fechar funcionarem
+_INTERVALO_EVENTOS_TURBO = 240
+
+
+def _ganho_maximo_restante(jogo, max_score) -> float:
+    """Limite superior do fitness que um agente vivo ainda pode somar na geração."""
+
+    # A geração acaba na vitória ou ao passar de max_score; a velocidade nunca cai
+    frames_vitoria = (DISTANCIA_PARA_VENCER - jogo.distancia_percorrida) / jogo.velocidade
+    frames_pontos = (max_score - jogo.pontuacao) / PONTOS_POR_FRAME
+    restantes = max(0.0, min(frames_vitoria, frames_pontos)) + 2
+    return restantes * _RECOMPENSA_MAXIMA_FRAME + _BONUS_MAXIMO_FINAL
+
+
+def aplicar_recompensas(
+    fitness, sensores, salto, abaixar, velocidade_y, ativos, colidiu,
+    distancia, velocidade, vitoria,
+):
+    """Soma em ``fitness`` as recompensas de um frame para vários agentes.
+
+    Única definição das regras de recompensa: o laço por objeto de
+    ``avaliar_genomas``, a avaliação vetorizada e ``AmbienteVetorizado``
+    chamam esta função. ``sensores`` é a leitura usada na decisão do frame e
+    ``velocidade_y`` o estado depois da física. ``distancia``, ``velocidade``
+    e ``vitoria`` podem ser escalares (um mundo) ou arrays (um mundo por
+    agente). Cada parcela é somada separadamente e sempre na mesma ordem,
+    para que o fitness seja idêntico em todos os caminhos. Retorna a máscara
+    de quem seguiu vivo.
+    """
+
+    fitness += np.where(colidiu, distancia * BONUS_POR_DISTANCIA, 0.0)
+    vivos = ativos & ~colidiu
+
+    # Recompensas por sobreviver, ganhar velocidade e utilizar ações relevantes
+    fitness += np.where(vivos, RECOMPENSA_SOBREVIVER, 0.0)
+    fitness += np.where(vivos, velocidade * RECOMPENSA_POR_VELOCIDADE, 0.0)
+
+    obstaculo_chao_proximo = sensores[:, 0] < 0.35
+    bomba_proxima = sensores[:, 3] > 0.5
+    bomba_proxima_e_perto = bomba_proxima & (sensores[:, 2] < 0.35)
+
+    fitness += np.where(
+        vivos & obstaculo_chao_proximo & salto & (velocidade_y < 0), RECOMPENSA_PULO_UTIL, 0.0
+    )
+    fitness -= np.where(vivos & salto & ~obstaculo_chao_proximo, PENALIDADE_ACAO_INUTIL, 0.0)
+
+    fitness += np.where(vivos & bomba_proxima_e_perto & abaixar, RECOMPENSA_ABAIXAR_UTIL, 0.0)
+    fitness -= np.where(vivos & abaixar & ~bomba_proxima, PENALIDADE_ACAO_INUTIL, 0.0)
+
+    fitness += np.where(vivos & vitoria, BONUS_VITORIA, 0.0)
+    return vivos
+
+
+def estagnados(fitness, ultimos_fitness, frames_sem_melhoria, vivos):
+    """Atualiza o contador de frames sem melhoria e retorna quem passou do limite."""
+
+    melhorou = vivos & (fitness > ultimos_fitness + 0.1)
+    ultimos_fitness[melhorou] = fitness[melhorou]
+    frames_sem_melhoria[melhorou] = 0
+    frames_sem_melhoria[vivos & ~melhorou] += 1
+    return vivos & (frames_sem_melhoria > FPS * 6)
+
+
+def _remover_indice(i, marios, redes, genomas, jogo, extras=None):
+    """Remove o Mario de todas as listas de acompanhamento."""
+
+    marios.pop(i)
+    redes.pop(i)
+    genomas.pop(i)
+    if i < len(jogo.marios):
+        jogo.marios.pop(i)
+    if extras:
+        for lista in extras:
+            lista.pop(i)
+
+
+# Mundos já criados neste processo, por modo (com ou sem janela)
+_JOGOS = {}
+
+
+def _criar_jogo(render: bool, semente=None, perfil=None, indice=0) -> SimulacaoMario:
+    """Prepara o mundo da geração; sem renderização o pygame nem é carregado.
+
+    O mundo (e a janela, quando há renderização) é criado uma vez por processo
+    e resetado no lugar nas gerações seguintes; ``indice`` separa os mundos
+    avaliados ao mesmo tempo. Com semente, o mundo reproduz
+    a pista pré-calculada compartilhada por todas as avaliações daquela
+    semente neste processo.
+    """
+
+    jogo = _JOGOS.get((render, indice))
+    if jogo is None:
+        if not render:
+            jogo = SimulacaoMario(modo='ia', semente=semente)
+        else:
+            from game.game import JogoMario
+
+            jogo = JogoMario(modo='ia', render=True, semente=semente, perfil=perfil)
+        _JOGOS[(render, indice)] = jogo
+    else:
+        jogo.semente = semente
+        jogo.pista = None
+        if render:
+            jogo.perfil = perfil
+        jogo.resetar()
+    if semente is not None:
+        jogo.usar_pista(obter_pista(semente))
+    return jogo
+
+
+def _intervalo_decisao(ajustes) -> int:
+    """Quantos frames de física cada decisão das redes vale (mínimo 1)."""
+
+    return max(1, int(ajustes.get("decision_interval", 1)))
+
+
+def _abrir_gravador(ajustes, semente, geracao, genomas):
+    """``GravadorReplay`` da geração, se ``ajustes["record_dir"]`` estiver definido."""
+
+    pasta = ajustes.get("record_dir")
+    if not pasta or semente is None:
+        return None
+    pasta = Path(pasta)
+    pasta.mkdir(parents=True, exist_ok=True)
+    return GravadorReplay(
+        pasta / f"geracao-{geracao:04d}.mrpl",
+        semente,
+        len(genomas),
+        geracao,
+        ajustes.get("record_state_every", 0),
+        chaves=[genome.key for genome in genomas],
+    )
+
+
+def _deve_desenhar(frame: int, turbo: bool, preview_every: int) -> bool:
+    """Decide se o quadro atual deve ser desenhado."""
+
+    if not turbo:
+        return True
+    return preview_every > 0 and frame % preview_every == 0
+
+
+def avaliar_genomas(
+    genomas_avaliados, config, ajustes, semente=None, geracao=1, perfil=None
+) -> int:
+    """Simula os genomas em um único mundo e grava o fitness de cada um.
+
+    ``ajustes`` segue o formato de ``app.TRAINING_SETTINGS``. Com
+    ``ajustes["decision_interval"] = K`` as redes só são consultadas a cada K
+    frames; nos demais, cada Mario repete a última ação e as recompensas usam
+    a última leitura dos sensores (K=1 reproduz a avaliação frame a frame).
+    As opções de ``OrcamentoAvaliacao`` (top-k estável, tempo limite e corte
+    de agentes sem chance) podem encerrar a geração mais cedo. Com
+    ``ajustes["record_dir"]`` a geração é gravada como trace de replay.
+    Como o percurso
+    depende apenas da ``semente``, avaliar a população inteira ou qualquer
+    fatia dela produz exatamente o mesmo fitness por genoma. ``perfil`` é um
+    ``PerfilFrames`` opcional que recebe o tempo de cada etapa do frame.
+    Retorna a quantidade de frames simulados.
+    """
+
+    if ajustes.get("vectorized"):
+        return _avaliar_vetorizado(
+            genomas_avaliados, config, ajustes, semente, geracao, perfil
+        )
+
+    jogo = _criar_jogo(ajustes["render"], semente, perfil)
+    jogo.geracao = geracao
+
+    quantidade = len(genomas_avaliados)
+    redes = []
+    genomas = []
+    marios = []
+    posicoes = list(range(quantidade))
+    todos_marios = jogo.reutilizar_marios(quantidade)
+
+    for genome, personagem in zip(genomas_avaliados, todos_marios):
+        genome.fitness = 0.0
+        rede = criar_rede(genome, config)
+        redes.append(rede)
+        genomas.append(genome)
+        marios.append(personagem)
+
+    # Estado das recompensas por agente (índice na população), como na avaliação vetorizada
+    fitness = np.zeros(quantidade)
+    ultimos_fitness = np.zeros(quantidade)
+    frames_sem_melhoria = np.zeros(quantidade, dtype=int)
+    sensores = np.zeros((quantidade, SENSOR_COUNT))
+    salto = np.zeros(quantidade, dtype=bool)
+    abaixar = np.zeros(quantidade, dtype=bool)
+    velocidade_y = np.zeros(quantidade)
+    ativos = np.zeros(quantidade, dtype=bool)
+    colidiu = np.zeros(quantidade, dtype=bool)
+
+    render = ajustes["render"]
+    # Sem janela não há o que desenhar nem motivo para limitar o FPS
+    turbo = ajustes["turbo"] or not render
+    preview_every = ajustes["preview_every"]
+    relogio = perfil.relogio if perfil is not None else relogio_desligado
+    intervalo = _intervalo_decisao(ajustes)
+    orcamento = OrcamentoAvaliacao(ajustes)
+    acompanhamento = [posicoes]
+    gravador = _abrir_gravador(ajustes, semente, geracao, genomas_avaliados)
+    frames = 0
+
+    rodando = True
+    while rodando and marios:
+        frames += 1
+        decidir = (frames - 1) % intervalo == 0
+        desenhar = render and _deve_desenhar(frames, turbo, preview_every)
+        if not turbo:
+            jogo.relogio.tick(FPS)
+        if perfil is not None:
+            perfil.iniciar_frame()
+
+        if render and (desenhar or not turbo or frames % _INTERVALO_EVENTOS_TURBO == 0):
+            with medir_etapa(perfil, 'eventos'):
+                if not jogo.processar_eventos():
+                    jogo.encerrar()
+
+        with medir_etapa(perfil, 'atualizar'):
+            jogo.atualizar()
+
+        ativos[:] = False
+        colidiu[:] = False
+        for i, mario in enumerate(marios):
+            k = posicoes[i]
+            t0 = t1 = t2 = relogio()
+            if decidir:
+                leitura = jogo.sensores(mario)
+                sensores[k] = leitura
+                t1 = relogio()
+                saidas = redes[i].activate(leitura)
+                salto[k] = saidas[0] > 0.5
+                abaixar[k] = saidas[1] > 0.5
+                t2 = relogio()
+
+            mario.aplicar_comandos(pular=bool(salto[k]), abaixar=bool(abaixar[k]))
+            mario.atualizar()
+            velocidade_y[k] = mario.velocidade_y
+            ativos[k] = True
+            if gravador is not None:
+                gravador.registrar(k, salto[k], abaixar[k])
+            t3 = relogio()
+            colidiu[k] = jogo.verificar_colisao(mario)
+            if perfil is not None:
+                perfil.registrar('sensores', t1 - t0)
+                perfil.registrar('rede', t2 - t1)
+                perfil.registrar('fisica', t3 - t2)
+                perfil.registrar('colisao', relogio() - t3)
+
+        vivos = aplicar_recompensas(
+            fitness,
+            sensores,
+            salto,
+            abaixar,
+            velocidade_y,
+            ativos,
+            colidiu,
+            jogo.distancia_percorrida,
+            jogo.velocidade,
+            jogo.vitoria,
+        )
+        sair = colidiu | estagnados(fitness, ultimos_fitness, frames_sem_melhoria, vivos)
+
+        if orcamento.ativo:
+            corte = orcamento.limiar_corte(
+                fitness, _ganho_maximo_restante(jogo, ajustes["max_score"])
+            )
+            sair |= ativos & (fitness < corte)
+            if orcamento.deve_parar(fitness):
+                rodando = False
+
+        for i in range(len(marios) - 1, -1, -1):
+            k = posicoes[i]
+            genomas[i].fitness = float(fitness[k])
+            if sair[k]:
+                _remover_indice(i, marios, redes, genomas, jogo, acompanhamento)
+
+        if gravador is not None:
+            gravador.concluir_frame()
+            if gravador.precisa_estado():
+                vivos = np.zeros(len(todos_marios), dtype=bool)
+                vivos[posicoes] = True
+                gravador.registrar_estado(
+                    jogo.distancia_percorrida,
+                    vivos,
+                    [mario.y for mario in todos_marios],
+                    [mario.velocidade_y for mario in todos_marios],
+                )
+
+        jogo.vivos = len(marios)
+        if desenhar:
+            jogo.desenhar()
+        if perfil is not None:
+            perfil.finalizar_frame(vivos=len(marios))
+
+        if not marios:
+            rodando = False
+        if jogo.vitoria:
+            rodando = False
+        if jogo.pontuacao > ajustes["max_score"]:
+            rodando = False
+
+    if gravador is not None:
+        gravador.fechar([genome.fitness for genome in genomas_avaliados])
+    return frames
+
+
+def _avaliar_vetorizado(
+    genomas, config, ajustes, semente=None, geracao=1, perfil=None
+) -> int:
+    """Mesma avaliação de ``avaliar_genomas`` com a população em arrays NumPy.
+
+    Física, sensores, colisões e recompensas são calculados para todos os
+    agentes de uma vez. As redes são ativadas por genoma ou, com
+    ``ajustes["batched_nn"]``, todas juntas por ``RedesCompiladas``. As somas
+    de fitness seguem a mesma ordem do laço por objeto, então o resultado é
+    idêntico. Não desenha: sempre usa a simulação sem pygame.
+    """
+
+    fitness, frames = avaliar_mundos(genomas, config, ajustes, [semente], geracao, perfil)
+    for genome, valor in zip(genomas, fitness[0].tolist()):
+        genome.fitness = valor
+    return frames
+
+
+class _MundoVetorizado:
+    """Um mundo do motor vetorizado: jogo, população, fitness e gravação de uma semente."""
+
+    def __init__(self, indice, genomas, ajustes, semente, geracao):
+        quantidade = len(genomas)
+        self.jogo = _criar_jogo(False, semente, indice=indice)
+        self.jogo.geracao = geracao
+        self.ajustes = ajustes
+        self.populacao = PopulacaoVetorizada(quantidade, 100, CHAO_Y)
+        self.fitness = np.zeros(quantidade)
+        self.ultimos_fitness = np.zeros(quantidade)
+        self.frames_sem_melhoria = np.zeros(quantidade, dtype=int)
+        self.orcamento = OrcamentoAvaliacao(ajustes)
+        self.gravador = _abrir_gravador(ajustes, semente, geracao, genomas)
+        self.frames = 0
+        self.obstaculos = None
+        self.sensores = None
+        self.salto = self.abaixar = None
+
+    def ler_sensores(self, decidir: bool) -> None:
+        self.obstaculos = ObstaculosVetorizados(self.jogo.obstaculos)
+        if decidir:
+            self.sensores = self.populacao.sensores(self.obstaculos, self.jogo.velocidade)
+
+    def concluir_frame(self, perfil) -> bool:
+        """Física, colisões e recompensas do frame; retorna False quando o mundo termina."""
+
+        jogo, populacao, fitness = self.jogo, self.populacao, self.fitness
+        if self.gravador is not None:
+            self.gravador.registrar_todos(populacao.vivo, self.salto, self.abaixar)
+        with medir_etapa(perfil, 'fisica'):
+            populacao.aplicar_comandos(self.salto, self.abaixar)
+            populacao.atualizar()
+
+        with medir_etapa(perfil, 'colisao'):
+            colidiu = populacao.colisoes(self.obstaculos)
+        vivos = aplicar_recompensas(
+            fitness,
+            self.sensores,
+            self.salto,
+            self.abaixar,
+            populacao.velocidade_y,
+            populacao.vivo,
+            colidiu,
+            jogo.distancia_percorrida,
+            jogo.velocidade,
+            jogo.vitoria,
+        )
+        populacao.remover(colidiu)
+        populacao.remover(
+            estagnados(fitness, self.ultimos_fitness, self.frames_sem_melhoria, vivos)
+        )
+
+        parar = False
+        if self.orcamento.ativo:
+            corte = self.orcamento.limiar_corte(
+                fitness, _ganho_maximo_restante(jogo, self.ajustes["max_score"])
+            )
+            populacao.remover(populacao.vivo & (fitness < corte))
+            parar = self.orcamento.deve_parar(fitness)
+
+        if self.gravador is not None:
+            self.gravador.concluir_frame()
+            if self.gravador.precisa_estado():
+                self.gravador.registrar_estado(
+                    jogo.distancia_percorrida,
+                    populacao.vivo,
+                    populacao.y,
+                    populacao.velocidade_y,
+                )
+
+        jogo.vivos = int(populacao.vivo.sum())
+        if parar or jogo.vitoria or jogo.pontuacao > self.ajustes["max_score"]:
+            return False
+        return jogo.vivos > 0
+
+    def fechar(self) -> None:
+        if self.gravador is not None:
+            self.gravador.fechar(self.fitness)
+
+
+def avaliar_mundos(
+    genomas, config, ajustes, sementes, geracao=1, perfil=None, ajustes_mundos=None
+):
+    """Avalia ``genomas`` em um mundo por semente, todos avançando juntos.
+
+    Cada mundo tem sua própria população vetorizada e produz o mesmo fitness
+    de uma avaliação isolada com aquela semente; com ``batched_nn`` as redes
+    de todos os mundos são ativadas em uma só chamada. ``ajustes_mundos``
+    (opcional) troca os ajustes de cada mundo, por exemplo para gravar cada
+    um em outra pasta. Retorna ``(fitness, frames)``: matriz (mundos,
+    genomas) e o total de frames simulados somando os mundos.
+    """
+
+    quantidade = len(genomas)
+    if ajustes_mundos is None:
+        ajustes_mundos = [ajustes] * len(sementes)
+    mundos = [
+        _MundoVetorizado(indice, genomas, ajustes_mundo, semente, geracao)
+        for indice, (semente, ajustes_mundo) in enumerate(zip(sementes, ajustes_mundos))
+    ]
+    if ajustes.get("batched_nn"):
+        redes = RedesCompiladas(list(genomas) * len(mundos), config)
+        entradas = np.zeros((quantidade * len(mundos), redes.num_entradas))
+    else:
+        redes = [criar_rede(genome, config) for genome in genomas]
+    saidas = np.zeros((quantidade * len(mundos), ACTION_COUNT))
+    intervalo = _intervalo_decisao(ajustes)
+
+    ativos = list(enumerate(mundos)) if quantidade else []
+    frames = 0
+    while ativos:
+        frames += 1
+        if perfil is not None:
+            perfil.iniciar_frame()
+        with medir_etapa(perfil, 'atualizar'):
+            for _, mundo in ativos:
+                mundo.jogo.atualizar()
+                mundo.frames += 1
+
+        decidir = (frames - 1) % intervalo == 0
+        with medir_etapa(perfil, 'sensores'):
+            for _, mundo in ativos:
+                mundo.ler_sensores(decidir)
+        if decidir:
+            with medir_etapa(perfil, 'rede'):
+                if isinstance(redes, RedesCompiladas):
+                    # Linhas de mundos já encerrados ficam com a última leitura
+                    for k, mundo in ativos:
+                        entradas[k * quantidade:(k + 1) * quantidade] = mundo.sensores
+                    saidas = redes.ativar(entradas)
+                else:
+                    for k, mundo in ativos:
+                        for i in np.flatnonzero(mundo.populacao.vivo):
+                            saidas[k * quantidade + i] = redes[i].activate(mundo.sensores[i].tolist())
+            for k, mundo in ativos:
+                fatia = saidas[k * quantidade:(k + 1) * quantidade]
+                mundo.salto = fatia[:, 0] > 0.5
+                mundo.abaixar = fatia[:, 1] > 0.5
+
+        ativos = [(k, mundo) for k, mundo in ativos if mundo.concluir_frame(perfil)]
+        if perfil is not None:
+            perfil.finalizar_frame(vivos=sum(mundo.jogo.vivos for _, mundo in ativos))
+
+    for mundo in mundos:
+        mundo.fechar()
+    fitness = np.array([mundo.fitness for mundo in mundos]).reshape(len(mundos), quantidade)
+    return fitness, sum(mundo.frames for mundo in mundos)
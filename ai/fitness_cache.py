@@ -0,0 +1,127 @@
+"""Cache de fitness para genomas que voltam a ser avaliados sem mudanças.
+
+Com ``elitism`` e ``species_elitism``, os melhores genomas passam intactos
+para a geração seguinte. Com a mesma semente (``--fixed-track``), o fitness
+deles já é conhecido: a avaliação é determinística e o fitness de um genoma
+não depende dos demais. A chave é um hash da estrutura do genoma (nós,
+conexões, pesos) somado ao contexto da avaliação (sementes e ajustes que
+mudam o fitness).
+"""
+
+from __future__ import annotations
+
+import hashlib
+import pickle
+from collections import OrderedDict
+from pathlib import Path
+
+# Ajustes de TRAINING_SETTINGS que alteram o fitness de um genoma. O caminho
+# de avaliação entra também: a rede em lote pode diferir no último bit
+AJUSTES_DO_FITNESS = (
+    "max_score",
+    "decision_interval",
+    "episodes",
+    "episode_aggregate",
+    "vectorized",
+    "batched_nn",
+)
+# Opções de orçamento tornam o fitness dependente do resto da população
+AJUSTES_INCOMPATIVEIS = ("stable_frames", "max_eval_seconds", "cull")
+
+
+def hash_estrutural(genome) -> str:
+    """Hash dos nós e conexões do genoma (a chave do genoma não entra)."""
+
+    nos = sorted(
+        (chave, no.bias, no.response, no.activation, no.aggregation)
+        for chave, no in genome.nodes.items()
+    )
+    conexoes = sorted(
+        (chave, conexao.weight, conexao.enabled)
+        for chave, conexao in genome.connections.items()
+    )
+    # repr de float é exato, então pesos diferentes nunca colidem por arredondamento
+    return hashlib.blake2b(repr((nos, conexoes)).encode(), digest_size=16).hexdigest()
+
+
+def contexto_avaliacao(sementes, ajustes) -> tuple:
+    """Parte da chave que descreve a avaliação: sementes e ajustes relevantes."""
+
+    return (tuple(sementes),) + tuple(ajustes.get(nome) for nome in AJUSTES_DO_FITNESS)
+
+
+def cache_compativel(ajustes) -> bool:
+    return not any(ajustes.get(nome) for nome in AJUSTES_INCOMPATIVEIS)
+
+
+class CacheFitness:
+    """LRU de ``capacidade`` entradas (hash do genoma, contexto) -> fitness.
+
+    ``caminho`` é o arquivo padrão de ``salvar`` (ao lado dos checkpoints).
+    """
+
+    def __init__(self, capacidade=1000, caminho=None):
+        self.capacidade = capacidade
+        self.caminho = caminho
+        self._entradas = OrderedDict()
+        self.acertos = 0
+        self.faltas = 0
+
+    def __len__(self):
+        return len(self._entradas)
+
+    def obter(self, genome, contexto):
+        """Fitness guardado para o genoma nesse contexto, ou None."""
+
+        chave = (hash_estrutural(genome), contexto)
+        fitness = self._entradas.get(chave)
+        if fitness is None:
+            self.faltas += 1
+            return None
+        self._entradas.move_to_end(chave)
+        self.acertos += 1
+        return fitness
+
+    def guardar(self, genome, contexto, fitness) -> None:
+        chave = (hash_estrutural(genome), contexto)
+        self._entradas[chave] = fitness
+        self._entradas.move_to_end(chave)
+        while len(self._entradas) > self.capacidade:
+            self._entradas.popitem(last=False)
+
+    def separar(self, genomas, contexto):
+        """Aplica o fitness guardado e retorna os genomas que ainda precisam ser avaliados."""
+
+        pendentes = []
+        for genome in genomas:
+            fitness = self.obter(genome, contexto)
+            if fitness is None:
+                pendentes.append(genome)
+            else:
+                genome.fitness = fitness
+        return pendentes
+
+    def serializar(self) -> bytes:
+        """Conteúdo do arquivo de ``salvar``, para gravá-lo em outra thread."""
+
+        return pickle.dumps(list(self._entradas.items()), protocol=pickle.HIGHEST_PROTOCOL)
+
+    def salvar(self, caminho=None) -> None:
+        caminho = Path(caminho or self.caminho)
+        temporario = caminho.with_suffix(caminho.suffix + ".tmp")
+        with open(temporario, "wb") as arquivo:
+            arquivo.write(self.serializar())
+        temporario.replace(caminho)
+
+    def carregar(self, caminho) -> bool:
+        """Lê um cache salvo; retorna False se o arquivo não existir."""
+
+        caminho = Path(caminho)
+        if not caminho.exists():
+            return False
+        with open(caminho, "rb") as arquivo:
+            for chave, fitness in pickle.load(arquivo):
+                self._entradas[chave] = fitness
+        while len(self._entradas) > self.capacidade:
+            self._entradas.popitem(last=False)
+        return True
@@ -0,0 +1,337 @@
+"""Modelo de ilhas: K populações NEAT evoluindo em processos separados.
+
+Cada ilha é uma população independente, com semente própria (população
+inicial e percursos diferentes) e checkpoints em ``checkpoint_dir/ilha-i``.
+A cada M gerações as ilhas trocam os melhores genomas em anel: a ilha ``i``
+envia cópias dos seus melhores para a ilha ``i + 1``. Várias populações
+menores em paralelo usam todos os núcleos e mantêm a diversidade, sem
+deixar cada geração mais lenta como uma população única maior.
+
+Nós ocultos e números de inovação ficam em faixas separadas por ilha, para
+que um imigrante nunca colida com genes criados na ilha que o recebe.
+"""
+
+from __future__ import annotations
+
+import contextlib
+import copy
+import multiprocessing
+import os
+import queue
+import random
+import re
+import threading
+import traceback
+from argparse import Namespace
+from itertools import count
+from pathlib import Path
+
+from neat.reporting import BaseReporter
+
+from ai.training import (
+    AJUSTES_PADRAO,
+    AvaliadorGeracoes,
+    anexar_cache_fitness,
+    aplicar_opcoes,
+    criar_cache_fitness,
+    criar_populacao,
+    encerrar_checkpoints,
+)
+
+# Tamanho da faixa de chaves de nó e de números de inovação de cada ilha
+FAIXA_NOS = 10**6
+FAIXA_INOVACOES = 10**8
+
+
+def separar_numeracao(populacao, ilha: int) -> None:
+    """Faz os novos nós e inovações da ilha saírem da faixa reservada a ela."""
+
+    inicio = ilha * FAIXA_NOS
+    locais = [
+        chave
+        for genome in populacao.population.values()
+        for chave in genome.nodes
+        if inicio <= chave < inicio + FAIXA_NOS
+    ]
+    proximo = max(locais, default=inicio - 1) + 1
+    genome_config = populacao.config.genome_config
+    if genome_config.node_indexer is not None:
+        # Um checkpoint restaurado continua a contagem de onde parou
+        salvo = next(genome_config.node_indexer)
+        if inicio <= salvo < inicio + FAIXA_NOS:
+            proximo = max(proximo, salvo)
+    genome_config.node_indexer = count(proximo)
+    # neat-python < 1.0 não numera inovações; o cruzamento usa só a chave da conexão
+    inovacoes = getattr(populacao.reproduction, "innovation_tracker", None)
+    if inovacoes is not None:
+        inovacoes.global_counter = max(inovacoes.global_counter, ilha * FAIXA_INOVACOES)
+
+
+def receber_imigrantes(populacao, imigrantes) -> None:
+    """Troca os últimos genomas da população pelos imigrantes e refaz as espécies.
+
+    Os últimos genomas são filhos recém-criados (os elites vêm primeiro), e
+    os imigrantes ganham chaves novas desta ilha e fitness ainda não avaliado.
+    """
+
+    imigrantes = imigrantes[: max(0, len(populacao.population) - 1)]
+    if not imigrantes:
+        return
+    for chave in list(populacao.population)[-len(imigrantes):]:
+        del populacao.population[chave]
+    reproducao = populacao.reproduction
+    for genome in imigrantes:
+        genome.key = next(reproducao.genome_indexer)
+        genome.fitness = None
+        reproducao.ancestors[genome.key] = ()
+        populacao.population[genome.key] = genome
+    populacao.species.speciate(populacao.config, populacao.population, populacao.generation)
+
+
+class _RelatorioIlha(BaseReporter):
+    """Guarda os melhores genomas de cada geração e envia as estatísticas ao processo principal."""
+
+    def __init__(self, ilha, migrantes, resultados):
+        self.ilha = ilha
+        self.migrantes = migrantes
+        self.resultados = resultados
+        self.geracao = 0
+        self.avaliadas = 0
+        self.solucao = False
+        self.melhores = []
+
+    def __getstate__(self):
+        # Os checkpoints gravam as espécies junto com os reporters; a fila não vai junto
+        return dict(self.__dict__, resultados=None, melhores=[])
+
+    def start_generation(self, generation):
+        self.geracao = generation
+
+    def post_evaluate(self, config, population, species, best_genome):
+        genomas = sorted(population.values(), key=lambda g: g.fitness, reverse=True)
+        self.melhores = [copy.deepcopy(g) for g in genomas[: self.migrantes]]
+        self.avaliadas += 1
+        media = sum(g.fitness for g in genomas) / len(genomas)
+        self.resultados.put(
+            ("geracao", self.ilha, self.geracao, best_genome.fitness, media, len(species.species))
+        )
+
+    def found_solution(self, config, generation, best):
+        if not config.no_fitness_termination:
+            self.solucao = True
+
+
+def _evoluir_ilha(ilha, quantidade, args, entradas, resultados, barreira, parada) -> None:
+    ajustes = dict(AJUSTES_PADRAO)
+    aplicar_opcoes(args, ajustes)
+    cache = criar_cache_fitness(args, ajustes)
+    populacao, _, checkpointer = criar_populacao(args)
+    anexar_cache_fitness(checkpointer, cache)
+    avaliador = AvaliadorGeracoes(ajustes, cache=cache)
+    separar_numeracao(populacao, ilha)
+    relatorio = _RelatorioIlha(ilha, args.migrants, resultados)
+    populacao.add_reporter(relatorio)
+
+    intervalo = max(1, args.migration_interval)
+    restantes = args.generations
+    trocas = 0
+    try:
+        while restantes > 0:
+            # As trocas acontecem em gerações múltiplas de M, também depois de retomar
+            passo = min(restantes, intervalo - populacao.generation % intervalo)
+            # Decidido pelo plano, igual em todas as ilhas: uma ilha que acha a
+            # solução para antes e não chega à geração planejada
+            fronteira = (populacao.generation + passo) % intervalo == 0
+            populacao.run(avaliador, passo)
+            restantes -= passo
+            if relatorio.solucao:
+                parada.set()
+            if restantes <= 0 and not fronteira:
+                break
+            # Todas as ilhas chegam aqui antes de decidir se continuam: sem isso
+            # uma ilha encerrada deixaria a vizinha esperando imigrantes para sempre.
+            # A troca acontece também ao terminar em uma fronteira, então o último
+            # checkpoint já tem os imigrantes e retomar dele segue como a execução
+            # sem interrupção
+            barreira.wait()
+            if parada.is_set():
+                break
+            entradas[(ilha + 1) % quantidade].put(relatorio.melhores)
+            receber_imigrantes(populacao, entradas[ilha].get())
+            trocas += 1
+            if checkpointer is not None and checkpointer.last_generation_checkpoint == populacao.generation:
+                # Regrava o checkpoint desta geração já com os imigrantes
+                checkpointer.save_checkpoint(
+                    populacao.config, populacao.population, populacao.species, populacao.generation
+                )
+    finally:
+        encerrar_checkpoints(checkpointer, cache)
+
+    resumo = {
+        "semente": args.seed,
+        "geracoes": relatorio.avaliadas,
+        "ultima_geracao": relatorio.geracao,
+        "especies": len(populacao.species.species),
+        "trocas": trocas,
+        "solucao": relatorio.solucao,
+    }
+    resultados.put(("fim", ilha, populacao.best_genome, resumo))
+
+
+def _executar_ilha(ilha, quantidade, args, entradas, resultados, barreira, parada) -> None:
+    """Processo de uma ilha; a saída do treinamento dela não vai para o terminal."""
+
+    try:
+        with open(os.devnull, "w") as nulo, contextlib.redirect_stdout(nulo):
+            _evoluir_ilha(ilha, quantidade, args, entradas, resultados, barreira, parada)
+    except threading.BrokenBarrierError:
+        # Outra ilha falhou; o processo principal relata o erro dela
+        pass
+    except BaseException:
+        barreira.abort()
+        resultados.put(("erro", ilha, traceback.format_exc()))
+
+
+def checkpoints_comuns(pasta, quantidade: int):
+    """Última geração salva por todas as ilhas e o checkpoint de cada uma.
+
+    Retomar todas da mesma geração mantém as trocas sincronizadas.
+    """
+
+    geracoes = []
+    for ilha in range(quantidade):
+        salvas = set()
+        for arquivo in (Path(pasta) / f"ilha-{ilha}").glob("neat-checkpoint-*"):
+            encontrado = re.fullmatch(r"neat-checkpoint-(\d+)", arquivo.name)
+            if encontrado:
+                salvas.add(int(encontrado.group(1)))
+        geracoes.append(salvas)
+    comuns = set.intersection(*geracoes) if geracoes else set()
+    if not comuns:
+        raise FileNotFoundError(f"Nenhuma geração salva por todas as {quantidade} ilhas em {pasta}")
+    geracao = max(comuns)
+    caminhos = [Path(pasta) / f"ilha-{ilha}" / f"neat-checkpoint-{geracao}" for ilha in range(quantidade)]
+    return geracao, caminhos
+
+
+def opcoes_da_ilha(args: Namespace, ilha: int, semente: int, checkpoint=None) -> Namespace:
+    """Opções da CLI vistas pela ilha ``ilha``: semente, pastas e checkpoint próprios."""
+
+    opcoes = Namespace(**vars(args))
+    opcoes.seed = semente
+    opcoes.headless = True
+    opcoes.workers = 1
+    opcoes.islands = 1
+    opcoes.profile = opcoes.profile_overlay = False
+    opcoes.profile_trace = ""
+    opcoes.checkpoint_dir = str(Path(args.checkpoint_dir) / f"ilha-{ilha}")
+    opcoes.load_checkpoint = str(checkpoint) if checkpoint else ""
+    if args.record_dir:
+        opcoes.record_dir = str(Path(args.record_dir) / f"ilha-{ilha}")
+    return opcoes
+
+
+def _imprimir_geracao(geracao, relatos) -> None:
+    ilha, (melhor, _, _) = max(relatos.items(), key=lambda item: item[1][0])
+    medias = " ".join(f"{i}:{relatos[i][1]:.0f}" for i in sorted(relatos))
+    especies = sum(relato[2] for relato in relatos.values())
+    print(
+        f"Geração {geracao}: melhor {melhor:.2f} (ilha {ilha}) | "
+        f"médias por ilha {medias} | espécies {especies}"
+    )
+
+
+def treinar_ilhas(args: Namespace):
+    """Evolui ``args.islands`` populações em processos e retorna o melhor genoma de todas."""
+
+    quantidade = args.islands
+    if args.workers != 1:
+        print("Aviso: com --islands cada ilha avalia em um único processo; --workers é ignorado.")
+    if args.profile or args.profile_trace or args.profile_overlay:
+        print("Aviso: --profile não é usado com --islands.")
+    if not args.headless:
+        print("Aviso: as ilhas treinam sem renderização.")
+
+    checkpoints = [None] * quantidade
+    if args.load_checkpoint:
+        geracao, checkpoints = checkpoints_comuns(args.load_checkpoint, quantidade)
+        print(f"Retomando as {quantidade} ilhas da geração {geracao}: {args.load_checkpoint}")
+    # Sem --seed as ilhas ainda precisam de sementes diferentes entre si
+    base = args.seed if args.seed is not None else random.randrange(2**32)
+    sementes = [(base + ilha) % 2**32 for ilha in range(quantidade)]
+
+    print(f"Ilhas: {quantidade} (sementes {sementes[0]}..{sementes[-1]}), "
+          f"{args.migrants} migrantes a cada {max(1, args.migration_interval)} gerações")
+    print("Iniciando...\n")
+
+    entradas = [multiprocessing.Queue() for _ in range(quantidade)]
+    resultados = multiprocessing.Queue()
+    barreira = multiprocessing.Barrier(quantidade)
+    parada = multiprocessing.Event()
+    processos = [
+        multiprocessing.Process(
+            target=_executar_ilha,
+            args=(
+                ilha,
+                quantidade,
+                opcoes_da_ilha(args, ilha, sementes[ilha], checkpoints[ilha]),
+                entradas,
+                resultados,
+                barreira,
+                parada,
+            ),
+            name=f"ilha-{ilha}",
+        )
+        for ilha in range(quantidade)
+    ]
+
+    por_geracao = {}
+    campeoes = {}
+    resumos = {}
+    try:
+        for processo in processos:
+            processo.start()
+        while len(resumos) < quantidade:
+            try:
+                mensagem = resultados.get(timeout=1.0)
+            except queue.Empty:
+                mortos = [p.name for p in processos if p.exitcode not in (None, 0)]
+                if mortos:
+                    raise RuntimeError(f"Processo encerrado sem resultado: {', '.join(mortos)}")
+                continue
+            tipo, ilha = mensagem[0], mensagem[1]
+            if tipo == "erro":
+                raise RuntimeError(f"A ilha {ilha} falhou:\n{mensagem[2]}")
+            if tipo == "fim":
+                campeoes[ilha], resumos[ilha] = mensagem[2], mensagem[3]
+                continue
+            geracao, melhor, media, especies = mensagem[2:]
+            por_geracao.setdefault(geracao, {})[ilha] = (melhor, media, especies)
+            # Cada geração é impressa quando todas as ilhas a terminaram
+            while por_geracao and len(por_geracao[min(por_geracao)]) == quantidade:
+                primeira = min(por_geracao)
+                _imprimir_geracao(primeira, por_geracao.pop(primeira))
+        for processo in processos:
+            processo.join()
+    finally:
+        for processo in processos:
+            if processo.is_alive():
+                processo.terminate()
+                processo.join()
+
+    # Gerações que só parte das ilhas avaliou (outra encontrou a solução antes)
+    for geracao in sorted(por_geracao):
+        _imprimir_geracao(geracao, por_geracao[geracao])
+
+    print("\n=== Ilhas ===")
+    for ilha in range(quantidade):
+        resumo, campeao = resumos[ilha], campeoes[ilha]
+        solucao = " (solução)" if resumo["solucao"] else ""
+        print(
+            f"Ilha {ilha}: semente {resumo['semente']} | {resumo['geracoes']} gerações "
+            f"(última {resumo['ultima_geracao']}) | melhor {campeao.fitness:.2f}{solucao} | "
+            f"{resumo['especies']} espécies | {resumo['trocas']} trocas"
+        )
+    melhor_ilha = max(campeoes, key=lambda ilha: campeoes[ilha].fitness)
+    print(f"Campeão global: ilha {melhor_ilha}")
+    return campeoes[melhor_ilha]
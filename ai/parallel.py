@@ -0,0 +1,111 @@
+"""Avaliação de genomas distribuída entre vários processos."""
+
+from __future__ import annotations
+
+import math
+import multiprocessing
+
+import numpy as np
+
+from ai.episodes import agregar
+from ai.evaluation import avaliar_genomas
+
+# Estado de cada processo trabalhador, preenchido uma única vez pelo initializer
+_CONFIG_TRABALHADOR = None
+_AJUSTES_TRABALHADOR = None
+
+
+def _inicializar_trabalhador(config, ajustes) -> None:
+    global _CONFIG_TRABALHADOR, _AJUSTES_TRABALHADOR
+
+    _CONFIG_TRABALHADOR = config
+    _AJUSTES_TRABALHADOR = ajustes
+
+
+def _avaliar_lote(tarefa):
+    """Avalia uma fatia da população e devolve (fitness, frames)."""
+
+    genomas, semente, geracao = tarefa
+    frames = avaliar_genomas(
+        genomas, _CONFIG_TRABALHADOR, _AJUSTES_TRABALHADOR, semente, geracao
+    )
+    return [genome.fitness for genome in genomas], frames
+
+
+def dividir_em_lotes(itens, quantidade: int):
+    """Divide ``itens`` em até ``quantidade`` fatias contíguas de tamanho parecido."""
+
+    quantidade = max(1, min(quantidade, len(itens)))
+    base, resto = divmod(len(itens), quantidade)
+    lotes = []
+    inicio = 0
+    for i in range(quantidade):
+        fim = inicio + base + (1 if i < resto else 0)
+        lotes.append(itens[inicio:fim])
+        inicio = fim
+    return lotes
+
+
+class AvaliadorParalelo:
+    """Distribui fatias da população por um pool de processos.
+
+    Todas as fatias de uma geração jogam o mesmo percurso (mesma semente), e o
+    percurso não depende dos Marios; por isso o fitness devolvido é idêntico
+    ao de uma avaliação serial. As opções de ``OrcamentoAvaliacao`` ficam
+    desligadas: em cada fatia o top-k e o corte seriam outros.
+    """
+
+    def __init__(self, workers: int, config, ajustes):
+        self.workers = workers
+        self.agregacao = ajustes.get("episode_aggregate", "mean")
+        # Os trabalhadores nunca desenham: sempre usam a simulação sem pygame.
+        # Cada um vê só uma fatia da população, então também não gravam replays
+        ajustes = dict(
+            ajustes, render=False, record_dir="", stable_frames=0, max_eval_seconds=0.0, cull=False
+        )
+        self.pool = multiprocessing.Pool(
+            workers,
+            initializer=_inicializar_trabalhador,
+            initargs=(config, ajustes),
+        )
+
+    def avaliar(self, genomas, semente, geracao) -> int:
+        """Avalia ``genomas`` em paralelo e retorna o total de frames simulados."""
+
+        lotes = dividir_em_lotes(genomas, self.workers)
+        tarefas = [(lote, semente, geracao) for lote in lotes]
+        frames = 0
+        for lote, (fitness, frames_lote) in zip(lotes, self.pool.map(_avaliar_lote, tarefas)):
+            for genome, valor in zip(lote, fitness):
+                genome.fitness = valor
+            frames += frames_lote
+        return frames
+
+    def avaliar_episodios(self, genomas, sementes, geracao) -> int:
+        """Avalia ``genomas`` em todas as ``sementes`` ao mesmo tempo e agrega o fitness.
+
+        Cada tarefa do pool é um par (fatia da população, episódio); a
+        população é dividida só o bastante para ocupar todos os processos.
+        """
+
+        lotes = dividir_em_lotes(genomas, math.ceil(self.workers / len(sementes)))
+        tarefas = [
+            (lote, semente, geracao) for semente in sementes for lote in lotes
+        ]
+        fitness = np.zeros((len(sementes), len(genomas)))
+        frames = 0
+        resultados = iter(self.pool.map(_avaliar_lote, tarefas))
+        for episodio in range(len(sementes)):
+            inicio = 0
+            for lote in lotes:
+                valores, frames_lote = next(resultados)
+                fitness[episodio, inicio:inicio + len(lote)] = valores
+                inicio += len(lote)
+                frames += frames_lote
+        for genome, valor in zip(genomas, agregar(fitness, self.agregacao)):
+            genome.fitness = float(valor)
+        return frames
+
+    def fechar(self) -> None:
+        self.pool.close()
+        self.pool.join()
@@ -0,0 +1,150 @@
+"""Execução do genoma campeão salvo, sem a população NEAT.
+
+O genoma e a configuração são carregados do disco e a rede vira uma
+``RedesCompiladas``, compilada uma vez e reutilizada por ``jogar`` em todos
+os episódios. ``jogar`` roda um episódio (com ou sem janela) e
+``avaliar_sementes`` roda um episódio por semente, com todos os mundos
+avançando juntos e todas as cópias da rede ativadas em uma só chamada.
+"""
+
+from __future__ import annotations
+
+import pickle
+import time
+
+import numpy as np
+
+from ai.compiled import RedesCompiladas
+from ai.config import carregar_config
+from game.simulation import SimulacaoMario
+from utils.constants import FPS
+
+
+def carregar_campeao(caminho_genoma, caminho_config):
+    """Lê o genoma salvo por ``app.py --best-path`` e a configuração NEAT."""
+
+    with open(caminho_genoma, "rb") as arquivo:
+        genome = pickle.load(arquivo)
+    return genome, carregar_config(caminho_config)
+
+
+def _resultado(jogo, semente, frames, segundos, interrompido=False) -> dict:
+    return {
+        "semente": semente,
+        "interrompido": interrompido,
+        "vitoria": jogo.vitoria,
+        "distancia": jogo.distancia_percorrida,
+        "pontuacao": jogo.pontuacao,
+        "frames": frames,
+        "segundos": segundos,
+    }
+
+
+def compilar_campeao(genome, config) -> RedesCompiladas:
+    """Rede do campeão pronta para ``jogar``."""
+
+    return RedesCompiladas([genome], config)
+
+
+def jogar(rede, semente, render=False, max_score=50000, intervalo=1) -> dict:
+    """Um episódio do campeão (``rede`` de ``compilar_campeao``).
+
+    Com ``render`` ele é desenhado a ``FPS`` quadros/s; ESC ou fechar a
+    janela encerra o episódio com ``interrompido`` no resultado.
+    """
+
+    if render:
+        from game.game import JogoMario
+
+        jogo = JogoMario(modo='ia', render=True, semente=semente)
+    else:
+        jogo = SimulacaoMario(modo='ia', semente=semente)
+    mario = jogo.reutilizar_marios(1)[0]
+    jogo.vivos = 1
+
+    frames = 0
+    salto = abaixar = False
+    interrompido = False
+    inicio = time.perf_counter()
+    while jogo.jogo_ativo and jogo.pontuacao <= max_score:
+        if render:
+            if not jogo.processar_eventos():
+                interrompido = True
+                break
+            jogo.relogio.tick(FPS)
+        jogo.atualizar()
+        if frames % intervalo == 0:
+            saidas = rede.ativar([jogo.sensores(mario)])[0]
+            salto, abaixar = saidas[0] > 0.5, saidas[1] > 0.5
+        frames += 1
+        mario.aplicar_comandos(pular=salto, abaixar=abaixar)
+        mario.atualizar()
+        if jogo.verificar_colisao(mario):
+            mario.morrer()
+            jogo.vivos = 0
+            jogo.jogo_ativo = False
+        if render:
+            jogo.desenhar()
+    return _resultado(jogo, semente, frames, time.perf_counter() - inicio, interrompido)
+
+
+def avaliar_sementes(genome, config, sementes, max_score=50000, intervalo=1) -> list:
+    """Um episódio sem janela por semente, todos simulados em lote.
+
+    ``segundos`` de cada episódio é o tempo do lote dividido igualmente
+    entre os episódios (custo amortizado por episódio).
+    """
+
+    sementes = list(sementes)
+    inicio = time.perf_counter()
+    redes = RedesCompiladas([genome] * len(sementes), config)
+    jogos = [SimulacaoMario(modo='ia', semente=semente) for semente in sementes]
+    marios = [jogo.reutilizar_marios(1)[0] for jogo in jogos]
+    ativos = list(range(len(jogos)))
+    frames = [0] * len(jogos)
+    entradas = np.zeros((len(jogos), redes.num_entradas))
+    acoes = np.zeros((len(jogos), 2), dtype=bool)
+
+    passo = 0
+    while ativos:
+        for k in ativos:
+            jogos[k].atualizar()
+        if passo % intervalo == 0:
+            for k in ativos:
+                entradas[k] = jogos[k].sensores(marios[k])
+            acoes = redes.ativar(entradas) > 0.5
+        passo += 1
+
+        restantes = []
+        for k in ativos:
+            jogo, mario = jogos[k], marios[k]
+            frames[k] += 1
+            mario.aplicar_comandos(pular=acoes[k, 0], abaixar=acoes[k, 1])
+            mario.atualizar()
+            if jogo.verificar_colisao(mario):
+                mario.morrer()
+                jogo.jogo_ativo = False
+            if jogo.jogo_ativo and jogo.pontuacao <= max_score:
+                restantes.append(k)
+        ativos = restantes
+
+    segundos = (time.perf_counter() - inicio) / max(1, len(jogos))
+    return [
+        _resultado(jogo, semente, quadros, segundos)
+        for jogo, semente, quadros in zip(jogos, sementes, frames)
+    ]
+
+
+def resumir(resultados) -> dict:
+    """Taxa de vitória, distância média e latência por episódio."""
+
+    distancias = np.array([r["distancia"] for r in resultados], dtype=float)
+    segundos = np.array([r["segundos"] for r in resultados], dtype=float)
+    return {
+        "episodios": len(resultados),
+        "taxa_vitoria": float(np.mean([r["vitoria"] for r in resultados])),
+        "distancia_media": float(distancias.mean()),
+        "distancia_minima": float(distancias.min()),
+        "frames_medios": float(np.mean([r["frames"] for r in resultados])),
+        "ms_por_episodio": float(segundos.mean() * 1000),
+    }
@@ -0,0 +1,249 @@
+"""Montagem de um treinamento NEAT: opções, população, checkpoints e avaliação.
+
+``app.py`` (população única) e ``ai/islands.py`` (uma população por
+processo) usam as mesmas funções. O estado da avaliação (ajustes, pool de
+processos, perfil, cache de fitness e geração atual) fica em um
+``AvaliadorGeracoes``, passado para ``Population.run``.
+"""
+
+from __future__ import annotations
+
+import os
+import random
+import time
+from argparse import Namespace
+from pathlib import Path
+
+import neat
+
+from ai.checkpoints import CheckpointerAssincrono
+from ai.config import carregar_config, validar_config
+from ai.episodes import avaliar_episodios, sementes_episodios
+from ai.evaluation import avaliar_genomas
+from ai.fitness_cache import CacheFitness, cache_compativel, contexto_avaliacao
+
+# Formato de ``ajustes`` (``app.TRAINING_SETTINGS``) e valores padrão
+AJUSTES_PADRAO = {
+    "render": True,
+    "max_score": 50000,
+    "turbo": False,
+    "preview_every": 0,
+    "vectorized": False,
+    "batched_nn": False,
+    "seed": None,
+    "fixed_track": False,
+    "decision_interval": 1,
+    "top_k": 5,
+    "stable_frames": 0,
+    "max_eval_seconds": 0.0,
+    "cull": False,
+    "record_dir": "",
+    "record_state_every": 0,
+    "episodes": 1,
+    "episode_aggregate": "mean",
+}
+
+
+def aplicar_opcoes(args: Namespace, ajustes: dict) -> int:
+    """Copia as opções da CLI para ``ajustes`` e retorna a quantidade de processos."""
+
+    ajustes["render"] = not args.headless
+    ajustes["max_score"] = args.max_score
+    ajustes["turbo"] = args.turbo
+    ajustes["preview_every"] = max(0, args.preview_every)
+    ajustes["batched_nn"] = args.batched_nn
+    ajustes["decision_interval"] = max(1, args.decision_interval)
+    ajustes["top_k"] = max(1, args.top_k)
+    ajustes["stable_frames"] = max(0, args.stable_frames)
+    ajustes["max_eval_seconds"] = max(0.0, args.max_eval_seconds)
+    ajustes["cull"] = args.cull
+    ajustes["record_dir"] = args.record_dir
+    ajustes["record_state_every"] = max(0, args.record_state_every)
+    ajustes["episodes"] = max(1, args.episodes)
+    ajustes["episode_aggregate"] = args.episode_aggregate
+    if args.seed is not None:
+        random.seed(args.seed)
+    ajustes["fixed_track"] = args.fixed_track
+    ajustes["seed"] = args.seed
+    if args.fixed_track and args.seed is None:
+        ajustes["seed"] = random.randrange(2**32)
+    ajustes["vectorized"] = args.vectorized or args.batched_nn
+    workers = args.workers if args.workers > 0 else (os.cpu_count() or 1)
+    if workers > 1 and ajustes["render"]:
+        # Os processos trabalhadores não abrem janela
+        print("Aviso: com --workers > 1 o treinamento roda sem renderização.")
+        ajustes["render"] = False
+    if ajustes["vectorized"] and ajustes["render"]:
+        print("Aviso: --vectorized não desenha; o treinamento roda sem renderização.")
+        ajustes["render"] = False
+    orcamento = [
+        opcao
+        for opcao, ativa in (
+            ("--stable-frames", ajustes["stable_frames"]),
+            ("--max-eval-seconds", ajustes["max_eval_seconds"]),
+            ("--cull", ajustes["cull"]),
+        )
+        if ativa
+    ]
+    if orcamento and workers > 1:
+        # Cada trabalhador veria só uma fatia: o top-k e o corte não seriam os da população
+        ignorado = "são ignorados" if len(orcamento) > 1 else "é ignorado"
+        print(f"Aviso: {', '.join(orcamento)} {ignorado} com --workers > 1.")
+        ajustes["stable_frames"] = 0
+        ajustes["max_eval_seconds"] = 0.0
+        ajustes["cull"] = False
+    elif orcamento:
+        if len(orcamento) > 1:
+            aviso = f"{', '.join(orcamento)} são experimentais: mudam"
+        else:
+            aviso = f"{orcamento[0]} é experimental: muda"
+        print(
+            f"Aviso: {aviso} o fitness de quem sai antes do fim da geração e, com "
+            "ele, a seleção do NEAT."
+        )
+    if ajustes["episodes"] > 1 and workers == 1 and not ajustes["vectorized"]:
+        print(
+            "Aviso: os episódios rodam um após o outro; use --vectorized para "
+            "avançá-los juntos ou --workers para rodá-los em paralelo."
+        )
+    return workers
+
+
+def criar_populacao(args: Namespace):
+    """Cria ou restaura a população e retorna ``(populacao, stats, checkpointer)``."""
+
+    if args.load_checkpoint:
+        populacao = neat.Checkpointer.restore_checkpoint(args.load_checkpoint)
+        config = populacao.config
+        validar_config(config)
+        print(f"Checkpoint carregado: {args.load_checkpoint}")
+    else:
+        config_path = Path(args.config)
+        if not config_path.exists():
+            raise FileNotFoundError(f"Arquivo de configuração não encontrado: {config_path}")
+        config = carregar_config(config_path)
+        populacao = neat.Population(config)
+    populacao.add_reporter(neat.StdOutReporter(True))
+    stats = neat.StatisticsReporter()
+    populacao.add_reporter(stats)
+    checkpointer = None
+    if args.checkpoint_every > 0:
+        checkpoint_dir = Path(args.checkpoint_dir)
+        checkpoint_dir.mkdir(parents=True, exist_ok=True)
+        prefix = str(checkpoint_dir / "neat-checkpoint-")
+        checkpointer = CheckpointerAssincrono(
+            args.checkpoint_every, filename_prefix=prefix, manter=max(0, args.checkpoint_keep)
+        )
+        # Ao retomar, conta o intervalo a partir da geração restaurada
+        checkpointer.last_generation_checkpoint = populacao.generation
+        populacao.add_reporter(checkpointer)
+    return populacao, stats, checkpointer
+
+
+def criar_cache_fitness(args: Namespace, ajustes: dict):
+    """``CacheFitness`` pedido por ``--fitness-cache`` (None se desativado ou incompatível)."""
+
+    if args.fitness_cache <= 0:
+        return None
+    if not cache_compativel(ajustes):
+        print("Aviso: --fitness-cache é ignorado com --stable-frames, --max-eval-seconds ou --cull.")
+        return None
+    caminho = None
+    if args.checkpoint_every > 0:
+        caminho = Path(args.checkpoint_dir) / "fitness-cache.pkl"
+    cache = CacheFitness(args.fitness_cache, caminho)
+    if args.load_checkpoint:
+        salvo = Path(args.load_checkpoint).parent / "fitness-cache.pkl"
+        if cache.carregar(salvo):
+            print(f"Cache de fitness carregado: {salvo} ({len(cache)} genomas)")
+    if not ajustes["fixed_track"]:
+        print("Aviso: sem --fixed-track cada geração joga outro percurso e o cache quase não acerta.")
+    if ajustes["record_dir"]:
+        print("Aviso: com --fitness-cache os replays só têm os genomas reavaliados (veja a chave de cada agente).")
+    return cache
+
+
+def anexar_cache_fitness(checkpointer, cache) -> None:
+    """Grava o cache de fitness junto com cada checkpoint, em segundo plano."""
+
+    if cache is not None and cache.caminho is not None and checkpointer is not None:
+        checkpointer.anexos.append(lambda: (cache.caminho, cache.serializar()))
+
+
+def encerrar_checkpoints(checkpointer, cache) -> None:
+    """Espera os checkpoints pendentes e grava o cache de fitness final."""
+
+    if checkpointer is not None:
+        checkpointer.fechar()
+    if cache is not None and cache.caminho is not None:
+        cache.salvar()
+
+
+class AvaliadorGeracoes:
+    """Função de avaliação de ``Population.run`` com o estado do treinamento.
+
+    ``paralelo`` (``AvaliadorParalelo``), ``perfil`` (``PerfilFrames``) e
+    ``cache`` (``CacheFitness``) são opcionais. ``geracao`` conta as
+    chamadas e numera replays e perfis.
+    """
+
+    def __init__(self, ajustes, paralelo=None, perfil=None, cache=None, geracao=1):
+        self.ajustes = ajustes
+        self.paralelo = paralelo
+        self.perfil = perfil
+        self.cache = cache
+        self.geracao = geracao
+
+    def semente_geracao(self) -> int:
+        """Escolhe a semente do percurso compartilhado pela geração.
+
+        Com ``--fixed-track`` todas as gerações jogam o mesmo percurso; caso
+        contrário a semente vem do ``random`` global (reprodutível com ``--seed``).
+        """
+
+        if self.ajustes["fixed_track"]:
+            return self.ajustes["seed"]
+        return random.randrange(2**32)
+
+    def __call__(self, genomes, config):
+        ajustes, cache, perfil = self.ajustes, self.cache, self.perfil
+        genomas = [genome for _, genome in genomes]
+        semente = self.semente_geracao()
+        sementes = sementes_episodios(semente, ajustes["episodes"])
+        inicio = time.perf_counter()
+
+        if cache is not None:
+            contexto = contexto_avaliacao(sementes, ajustes)
+            avaliados = genomas
+            genomas = cache.separar(avaliados, contexto)
+            if len(genomas) < len(avaliados):
+                print(f"Cache de fitness: {len(avaliados) - len(genomas)} genomas sem reavaliar")
+
+        if not genomas:
+            frames = 0
+        elif ajustes["episodes"] > 1:
+            if self.paralelo is not None:
+                frames = self.paralelo.avaliar_episodios(genomas, sementes, self.geracao)
+            else:
+                frames = avaliar_episodios(
+                    genomas, config, ajustes, sementes, self.geracao, perfil
+                )
+        elif self.paralelo is not None:
+            frames = self.paralelo.avaliar(genomas, semente, self.geracao)
+        else:
+            frames = avaliar_genomas(genomas, config, ajustes, semente, self.geracao, perfil)
+
+        if cache is not None:
+            for genome in genomas:
+                cache.guardar(genome, contexto, genome.fitness)
+
+        if ajustes["turbo"] or not ajustes["render"]:
+            decorrido = max(time.perf_counter() - inicio, 1e-9)
+            print(
+                f"Simulação: {frames} frames em {decorrido:.2f}s "
+                f"({frames / decorrido:.0f} frames/s)"
+            )
+        if perfil is not None:
+            perfil.imprimir_resumo(f"Perfil da geração {self.geracao}")
+
+        self.geracao += 1
@@ -3,31 +3,40 @@
 from __future__ import annotations
 
 import argparse
-import os
 import pickle
-import sys
+import random
 from pathlib import Path
 
-import neat
-import pygame
-
-from game.game import JogoMario
-from game.mario import Mario
+from ai.checkpoints import GravadorAssincrono, ultimo_checkpoint
+from ai.episodes import validar_agregacao
+from ai.islands import treinar_ilhas
+from ai.parallel import AvaliadorParalelo
+from ai.training import (
+    AJUSTES_PADRAO,
+    AvaliadorGeracoes,
+    anexar_cache_fitness,
+    aplicar_opcoes,
+    criar_cache_fitness,
+    criar_populacao,
+    encerrar_checkpoints,
+)
+from utils.profiling import PerfilFrames
 from utils.constants import (
     ACTION_COUNT,
-    CHAO_Y,
     DISTANCIA_PARA_VENCER,
-    FPS,
     SENSOR_COUNT,
 )
 
 
-# Variáveis globais utilizadas durante a avaliação NEAT
-CURRENT_GENERATION = 1
-TRAINING_SETTINGS = {
-    "render": True,
-    "max_score": 50000,
-}
+# Ajustes do treinamento, preenchidos a partir da CLI (veja ai/training.py)
+TRAINING_SETTINGS = dict(AJUSTES_PADRAO)
+
+
+def _tipo_agregacao(valor: str) -> str:
+    try:
+        return validar_agregacao(valor)
+    except ValueError as erro:
+        raise argparse.ArgumentTypeError(str(erro)) from erro
 
 
 def build_arg_parser() -> argparse.ArgumentParser:
@@ -52,6 +61,146 @@ def build_arg_parser() -> argparse.ArgumentParser:
         action="store_true",
         help="Executa o treinamento sem abrir janela (modo rápido)",
     )
+    parser.add_argument(
+        "--turbo",
+        action="store_true",
+        help="Simula sem limitar o FPS e sem desenhar (velocidade máxima da CPU)",
+    )
+    parser.add_argument(
+        "--preview-every",
+        type=int,
+        default=0,
+        help="No modo turbo, desenha um quadro a cada N frames (0 nunca desenha)",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Processos usados para avaliar os genomas (0 usa todos os núcleos)",
+    )
+    parser.add_argument(
+        "--vectorized",
+        action="store_true",
+        help="Simula a população inteira em arrays NumPy (sempre sem janela)",
+    )
+    parser.add_argument(
+        "--batched-nn",
+        action="store_true",
+        help="Ativa as redes de toda a população em uma chamada (implica --vectorized)",
+    )
+    parser.add_argument(
+        "--seed",
+        type=int,
+        default=None,
+        help="Semente que torna o treinamento (população e percursos) reprodutível",
+    )
+    parser.add_argument(
+        "--fixed-track",
+        action="store_true",
+        help="Usa o mesmo percurso pré-calculado em todas as gerações",
+    )
+    parser.add_argument(
+        "--decision-interval",
+        type=int,
+        default=1,
+        help="Consulta as redes a cada K frames, repetindo a última ação (1 = todo frame)",
+    )
+    parser.add_argument(
+        "--top-k",
+        type=int,
+        default=5,
+        help="Quantos melhores genomas --stable-frames e --cull preservam",
+    )
+    parser.add_argument(
+        "--stable-frames",
+        type=int,
+        default=0,
+        help=(
+            "Experimental: encerra a geração quando o top-k não muda por N frames "
+            "(0 desativa); quem ainda estava vivo fica com um fitness menor, o que "
+            "muda a seleção do NEAT"
+        ),
+    )
+    parser.add_argument(
+        "--max-eval-seconds",
+        type=float,
+        default=0.0,
+        help=(
+            "Experimental: tempo máximo de avaliação por geração, em segundos "
+            "(0 desativa); quem ainda estava vivo fica com um fitness menor"
+        ),
+    )
+    parser.add_argument(
+        "--cull",
+        action="store_true",
+        help=(
+            "Experimental: retira agentes que não alcançam mais o top-k; o top-k não "
+            "muda, mas os retirados ficam com um fitness menor, o que muda o fitness "
+            "ajustado das espécies e a seleção do NEAT"
+        ),
+    )
+    parser.add_argument(
+        "--episodes",
+        type=int,
+        default=1,
+        help="Percursos jogados por genoma em cada geração (fitness agregado)",
+    )
+    parser.add_argument(
+        "--episode-aggregate",
+        type=_tipo_agregacao,
+        default="mean",
+        help="Como combinar o fitness dos episódios: mean, min ou qNN (quantil, ex.: q25)",
+    )
+    parser.add_argument(
+        "--fitness-cache",
+        type=int,
+        default=0,
+        help="Guarda o fitness de até N genomas e não reavalia os repetidos (0 desativa)",
+    )
+    parser.add_argument(
+        "--islands",
+        type=int,
+        default=1,
+        help="Evolui K populações independentes, uma por processo (1 desativa)",
+    )
+    parser.add_argument(
+        "--migration-interval",
+        type=int,
+        default=5,
+        help="Com --islands, troca os melhores genomas entre as ilhas a cada M gerações",
+    )
+    parser.add_argument(
+        "--migrants",
+        type=int,
+        default=2,
+        help="Com --islands, quantos genomas cada ilha envia para a vizinha em cada troca",
+    )
+    parser.add_argument(
+        "--record-dir",
+        default="",
+        help="Grava cada geração como trace de replay nesta pasta (veja replay.py)",
+    )
+    parser.add_argument(
+        "--record-state-every",
+        type=int,
+        default=0,
+        help="Inclui no trace um estado de conferência a cada N frames (0 desativa)",
+    )
+    parser.add_argument(
+        "--profile",
+        action="store_true",
+        help="Mede o tempo de cada etapa do frame e mostra p50/p95/p99 por geração",
+    )
+    parser.add_argument(
+        "--profile-trace",
+        default="",
+        help="Grava os tempos de cada frame em um arquivo JSON Lines (implica --profile)",
+    )
+    parser.add_argument(
+        "--profile-overlay",
+        action="store_true",
+        help="Desenha os percentis de tempo na tela (implica --profile)",
+    )
     parser.add_argument(
         "--best-path",
         default="melhor_genoma.pkl",
@@ -79,199 +228,106 @@ def build_arg_parser() -> argparse.ArgumentParser:
         default="checkpoints",
         help="Diretório onde os checkpoints serão gravados",
     )
+    parser.add_argument(
+        "--checkpoint-keep",
+        type=int,
+        default=0,
+        help="Mantém só os N checkpoints mais recentes e o melhor (0 mantém todos)",
+    )
     parser.add_argument(
         "--load-checkpoint",
         default="",
-        help="Retoma o treinamento a partir de um checkpoint salvo",
+        help="Retoma o treinamento a partir de um checkpoint salvo (ou do mais recente de uma pasta)",
     )
     return parser
 
 
-def _validar_config(config: neat.Config) -> None:
-    """Garante que a configuração do NEAT corresponde aos sensores/ações do jogo."""
-
-    genome_cfg = config.genome_config
-    if genome_cfg.num_inputs != SENSOR_COUNT:
-        raise RuntimeError(
-            f"Configuração NEAT espera {genome_cfg.num_inputs} inputs, \n"
-            f"mas o ambiente fornece {SENSOR_COUNT}. Atualize 'num_inputs'."
-        )
-    if genome_cfg.num_outputs != ACTION_COUNT:
-        raise RuntimeError(
-            f"Configuração NEAT espera {genome_cfg.num_outputs} saídas, \n"
-            f"mas o ambiente exige {ACTION_COUNT}. Atualize 'num_outputs'."
+def _imprimir_cabecalho(workers: int) -> None:
+    print("=" * 60)
+    print("Treinamento Mario NEAT")
+    print("=" * 60)
+    print(f"Sensores: {SENSOR_COUNT}\tAções: {ACTION_COUNT}")
+    print(f"Distância alvo: {DISTANCIA_PARA_VENCER} px")
+    print(f"Renderização: {'Sim' if TRAINING_SETTINGS['render'] else 'Não'}")
+    if not TRAINING_SETTINGS["render"]:
+        # Sem janela a avaliação sempre roda sem limite de FPS
+        print("Modo turbo: Sim (sem janela)")
+    else:
+        print(f"Modo turbo: {'Sim' if TRAINING_SETTINGS['turbo'] else 'Não'}")
+    print(f"Processos: {workers}")
+    if TRAINING_SETTINGS["episodes"] > 1:
+        print(
+            f"Episódios por genoma: {TRAINING_SETTINGS['episodes']} "
+            f"(fitness: {TRAINING_SETTINGS['episode_aggregate']})"
         )
-
-
-def _remover_indice(i, marios, redes, genomas, jogo, extras=None):
-    """Remove o Mario de todas as listas de acompanhamento."""
-
-    marios.pop(i)
-    redes.pop(i)
-    genomas.pop(i)
-    if i < len(jogo.marios):
-        jogo.marios.pop(i)
-    if extras:
-        for lista in extras:
-            lista.pop(i)
-
-
-def eval_genomes(genomes, config):
-    """Função de avaliação chamada pelo NEAT para cada geração."""
-
-    global CURRENT_GENERATION
-
-    jogo = JogoMario(modo='ia', render=TRAINING_SETTINGS["render"])
-    jogo.geracao = CURRENT_GENERATION
-
-    redes = []
-    genomas = []
-    marios = []
-    frames_sem_melhoria = []
-    ultimos_fitness = []
-
-    for _, genome in genomes:
-        genome.fitness = 0.0
-        rede = neat.nn.FeedForwardNetwork.create(genome, config)
-        redes.append(rede)
-        genomas.append(genome)
-        personagem = Mario(100, CHAO_Y)
-        marios.append(personagem)
-        jogo.adicionar_mario(personagem)
-        frames_sem_melhoria.append(0)
-        ultimos_fitness.append(0.0)
-
-    rodando = True
-    while rodando and marios:
-        jogo.relogio.tick(FPS)
-
-        for evento in pygame.event.get():
-            if evento.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
-            if evento.type == pygame.KEYDOWN and evento.key == pygame.K_ESCAPE:
-                pygame.quit()
-                sys.exit()
-
-        jogo.atualizar()
-
-        for i in range(len(marios) - 1, -1, -1):
-            mario = marios[i]
-            sensores = mario.get_sensores(jogo.obstaculos, jogo.velocidade)
-            saidas = redes[i].activate(sensores)
-
-            salto = saidas[0] > 0.5
-            abaixar = saidas[1] > 0.5
-            mario.aplicar_comandos(pular=salto, abaixar=abaixar)
-            mario.atualizar()
-
-            if jogo.verificar_colisao(mario):
-                genomas[i].fitness += jogo.distancia_percorrida * 0.01
-                _remover_indice(i, marios, redes, genomas, jogo, [frames_sem_melhoria, ultimos_fitness])
-                continue
-
-            # Recompensas por sobreviver, ganhar velocidade e utilizar ações relevantes
-            genomas[i].fitness += 0.3
-            genomas[i].fitness += jogo.velocidade * 0.015
-
-            obstaculo_chao_proximo = sensores[0] < 0.35
-            bomba_proxima = sensores[3] > 0.5
-            bomba_proxima_e_perto = bomba_proxima and sensores[2] < 0.35
-
-            if obstaculo_chao_proximo and salto and mario.velocidade_y < 0:
-                genomas[i].fitness += 1.2
-            elif salto and not obstaculo_chao_proximo:
-                genomas[i].fitness -= 0.05
-
-            if bomba_proxima_e_perto and abaixar:
-                genomas[i].fitness += 1.5
-            elif abaixar and not bomba_proxima:
-                genomas[i].fitness -= 0.05
-
-            if jogo.vitoria:
-                genomas[i].fitness += 2000
-
-            if genomas[i].fitness > ultimos_fitness[i] + 0.1:
-                ultimos_fitness[i] = genomas[i].fitness
-                frames_sem_melhoria[i] = 0
-            else:
-                frames_sem_melhoria[i] += 1
-
-            if frames_sem_melhoria[i] > FPS * 6:
-                _remover_indice(i, marios, redes, genomas, jogo, [frames_sem_melhoria, ultimos_fitness])
-                continue
-
-        jogo.vivos = len(marios)
-        jogo.desenhar()
-
-        if not marios:
-            rodando = False
-        if jogo.vitoria:
-            rodando = False
-        if jogo.pontuacao > TRAINING_SETTINGS["max_score"]:
-            rodando = False
-
-    CURRENT_GENERATION += 1
-
-
-def _carregar_config(config_path: Path) -> neat.Config:
-    config = neat.Config(
-        neat.DefaultGenome,
-        neat.DefaultReproduction,
-        neat.DefaultSpeciesSet,
-        neat.DefaultStagnation,
-        str(config_path),
-    )
-    _validar_config(config)
-    return config
+    if TRAINING_SETTINGS["decision_interval"] > 1:
+        print(f"Decisão das redes: a cada {TRAINING_SETTINGS['decision_interval']} frames")
+    if TRAINING_SETTINGS["seed"] is not None:
+        pista = "fixa" if TRAINING_SETTINGS["fixed_track"] else "nova a cada geração"
+        print(f"Semente: {TRAINING_SETTINGS['seed']} (pista {pista})")
+    if TRAINING_SETTINGS["record_dir"]:
+        print(f"Replays: {TRAINING_SETTINGS['record_dir']}/geracao-NNNN.mrpl")
 
 
 def run_training(args: argparse.Namespace) -> None:
     """Inicializa a população NEAT e executa o treinamento."""
 
-    TRAINING_SETTINGS["render"] = not args.headless
-    TRAINING_SETTINGS["max_score"] = args.max_score
+    if args.islands > 1 and args.seed is None:
+        # As ilhas usam sementes consecutivas a partir desta
+        args.seed = random.randrange(2**32)
+    workers = aplicar_opcoes(args, TRAINING_SETTINGS)
+    if args.islands > 1:
+        # Cada ilha é um processo sem janela (veja ai/islands.py)
+        TRAINING_SETTINGS["render"] = False
+        _imprimir_cabecalho(args.islands)
+        _concluir(args, treinar_ilhas(args))
+        return
+    if args.load_checkpoint and Path(args.load_checkpoint).is_dir():
+        args.load_checkpoint = str(ultimo_checkpoint(args.load_checkpoint))
+    populacao, stats, checkpointer = criar_populacao(args)
+    cache = criar_cache_fitness(args, TRAINING_SETTINGS)
+    anexar_cache_fitness(checkpointer, cache)
+    _imprimir_cabecalho(workers)
+    print("Iniciando...\n")
 
-    if args.load_checkpoint:
-        populacao = neat.Checkpointer.restore_checkpoint(args.load_checkpoint)
-        config = populacao.config
-        _validar_config(config)
-        print(f"Checkpoint carregado: {args.load_checkpoint}")
-    else:
-        config_path = Path(args.config)
-        if not config_path.exists():
-            raise FileNotFoundError(f"Arquivo de configuração não encontrado: {config_path}")
-        config = _carregar_config(config_path)
-        populacao = neat.Population(config)
-    populacao.add_reporter(neat.StdOutReporter(True))
-    stats = neat.StatisticsReporter()
-    populacao.add_reporter(stats)
-    if args.checkpoint_every > 0:
-        checkpoint_dir = Path(args.checkpoint_dir)
-        checkpoint_dir.mkdir(parents=True, exist_ok=True)
-        prefix = str(checkpoint_dir / "neat-checkpoint-")
-        populacao.add_reporter(
-            neat.Checkpointer(args.checkpoint_every, filename_prefix=prefix)
+    avaliador = AvaliadorGeracoes(TRAINING_SETTINGS, cache=cache)
+    perfilar = args.profile or bool(args.profile_trace) or args.profile_overlay
+    if workers > 1:
+        avaliador.paralelo = AvaliadorParalelo(workers, populacao.config, TRAINING_SETTINGS)
+        if perfilar:
+            print("Aviso: --profile só mede a avaliação serial (--workers 1).")
+        if args.record_dir:
+            print("Aviso: --record-dir só grava a avaliação serial (--workers 1).")
+    elif perfilar:
+        avaliador.perfil = PerfilFrames(
+            arquivo_trace=args.profile_trace, overlay=args.profile_overlay
         )
+    try:
+        vencedor = populacao.run(avaliador, args.generations)
+    finally:
+        if avaliador.paralelo is not None:
+            avaliador.paralelo.fechar()
+        if avaliador.perfil is not None:
+            avaliador.perfil.fechar()
+        encerrar_checkpoints(checkpointer, cache)
+    _concluir(args, vencedor)
 
-    print("=" * 60)
-    print("Treinamento Mario NEAT")
-    print("=" * 60)
-    print(f"Sensores: {SENSOR_COUNT}\tAções: {ACTION_COUNT}")
-    print(f"Distância alvo: {DISTANCIA_PARA_VENCER} px")
-    print(f"Renderização: {'Sim' if TRAINING_SETTINGS['render'] else 'Não'}")
-    print("Iniciando...\n")
 
-    vencedor = populacao.run(eval_genomes, args.generations)
+def _concluir(args: argparse.Namespace, vencedor) -> None:
+    """Salva o melhor genoma (se pedido) e mostra o resumo final."""
 
+    gravador = None
     if not args.no_save_best and args.best_path:
-        with open(args.best_path, "wb") as arquivo:
-            pickle.dump(vencedor, arquivo)
-        print(f"Melhor genoma salvo em: {args.best_path}")
+        # Serializa agora; a escrita acontece enquanto o resumo é mostrado
+        gravador = GravadorAssincrono()
+        gravador.gravar(args.best_path, pickle.dumps(vencedor))
 
     print("\n=== Treinamento concluído ===")
     print(f"Melhor Fitness: {vencedor.fitness:.2f}")
     print(f"Nós: {len(vencedor.nodes)} | Conexões: {len(vencedor.connections)}")
+    if gravador is not None:
+        gravador.fechar()
+        print(f"Melhor genoma salvo em: {args.best_path}")
 
 
 def main() -> None:
@@ -0,0 +1,335 @@
+"""Benchmarks das partes críticas da simulação e do treinamento.
+
+Executa cargas fixas (semente constante) e grava frames/s, tempos por etapa
+e pico de memória em JSON, para comparar o desempenho entre commits:
+
+    python benchmark.py --output bench.json
+    python benchmark.py --output novo.json --compare bench.json
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import platform
+import random
+import subprocess
+import time
+import tracemalloc
+from pathlib import Path
+
+from game.mario import Mario
+from game.simulation import SimulacaoMario
+from game.track import Pista
+from game.vectorized import ObstaculosVetorizados, PopulacaoVetorizada
+from utils.constants import CHAO_Y, FORCA_PULO
+
+
+def build_arg_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Mede o desempenho da simulação e do treinamento NEAT"
+    )
+    parser.add_argument("--seed", type=int, default=1234, help="Semente das cargas")
+    parser.add_argument(
+        "--frames",
+        type=int,
+        default=3000,
+        help="Frames simulados nos benchmarks de mundo e de sensores",
+    )
+    parser.add_argument(
+        "--pop-sizes",
+        default="50,200,500",
+        help="Tamanhos de população separados por vírgula",
+    )
+    parser.add_argument(
+        "--config",
+        default="config-feedforward.txt",
+        help="Configuração NEAT usada no benchmark de geração",
+    )
+    parser.add_argument(
+        "--only",
+        default="",
+        help="Executa só os grupos indicados (atualizar,sensores,geracao,desenhar)",
+    )
+    parser.add_argument("--output", default="", help="Arquivo JSON de saída")
+    parser.add_argument("--compare", default="", help="JSON anterior para comparação")
+    return parser
+
+
+def _medir(funcao, *args):
+    """Executa ``funcao`` cronometrada e depois de novo sob tracemalloc."""
+
+    inicio = time.perf_counter()
+    resultado = funcao(*args)
+    resultado["segundos"] = time.perf_counter() - inicio
+
+    tracemalloc.start()
+    funcao(*args)
+    _, pico = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    resultado["pico_memoria_kb"] = pico / 1024
+    return resultado
+
+
+def _mundo(semente):
+    jogo = SimulacaoMario(modo='ia', semente=semente)
+    jogo.usar_pista(Pista(semente).completar())
+    return jogo
+
+
+def bench_atualizar(semente, frames):
+    """Vazão de ``SimulacaoMario.atualizar`` (spawn aleatório e pista pré-calculada)."""
+
+    resultado = {}
+    for nome, com_pista in (("rng", False), ("pista", True)):
+        jogo = _mundo(semente) if com_pista else SimulacaoMario(modo='ia', semente=semente)
+        inicio = time.perf_counter()
+        for _ in range(frames):
+            if not jogo.jogo_ativo:
+                jogo.resetar()
+            jogo.atualizar()
+        decorrido = time.perf_counter() - inicio
+        resultado[f"{nome}_frames_por_s"] = frames / decorrido
+    return resultado
+
+
+def _marios_variados(quantidade, rng):
+    """Marios em alturas diferentes para exercitar sensores e colisões."""
+
+    marios = []
+    for _ in range(quantidade):
+        mario = Mario(100, CHAO_Y)
+        if rng.random() < 0.5:
+            mario.pular()
+            mario.velocidade_y = rng.uniform(FORCA_PULO, 0)
+        marios.append(mario)
+    return marios
+
+
+def bench_sensores_colisao(semente, frames, quantidade):
+    """Custo de ``get_sensores`` (direto e pelo retrato do frame) e de
+    ``verificar_colisao`` por tamanho de população."""
+
+    rng = random.Random(semente)
+    jogo = _mundo(semente)
+    marios = _marios_variados(quantidade, rng)
+    etapas = {"atualizar": 0.0, "sensores": 0.0, "retrato": 0.0, "colisao": 0.0}
+    etapas_vet = {"sensores": 0.0, "colisao": 0.0}
+    populacao = PopulacaoVetorizada(quantidade)
+
+    for _ in range(frames):
+        if not jogo.jogo_ativo:
+            jogo.resetar()
+        t0 = time.perf_counter()
+        jogo.atualizar()
+        t1 = time.perf_counter()
+        for mario in marios:
+            mario.get_sensores(jogo.obstaculos, jogo.velocidade)
+        t2 = time.perf_counter()
+        for mario in marios:
+            jogo.sensores(mario)
+        t2b = time.perf_counter()
+        for mario in marios:
+            jogo.verificar_colisao(mario)
+        t3 = time.perf_counter()
+        obstaculos = ObstaculosVetorizados(jogo.obstaculos)
+        populacao.sensores(obstaculos, jogo.velocidade)
+        t4 = time.perf_counter()
+        populacao.colisoes(obstaculos)
+        t5 = time.perf_counter()
+
+        etapas["atualizar"] += t1 - t0
+        etapas["sensores"] += t2 - t1
+        etapas["retrato"] += t2b - t2
+        etapas["colisao"] += t3 - t2b
+        etapas_vet["sensores"] += t4 - t3
+        etapas_vet["colisao"] += t5 - t4
+
+    return {
+        "populacao": quantidade,
+        "etapas_ms_por_frame": {k: v * 1000 / frames for k, v in etapas.items()},
+        "vetorizado_ms_por_frame": {k: v * 1000 / frames for k, v in etapas_vet.items()},
+    }
+
+
+def _populacao_neat(config_path, quantidade, semente):
+    import neat
+
+    random.seed(semente)
+    config = neat.Config(
+        neat.DefaultGenome,
+        neat.DefaultReproduction,
+        neat.DefaultSpeciesSet,
+        neat.DefaultStagnation,
+        str(config_path),
+    )
+    config.pop_size = quantidade
+    populacao = neat.Population(config)
+    genomas = list(populacao.population.values())
+    # Algumas mutações para que as redes tenham topologias variadas
+    for genome in genomas:
+        for _ in range(random.randint(0, 20)):
+            genome.mutate(config.genome_config)
+    return genomas, config
+
+
+def bench_geracao(config_path, semente, quantidade):
+    """Uma geração completa de ``avaliar_genomas`` em cada motor disponível."""
+
+    from ai.evaluation import avaliar_genomas
+
+    genomas, config = _populacao_neat(config_path, quantidade, semente)
+    ajustes = {
+        "render": False,
+        "turbo": True,
+        "preview_every": 0,
+        "max_score": 50000,
+    }
+    resultado = {"populacao": quantidade}
+    for nome, extras in (
+        ("objetos", {}),
+        ("vetorizado", {"vectorized": True}),
+        ("lote", {"vectorized": True, "batched_nn": True}),
+    ):
+        inicio = time.perf_counter()
+        frames = avaliar_genomas(genomas, config, dict(ajustes, **extras), semente)
+        decorrido = time.perf_counter() - inicio
+        resultado[nome] = {
+            "segundos": decorrido,
+            "frames": frames,
+            "frames_por_s": frames / decorrido,
+            "melhor_fitness": max(genome.fitness for genome in genomas),
+        }
+    return resultado
+
+
+def bench_desenhar(semente, frames, quantidade):
+    """Custo de ``JogoMario.desenhar`` em uma superfície fora da tela."""
+
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    from game.game import JogoMario
+
+    jogo = JogoMario(modo='ia', render=False, semente=semente)
+    jogo.usar_pista(Pista(semente).completar())
+    for mario in _marios_variados(quantidade, random.Random(semente)):
+        jogo.adicionar_mario(mario)
+
+    gasto = 0.0
+    for _ in range(frames):
+        if not jogo.jogo_ativo:
+            jogo.resetar()
+        jogo.atualizar()
+        inicio = time.perf_counter()
+        jogo.desenhar()
+        gasto += time.perf_counter() - inicio
+    return {
+        "marios": quantidade,
+        "ms_por_frame": gasto * 1000 / frames,
+        "frames_por_s": frames / gasto,
+    }
+
+
+def _commit_atual():
+    try:
+        saida = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+    except (OSError, subprocess.CalledProcessError):
+        return None
+    return saida.stdout.strip()
+
+
+def executar(args) -> dict:
+    grupos = set(filter(None, args.only.split(","))) or {
+        "atualizar",
+        "sensores",
+        "geracao",
+        "desenhar",
+    }
+    tamanhos = [int(valor) for valor in args.pop_sizes.split(",") if valor]
+    resultados = {
+        "meta": {
+            "commit": _commit_atual(),
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "semente": args.seed,
+            "data": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        }
+    }
+
+    if "atualizar" in grupos:
+        print("atualizar...")
+        resultados["atualizar"] = _medir(bench_atualizar, args.seed, args.frames)
+    if "sensores" in grupos:
+        resultados["sensores"] = []
+        for quantidade in tamanhos:
+            print(f"sensores/colisão (população {quantidade})...")
+            resultados["sensores"].append(
+                _medir(bench_sensores_colisao, args.seed, args.frames // 5, quantidade)
+            )
+    if "geracao" in grupos:
+        resultados["geracao"] = []
+        for quantidade in tamanhos:
+            print(f"geração (população {quantidade})...")
+            resultados["geracao"].append(
+                _medir(bench_geracao, args.config, args.seed, quantidade)
+            )
+    if "desenhar" in grupos:
+        resultados["desenhar"] = []
+        for quantidade in (1, tamanhos[0] if tamanhos else 50):
+            print(f"desenhar ({quantidade} Marios)...")
+            resultados["desenhar"].append(
+                _medir(bench_desenhar, args.seed, args.frames // 5, quantidade)
+            )
+    return resultados
+
+
+def _achatar(dados, prefixo=""):
+    """Transforma o JSON aninhado em {caminho: valor} para comparação."""
+
+    planos = {}
+    if isinstance(dados, dict):
+        for chave, valor in dados.items():
+            if chave == "meta":
+                continue
+            planos.update(_achatar(valor, f"{prefixo}{chave}."))
+    elif isinstance(dados, list):
+        for indice, valor in enumerate(dados):
+            planos.update(_achatar(valor, f"{prefixo}{indice}."))
+    elif isinstance(dados, (int, float)) and not isinstance(dados, bool):
+        planos[prefixo.rstrip(".")] = dados
+    return planos
+
+
+def comparar(atual: dict, anterior: dict) -> None:
+    """Mostra a variação percentual de cada métrica em relação ao JSON anterior."""
+
+    novos = _achatar(atual)
+    antigos = _achatar(anterior)
+    print(f"\nComparação com {anterior.get('meta', {}).get('commit')}:")
+    for chave in sorted(novos):
+        if chave in antigos and antigos[chave]:
+            variacao = (novos[chave] - antigos[chave]) / antigos[chave] * 100
+            print(f"  {chave:<55} {antigos[chave]:>12.3f} -> {novos[chave]:>12.3f} ({variacao:+.1f}%)")
+
+
+def main() -> None:
+    args = build_arg_parser().parse_args()
+    resultados = executar(args)
+    texto = json.dumps(resultados, indent=2, ensure_ascii=False)
+    if args.output:
+        Path(args.output).write_text(texto, encoding="utf-8")
+        print(f"Resultados salvos em: {args.output}")
+    else:
+        print(texto)
+    if args.compare:
+        anterior = json.loads(Path(args.compare).read_text(encoding="utf-8"))
+        comparar(resultados, anterior)
+
+
+if __name__ == "__main__":
+    main()
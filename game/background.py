@@ -0,0 +1,122 @@
+"""
+Fundo do jogo em camadas pré-desenhadas com rolagem (parallax)
+"""
+import math
+
+import pygame
+
+from utils.constants import *
+
+COR_MONTANHA = (100, 150, 100)
+COR_GRAMA = (0, 180, 0)
+# Cor usada como transparente nas camadas (colorkey é mais barato que alfa por pixel)
+COR_CHAVE = (255, 0, 255)
+
+
+class Camada:
+    """
+    Faixa horizontal desenhada uma única vez e repetida na tela.
+
+    ``desenho(superficie, x)`` pinta um período do padrão a partir de ``x``
+    (coordenadas locais da faixa). A faixa guarda períodos suficientes para
+    cobrir a largura da tela e é deslocada de ``distancia // divisor``.
+    """
+
+    def __init__(self, desenho, periodo, y, altura, divisor=1, origem=0):
+        self.periodo = periodo
+        self.y = y
+        self.divisor = divisor
+        self.origem = origem
+        repeticoes = math.ceil(LARGURA / periodo)
+        self.largura = periodo * repeticoes
+
+        superficie = pygame.Surface((self.largura, altura))
+        superficie.fill(COR_CHAVE)
+        # Períodos vizinhos cobrem as formas que passam da borda da faixa
+        for k in range(-1, repeticoes + 1):
+            desenho(superficie, k * periodo)
+        superficie.set_colorkey(COR_CHAVE, pygame.RLEACCEL)
+        if pygame.display.get_surface():
+            superficie = superficie.convert()
+        self.superficie = superficie
+
+    @property
+    def faixa(self):
+        """Retângulo da tela coberto pela camada"""
+        return pygame.Rect(0, self.y, LARGURA, self.superficie.get_height())
+
+    def deslocamento(self, distancia):
+        return (int(distancia) // self.divisor) % self.periodo
+
+    def desenhar(self, tela, distancia):
+        x = self.origem + self.deslocamento(distancia) - self.largura
+        while x < LARGURA:
+            if x + self.largura > 0:
+                tela.blit(self.superficie, (x, self.y))
+            x += self.largura
+
+
+def _nuvens(superficie, x):
+    for i in range(3):
+        nx = x + i * 400
+        ny = 10 + i * 60
+        pygame.draw.ellipse(superficie, BRANCO, (nx, ny, 80, 40))
+        pygame.draw.ellipse(superficie, BRANCO, (nx + 30, ny - 10, 60, 40))
+        pygame.draw.ellipse(superficie, BRANCO, (nx + 50, ny, 70, 35))
+
+
+def _montanhas(superficie, x):
+    for i in range(4):
+        mx = x + i * 350
+        pygame.draw.polygon(superficie, COR_MONTANHA, [
+            (mx, 140),
+            (mx + 150, 0),
+            (mx + 300, 140)
+        ])
+
+
+def _chao(superficie, x):
+    # Faixa começa 6 px acima do chão para caber a ponta da grama
+    pygame.draw.rect(superficie, VERDE_ESCURO, (x, 6, 50, superficie.get_height() - 6))
+    pygame.draw.line(superficie, PRETO, (x, 6), (x + 50, 6), 3)
+    for j in range(3):
+        offset_x = x + j * 8
+        pygame.draw.line(superficie, COR_GRAMA, (offset_x, 6), (offset_x + 2, 1), 2)
+
+
+class FundoParallax:
+    """Céu, nuvens, montanhas e chão; cada camada rola em sua própria velocidade"""
+
+    def __init__(self):
+        self.camadas = [
+            Camada(_nuvens, LARGURA, 70, 180, divisor=3),
+            Camada(_montanhas, LARGURA + 200, CHAO_Y - 100, 141, divisor=5, origem=-100),
+            Camada(_chao, 50, CHAO_Y + 34, ALTURA - CHAO_Y - 34),
+        ]
+        self._deslocamentos = None
+
+    def faixas_alteradas(self, distancia):
+        """Faixas das camadas que rolaram desde a chamada anterior"""
+        deslocamentos = [camada.deslocamento(distancia) for camada in self.camadas]
+        anteriores = self._deslocamentos or [None] * len(self.camadas)
+        self._deslocamentos = deslocamentos
+        return [
+            camada.faixa
+            for camada, atual, anterior in zip(self.camadas, deslocamentos, anteriores)
+            if atual != anterior
+        ]
+
+    def desenhar(self, tela, distancia, area=None):
+        """Pinta o fundo na tela inteira ou só dentro de ``area``"""
+        if area is None:
+            tela.fill(CEU_AZUL)
+            for camada in self.camadas:
+                camada.desenhar(tela, distancia)
+            return
+
+        tela.fill(CEU_AZUL, area)
+        tela.set_clip(area)
+        for camada in self.camadas:
+            if camada.faixa.colliderect(area):
+                camada.desenhar(tela, distancia)
+        tela.set_clip(None)
@@ -2,21 +2,45 @@
 Módulo principal do jogo Mario
 """
 import pygame
-import random
 import sys
-from game.mario import Mario
-from game.obstacles import criar_bomba, gerar_obstaculo
+import time
+from game.background import FundoParallax
+from game.obstacles import precarregar_sprites
+from game.simulation import SimulacaoMario
 from utils.constants import *
+from utils.profiling import medir_etapa
 
 
-class JogoMario:
-    def __init__(self, modo='manual', render=True):
+def unir_sobrepostas(areas):
+    """Funde os retângulos que se sobrepõem (ex.: vários Marios no mesmo lugar)"""
+    unidas = []
+    for area in areas:
+        area = pygame.Rect(area)
+        indice = area.collidelist(unidas)
+        while indice != -1:
+            area.union_ip(unidas.pop(indice))
+            indice = area.collidelist(unidas)
+        unidas.append(area)
+    return unidas
+
+
+class JogoMario(SimulacaoMario):
+    # Acima desses limites, repintar a tela inteira sai mais barato que várias áreas
+    MAX_AREAS = 24
+    MAX_FRACAO_SUJA = 0.6
+    # Passos de física recuperados por quadro quando a máquina atrasa
+    MAX_PASSOS_POR_QUADRO = 5
+    
+    def __init__(self, modo='manual', render=True, semente=None, perfil=None):
         """
         Inicializa o jogo
         modo: 'manual' para jogar manualmente, 'ia' para treinamento NEAT
+        semente: semente do gerador de obstáculos (None = percurso aleatório)
+        perfil: PerfilFrames opcional que recebe os tempos de cada etapa
         """
         pygame.init()
         self.render = render
+        self.perfil = perfil
         if self.render:
             self.tela = pygame.display.set_mode((LARGURA, ALTURA))
             pygame.display.set_caption("Super Mario Runner")
@@ -26,125 +50,21 @@ class JogoMario:
         self.fonte_grande = pygame.font.Font(None, 48)
         self.fonte_media = pygame.font.Font(None, 36)
         self.fonte_pequena = pygame.font.Font(None, 24)
-        self.modo = modo
-        self.resetar()
+        self.fundo = FundoParallax()
+        self.overlay_pausa = self._criar_overlay(PRETO, 150)
+        self.overlay_derrota = self._criar_overlay(PRETO, 200)
+        self.overlay_vitoria = self._criar_overlay((0, 100, 0), 200)
+        self._textos = {}
+        # Áreas desenhadas sobre o fundo no último frame (None = redesenhar tudo)
+        self.areas_anteriores = None
+        self.estado_desenhado = None
+        precarregar_sprites()
+        super().__init__(modo, semente)
     
     def resetar(self):
-        """Reseta o jogo para o início"""
-        self.mario = Mario(100, CHAO_Y)
-        self.marios = [self.mario] if self.modo == 'manual' else []
-        self.obstaculos = []
-        self.pontuacao = 0
-        self.distancia_percorrida = 0
-        self.velocidade = VELOCIDADE_INICIAL
-        self.ultimo_obstaculo_x = LARGURA
-        self.ultimo_bomba_x = LARGURA
-        self.frames_desde_obstaculo_chao = 999
-        self.jogo_ativo = True
-        self.vitoria = False
-        self.pausado = False
-        self.geracao = 1
-        self.vivos = 1
-        
-    def adicionar_mario(self, mario):
-        """Adiciona um Mario (usado no modo IA)"""
-        self.marios.append(mario)
-    
-    def gerar_obstaculo(self):
-        """Gera novos obstáculos"""
-        if self.ultimo_obstaculo_x < LARGURA - random.randint(
-            DISTANCIA_MIN_OBSTACULOS, DISTANCIA_MAX_OBSTACULOS):
-            obstaculo = gerar_obstaculo(LARGURA, self.velocidade)
-            self.obstaculos.append(obstaculo)
-            self.ultimo_obstaculo_x = LARGURA
-            if obstaculo.tipo in {'cano', 'goomba', 'tartaruga'}:
-                self.frames_desde_obstaculo_chao = 0
-
-        bomba_intervalo = random.randint(320, 520)
-        if (
-            self.frames_desde_obstaculo_chao > 45
-            and self.ultimo_bomba_x < LARGURA - bomba_intervalo
-            and not self._tem_obstaculo_chao_proximo(260)
-            and random.random() < CHANCE_BOMBA
-        ):
-            altura_mode = 'alto' if random.random() < 0.4 else 'baixo'
-            if altura_mode == 'alto' and self.frames_desde_obstaculo_chao < 90:
-                altura_mode = 'baixo'
-
-            bomba_x = LARGURA + 20
-            if self._conflito_com_obstaculo_chao(bomba_x, altura_mode):
-                return
-
-            bomba = criar_bomba(bomba_x, self.velocidade, altura_mode=altura_mode)
-            self.obstaculos.append(bomba)
-            self.ultimo_bomba_x = LARGURA
-
-    def _tem_obstaculo_chao_proximo(self, distancia_limite=220):
-        """Retorna True se existir obstáculo terrestre perto da borda direita."""
-        for obs in self.obstaculos:
-            if obs.tipo in {'cano', 'goomba', 'tartaruga'}:
-                if LARGURA - obs.x < distancia_limite:
-                    return True
-        return False
-
-    def _conflito_com_obstaculo_chao(self, bomba_x, altura_mode):
-        """Evita bombas no mesmo alinhamento horizontal que obstáculos terrestres."""
-        separacao = 320 if altura_mode == 'alto' else 260
-        for obs in self.obstaculos:
-            if obs.tipo in {'cano', 'goomba', 'tartaruga'}:
-                centro_obs = obs.x + obs.largura / 2
-                if abs(centro_obs - bomba_x) < separacao:
-                    return True
-        return False
-    
-    def atualizar(self):
-        """Atualiza o estado do jogo"""
-        if not self.jogo_ativo or self.pausado:
-            return
-        
-        # Atualizar obstáculos
-        for obstaculo in self.obstaculos:
-            obstaculo.atualizar()
-        
-        # Remover obstáculos fora da tela e contar pontos
-        for obstaculo in self.obstaculos[:]:
-            if obstaculo.fora_da_tela():
-                self.obstaculos.remove(obstaculo)
-            elif not obstaculo.passou and obstaculo.x + obstaculo.largura < self.mario.x:
-                obstaculo.passou = True
-                self.pontuacao += PONTOS_INIMIGO
-        
-        # Gerar novos obstáculos
-        self.gerar_obstaculo()
-        self.ultimo_obstaculo_x -= self.velocidade
-        self.ultimo_bomba_x -= self.velocidade
-        self.frames_desde_obstaculo_chao += 1
-        
-        # Aumentar velocidade gradualmente
-        if self.velocidade < VELOCIDADE_MAXIMA:
-            self.velocidade += ACELERACAO
-            for obs in self.obstaculos:
-                obs.velocidade = self.velocidade
-        
-        # Aumentar distância e pontuação
-        self.distancia_percorrida += self.velocidade
-        self.pontuacao += PONTOS_POR_FRAME
-        
-        # Verificar vitória
-        if self.distancia_percorrida >= DISTANCIA_PARA_VENCER:
-            self.vitoria = True
-            self.jogo_ativo = False
-    
-    def verificar_colisao(self, mario):
-        """Verifica colisão do Mario com obstáculos"""
-        if not mario.vivo:
-            return False
-            
-        mario_rect = mario.get_rect()
-        for obstaculo in self.obstaculos:
-            if mario_rect.colliderect(obstaculo.get_rect()):
-                return True
-        return False
+        """Reinicia a partida na mesma janela; o próximo frame é redesenhado inteiro"""
+        super().resetar()
+        self.areas_anteriores = None
     
     def processar_eventos(self):
         """Processa eventos do pygame"""
@@ -181,64 +101,35 @@ class JogoMario:
         
         return True
     
-    def atualizar_mario(self, mario=None):
-        """Atualiza um Mario específico"""
-        if mario is None:
-            mario = self.mario
-        
-        mario.atualizar()
-        
-        if self.verificar_colisao(mario):
-            mario.morrer()
-            if self.modo == 'manual':
-                self.jogo_ativo = False
-    
     def desenhar_fundo(self):
-        """Desenha o fundo do jogo"""
-        # Ceu azul de fundo
-        self.tela.fill(CEU_AZUL)
-        
-        # Nuvens simples
-        for i in range(3):
-            x = (self.distancia_percorrida // 3 + i * 400) % LARGURA
-            y = 80 + i * 60
-            pygame.draw.ellipse(self.tela, BRANCO, (x, y, 80, 40))
-            pygame.draw.ellipse(self.tela, BRANCO, (x + 30, y - 10, 60, 40))
-            pygame.draw.ellipse(self.tela, BRANCO, (x + 50, y, 70, 35))
-        
-        # Montanhas ao fundo
-        for i in range(4):
-            x = (self.distancia_percorrida // 5 + i * 350) % (LARGURA + 200) - 100
-            pygame.draw.polygon(self.tela, (100, 150, 100), [
-                (x, CHAO_Y + 40),
-                (x + 150, CHAO_Y - 100),
-                (x + 300, CHAO_Y + 40)
-            ])
-        
-        # Chão
-        pygame.draw.rect(self.tela, VERDE_ESCURO, 
-                        (0, CHAO_Y + 40, LARGURA, ALTURA - CHAO_Y - 40))
-        
-        # Linha do chão
-        pygame.draw.line(self.tela, PRETO, (0, CHAO_Y + 40), 
-                        (LARGURA, CHAO_Y + 40), 3)
-        
-        # Detalhes do chão (grama)
-        for i in range(0, LARGURA, 50):
-            x = (i + int(self.distancia_percorrida) % 50)
-            # Tufos de grama
-            for j in range(3):
-                offset_x = x + j * 8
-                pygame.draw.line(self.tela, (0, 180, 0), 
-                               (offset_x, CHAO_Y + 40), 
-                               (offset_x + 2, CHAO_Y + 35), 2)
+        """Desenha o fundo do jogo (camadas pré-desenhadas com parallax)"""
+        self.fundo.desenhar(self.tela, self.distancia_percorrida)
+    
+    def _texto(self, chave, fonte, texto, cor, fundo=None):
+        """Superfície do texto, renderizada de novo só quando o texto muda"""
+        guardado = self._textos.get(chave)
+        if guardado is None or guardado[0] != texto:
+            guardado = (texto, fonte.render(texto, True, cor, fundo))
+            self._textos[chave] = guardado
+        return guardado[1]
+    
+    def _criar_overlay(self, cor, alfa):
+        """Camada escura semitransparente usada pela pausa e pela tela final"""
+        overlay = pygame.Surface((LARGURA, ALTURA))
+        overlay.set_alpha(alfa)
+        overlay.fill(cor)
+        if pygame.display.get_surface():
+            overlay = overlay.convert()
+        return overlay
     
     def desenhar_hud(self):
-        """Desenha a interface do usuário"""
+        """Desenha a interface do usuário e retorna as áreas ocupadas"""
+        areas = []
+        
         # Pontuação
-        texto_pontos = self.fonte_media.render(
-            f'Pontos: {self.pontuacao}', True, PRETO)
-        self.tela.blit(texto_pontos, (10, 10))
+        texto_pontos = self._texto(
+            'pontos', self.fonte_media, f'Pontos: {self.pontuacao}', PRETO)
+        areas.append(self.tela.blit(texto_pontos, (10, 10)))
         
         # Barra de progresso
         progresso = min(self.distancia_percorrida / DISTANCIA_PARA_VENCER, 1.0)
@@ -247,62 +138,74 @@ class JogoMario:
         pygame.draw.rect(self.tela, VERDE, 
                         (LARGURA - largura_barra - 20, 15, 
                          int(largura_barra * progresso), 25))
-        pygame.draw.rect(self.tela, PRETO, 
-                        (LARGURA - largura_barra - 20, 15, largura_barra, 25), 2)
+        areas.append(pygame.draw.rect(self.tela, PRETO, 
+                        (LARGURA - largura_barra - 20, 15, largura_barra, 25), 2))
         
         # Texto do progresso
-        texto_prog = self.fonte_pequena.render(
-            f'{int(progresso * 100)}%', True, BRANCO)
-        self.tela.blit(texto_prog, (LARGURA - largura_barra // 2 - 30, 18))
+        texto_prog = self._texto(
+            'progresso', self.fonte_pequena, f'{int(progresso * 100)}%', BRANCO)
+        areas.append(self.tela.blit(texto_prog, (LARGURA - largura_barra // 2 - 30, 18)))
         
         # Velocidade
-        texto_vel = self.fonte_pequena.render(
-            f'Velocidade: {self.velocidade:.1f}', True, PRETO)
-        self.tela.blit(texto_vel, (10, 50))
+        texto_vel = self._texto(
+            'velocidade', self.fonte_pequena, f'Velocidade: {self.velocidade:.1f}', PRETO)
+        areas.append(self.tela.blit(texto_vel, (10, 50)))
         
         # Distância
-        texto_dist = self.fonte_pequena.render(
+        texto_dist = self._texto(
+            'distancia', self.fonte_pequena,
             f'Distância: {int(self.distancia_percorrida)}/{DISTANCIA_PARA_VENCER}', 
-            True, PRETO)
-        self.tela.blit(texto_dist, (10, 75))
+            PRETO)
+        areas.append(self.tela.blit(texto_dist, (10, 75)))
         
         # Modo IA - informações adicionais
         if self.modo == 'ia':
-            texto_gen = self.fonte_pequena.render(
-                f'Geração: {self.geracao}', True, PRETO)
-            self.tela.blit(texto_gen, (10, 100))
+            texto_gen = self._texto(
+                'geracao', self.fonte_pequena, f'Geração: {self.geracao}', PRETO)
+            areas.append(self.tela.blit(texto_gen, (10, 100)))
             
-            texto_vivos = self.fonte_pequena.render(
-                f'Vivos: {self.vivos}', True, PRETO)
-            self.tela.blit(texto_vivos, (10, 125))
+            texto_vivos = self._texto(
+                'vivos', self.fonte_pequena, f'Vivos: {self.vivos}', PRETO)
+            areas.append(self.tela.blit(texto_vivos, (10, 125)))
+        
+        return areas
+    
+    def desenhar_perfil(self):
+        """Mostra os percentis de tempo por etapa no canto inferior esquerdo"""
+        linhas = self.perfil.linhas_resumo()
+        areas = []
+        y = ALTURA - 10 - 20 * len(linhas)
+        for i, linha in enumerate(linhas):
+            texto = self._texto(('perfil', i), self.fonte_pequena, linha, BRANCO, PRETO)
+            areas.append(self.tela.blit(texto, (10, y)))
+            y += 20
+        return areas
     
     def desenhar_tela_final(self):
         """Desenha tela de vitória ou derrota"""
         # Overlay semi-transparente
-        overlay = pygame.Surface((LARGURA, ALTURA))
-        overlay.set_alpha(200)
-        overlay.fill(PRETO if not self.vitoria else (0, 100, 0))
-        self.tela.blit(overlay, (0, 0))
+        self.tela.blit(self.overlay_vitoria if self.vitoria else self.overlay_derrota, (0, 0))
         
         if self.vitoria:
             # Tela de vitória
-            texto_titulo = self.fonte_grande.render(
-                'VOCÊ VENCEU!', True, AMARELO)
-            texto_pontos = self.fonte_media.render(
-                f'Pontuação Final: {self.pontuacao}', True, BRANCO)
-            texto_reiniciar = self.fonte_pequena.render(
-                'Pressione R para jogar novamente', True, BRANCO)
+            texto_titulo = self._texto(
+                'final_titulo', self.fonte_grande, 'VOCÊ VENCEU!', AMARELO)
+            texto_pontos = self._texto(
+                'final_pontos', self.fonte_media, f'Pontuação Final: {self.pontuacao}', BRANCO)
+            texto_reiniciar = self._texto(
+                'final_reiniciar', self.fonte_pequena, 'Pressione R para jogar novamente', BRANCO)
         else:
             # Tela de derrota
-            texto_titulo = self.fonte_grande.render(
-                'GAME OVER', True, VERMELHO)
-            texto_pontos = self.fonte_media.render(
-                f'Pontuação: {self.pontuacao}', True, BRANCO)
-            texto_reiniciar = self.fonte_pequena.render(
-                'Pressione ESPAÇO para tentar novamente', True, BRANCO)
+            texto_titulo = self._texto(
+                'final_titulo', self.fonte_grande, 'GAME OVER', VERMELHO)
+            texto_pontos = self._texto(
+                'final_pontos', self.fonte_media, f'Pontuação: {self.pontuacao}', BRANCO)
+            texto_reiniciar = self._texto(
+                'final_reiniciar', self.fonte_pequena,
+                'Pressione ESPAÇO para tentar novamente', BRANCO)
         
-        texto_sair = self.fonte_pequena.render(
-            'ESC para sair', True, BRANCO)
+        texto_sair = self._texto(
+            'final_sair', self.fonte_pequena, 'ESC para sair', BRANCO)
         
         # Centralizar textos
         self.tela.blit(texto_titulo, 
@@ -318,58 +221,145 @@ class JogoMario:
                       (LARGURA // 2 - texto_sair.get_width() // 2, 
                        ALTURA // 2 + 80))
     
-    def desenhar(self):
-        """Desenha todos os elementos do jogo"""
-        # Fundo
-        self.desenhar_fundo()
+    def desenhar_pausa(self):
+        """Escurece a cena e mostra o aviso de pausa"""
+        self.tela.blit(self.overlay_pausa, (0, 0))
+        texto_pausa = self._texto('pausa', self.fonte_grande, 'PAUSADO', BRANCO)
+        self.tela.blit(texto_pausa, 
+                      (LARGURA // 2 - texto_pausa.get_width() // 2, 
+                       ALTURA // 2 - 30))
+    
+    def desenhar_cena(self):
+        """
+        Desenha fundo, obstáculos, Marios e HUD repintando só o que mudou.
+        Retorna os retângulos alterados na tela, ou None se a tela inteira mudou.
+        """
+        faixas = self.fundo.faixas_alteradas(self.distancia_percorrida)
+        limite = self.MAX_FRACAO_SUJA * LARGURA * ALTURA
+        sujas = None
+        if (self.areas_anteriores is not None
+                and sum(faixa.width * faixa.height for faixa in faixas) <= limite):
+            # Sprites e textos do frame anterior são apagados repintando o fundo
+            # embaixo deles; o que já está dentro de uma faixa que rolou é ignorado
+            sujas = unir_sobrepostas(
+                area for area in self.areas_anteriores
+                if not any(faixa.contains(area) for faixa in faixas)
+            ) + faixas
+            pixels = sum(area.width * area.height for area in sujas)
+            if len(sujas) > self.MAX_AREAS or pixels > limite:
+                sujas = None
+        
+        if sujas is None:
+            self.desenhar_fundo()
+        else:
+            for area in sujas:
+                self.fundo.desenhar(self.tela, self.distancia_percorrida, area)
+        
+        areas = []
         
         # Obstáculos
         for obstaculo in self.obstaculos:
-            obstaculo.desenhar(self.tela)
+            areas.append(obstaculo.desenhar(self.tela))
         
         # Mario(s)
         for mario in self.marios:
-            mario.desenhar(self.tela)
+            areas.append(mario.desenhar(self.tela))
         
         # HUD
-        self.desenhar_hud()
+        areas += self.desenhar_hud()
+        
+        if self.perfil is not None and self.perfil.overlay:
+            areas += self.desenhar_perfil()
         
-        # Tela de pausa
-        if self.pausado:
-            overlay = pygame.Surface((LARGURA, ALTURA))
-            overlay.set_alpha(150)
-            overlay.fill(PRETO)
-            self.tela.blit(overlay, (0, 0))
+        self.areas_anteriores = areas
+        if sujas is None:
+            return None
+        return sujas + areas
+    
+    def desenhar(self):
+        """Desenha o frame e envia para a janela só as regiões alteradas"""
+        inicio = time.perf_counter()
+        estado = (self.pausado, self.jogo_ativo, self.vitoria)
+        tela_parada = self.pausado or (not self.jogo_ativo and self.modo == 'manual')
+        
+        if estado != self.estado_desenhado:
+            self.areas_anteriores = None
+        
+        if tela_parada and estado == self.estado_desenhado:
+            # Pausa e tela final são estáticas: o quadro já exibido continua válido
+            alteradas = []
+        else:
+            alteradas = self.desenhar_cena()
             
-            texto_pausa = self.fonte_grande.render('PAUSADO', True, BRANCO)
-            self.tela.blit(texto_pausa, 
-                          (LARGURA // 2 - texto_pausa.get_width() // 2, 
-                           ALTURA // 2 - 30))
+            # Tela de pausa
+            if self.pausado:
+                self.desenhar_pausa()
+            
+            # Tela final
+            if not self.jogo_ativo and self.modo == 'manual':
+                self.desenhar_tela_final()
+            
+            if tela_parada:
+                # O overlay cobre a tela toda; ao sair dele, redesenha tudo
+                alteradas = None
+                self.areas_anteriores = None
+        self.estado_desenhado = estado
         
-        # Tela final
-        if not self.jogo_ativo and self.modo == 'manual':
-            self.desenhar_tela_final()
+        if self.perfil is not None:
+            self.perfil.registrar('desenhar', time.perf_counter() - inicio)
         
         if self.render:
-            pygame.display.flip()
+            with medir_etapa(self.perfil, 'flip'):
+                if alteradas is None:
+                    pygame.display.flip()
+                elif alteradas:
+                    pygame.display.update(alteradas)
+    
+    def encerrar(self):
+        """Fecha a janela e encerra o processo"""
+        pygame.quit()
+        sys.exit()
     
     def executar(self):
-        """Loop principal do jogo (modo manual)"""
+        """
+        Loop principal do jogo (modo manual)
+        
+        A física avança em passos fixos de 1/FPS segundo, independentes da
+        taxa de desenho: se um quadro atrasa, os passos pendentes (até
+        MAX_PASSOS_POR_QUADRO) são simulados antes do próximo desenho.
+        """
         rodando = True
+        passo = 1.0 / FPS
+        acumulado = 0.0
+        anterior = time.perf_counter()
         
         while rodando:
             self.relogio.tick(FPS)
+            agora = time.perf_counter()
+            acumulado = min(acumulado + agora - anterior, passo * self.MAX_PASSOS_POR_QUADRO)
+            anterior = agora
+            if self.perfil is not None:
+                self.perfil.iniciar_frame()
             
             # Processar eventos
-            rodando = self.processar_eventos()
+            with medir_etapa(self.perfil, 'eventos'):
+                rodando = self.processar_eventos()
             
-            # Atualizar
-            if self.jogo_ativo and not self.pausado:
-                self.atualizar()
-                self.atualizar_mario()
+            # Atualizar (a folga de 10% absorve a variação do tick sem pular passos)
+            while acumulado >= passo * 0.9:
+                acumulado -= passo
+                if self.jogo_ativo and not self.pausado:
+                    with medir_etapa(self.perfil, 'atualizar'):
+                        self.atualizar()
+                    with medir_etapa(self.perfil, 'mario'):
+                        self.atualizar_mario()
             
             # Desenhar
             self.desenhar()
+            if self.perfil is not None:
+                self.perfil.finalizar_frame()
         
-        pygame.quit()
-        sys.exit()
+        if self.perfil is not None:
+            self.perfil.imprimir_resumo()
+            self.perfil.fechar()
+        self.encerrar()
@@ -1,13 +1,91 @@
 """Classe do personagem Mario."""
 
-import pygame
-
-from utils.assets import load_sprite
+from game.spatial import TIPOS_CHAO, IndiceObstaculos
 from utils.constants import *
 
 
+def _carregar_sprites():
+    """Carrega os sprites do Mario (o pygame só é importado ao desenhar)."""
+    import pygame
+
+    from utils.assets import load_sprite
+
+    padrao = load_sprite("mario.png", (MARIO_LARGURA, MARIO_ALTURA))
+    agachado = pygame.transform.scale(padrao, (MARIO_LARGURA, MARIO_AGACHADO_ALTURA))
+    morto = pygame.transform.rotate(padrao, 90)
+    morto = pygame.transform.scale(morto, (MARIO_ALTURA, MARIO_LARGURA))
+    return padrao, agachado, morto
+
+
+def sensores_do_mundo(obstaculos, velocidade_jogo, x):
+    """
+    Sensores 1 a 5 de ``Mario.get_sensores``, que só dependem do mundo e do x
+    do Mario. No modo IA todos os Marios estão no mesmo x, então a simulação
+    calcula esta tupla uma vez por frame e cada Mario só acrescenta o Y.
+    """
+    # Encontrar próximo obstáculo no chão
+    obs_chao = None
+    obs_ar = None
+    
+    if isinstance(obstaculos, IndiceObstaculos):
+        # Busca nas faixas indexadas, sem percorrer todos os obstáculos
+        obs_chao = obstaculos.proximo_chao(x)
+        obs_ar = obstaculos.proximo_ar(x)
+    else:
+        for obs in obstaculos:
+            if obs.x + obs.largura > x:
+                if obs.tipo in TIPOS_CHAO:
+                    if obs_chao is None:
+                        obs_chao = obs
+                elif obs.tipo == 'bomba':
+                    if obs_ar is None:
+                        obs_ar = obs
+    
+    # Sensor 1: Distância até obstáculo no chão
+    if obs_chao:
+        dist_chao = (obs_chao.x - x) / LARGURA
+        dist_chao = max(0, min(1, dist_chao))
+        
+        # Sensor 2: Altura do obstáculo no chão
+        if obs_chao.tipo == 'cano':
+            altura_norm = obs_chao.altura / CANO_ALTURA_MAX
+        elif obs_chao.tipo == 'tartaruga':
+            altura_norm = 0.3
+        else:  # goomba
+            altura_norm = 0.2
+    else:
+        dist_chao = 1.0
+        altura_norm = 0.0
+    
+    # Sensor 3: Distância até obstáculo no ar
+    if obs_ar:
+        dist_ar = (obs_ar.x - x) / LARGURA
+        dist_ar = max(0, min(1, dist_ar))
+        tem_bomba = 1.0
+    else:
+        dist_ar = 1.0
+        tem_bomba = 0.0
+    
+    # Sensor 5: Velocidade do jogo
+    vel_norm = (velocidade_jogo - VELOCIDADE_INICIAL) / (VELOCIDADE_MAXIMA - VELOCIDADE_INICIAL)
+    vel_norm = max(0, min(1, vel_norm))
+    
+    return (dist_chao, altura_norm, dist_ar, tem_bomba, vel_norm)
+
+
 class Mario:
+    # Sprites compartilhados por todos os Marios (carregados no primeiro desenho)
+    SPRITES = None
+    __slots__ = (
+        'x', 'y', 'largura', 'altura', 'velocidade_y', 'velocidade_x',
+        'no_chao', 'vivo', 'pulando', 'agachado',
+    )
+
     def __init__(self, x, y):
+        self.resetar(x, y)
+
+    def resetar(self, x, y):
+        """Volta ao estado inicial na posição (x, y), sem criar outro objeto"""
         self.x = x
         self.y = y
         self.largura = MARIO_LARGURA
@@ -18,14 +96,6 @@ class Mario:
         self.vivo = True
         self.pulando = False
         self.agachado = False
-        self.sprite_padrao = load_sprite("mario.png", (self.largura, self.altura))
-        self.sprite_agachado = pygame.transform.scale(
-            self.sprite_padrao, (self.largura, MARIO_AGACHADO_ALTURA)
-        )
-        self.sprite_morto = pygame.transform.rotate(self.sprite_padrao, 90)
-        self.sprite_morto = pygame.transform.scale(
-            self.sprite_morto, (MARIO_ALTURA, MARIO_LARGURA)
-        )
         
     def pular(self):
         """Faz o Mario pular se estiver no chão"""
@@ -99,20 +169,29 @@ class Mario:
         self.velocidade_y = -10  # Pequeno pulo ao morrer
     
     def desenhar(self, tela):
+        if Mario.SPRITES is None:
+            Mario.SPRITES = _carregar_sprites()
+        sprite_padrao, sprite_agachado, sprite_morto = Mario.SPRITES
+
         if not self.vivo:
-            tela.blit(self.sprite_morto, (self.x, self.y - 10))
-            return
+            return tela.blit(sprite_morto, (self.x, self.y - 10))
 
         if self.agachado:
-            tela.blit(self.sprite_agachado, (self.x, self.y + MARIO_AGACHADO_OFFSET))
-            return
+            return tela.blit(sprite_agachado, (self.x, self.y + MARIO_AGACHADO_OFFSET))
 
-        tela.blit(self.sprite_padrao, (self.x, self.y))
-    def get_rect(self):
-        """Retorna o retângulo de colisão do Mario"""
+        return tela.blit(sprite_padrao, (self.x, self.y))
+
+    def get_caixa(self):
+        """Retorna a caixa de colisão (x, y, largura, altura) em pixels inteiros"""
         altura = MARIO_AGACHADO_ALTURA if self.agachado else self.altura
         offset = MARIO_AGACHADO_OFFSET if self.agachado else 0
-        return pygame.Rect(self.x + 4, self.y + offset, self.largura - 8, altura)
+        return (int(self.x + 4), int(self.y + offset), self.largura - 8, altura)
+
+    def get_rect(self):
+        """Retorna o retângulo de colisão do Mario"""
+        import pygame
+
+        return pygame.Rect(self.get_caixa())
     
     def get_sensores(self, obstaculos, velocidade_jogo):
         """
@@ -124,50 +203,12 @@ class Mario:
         5. Velocidade do jogo (normalizada)
         6. Posição Y do Mario (normalizada)
         """
-        # Encontrar próximo obstáculo no chão
-        obs_chao = None
-        obs_ar = None
-        
-        for obs in obstaculos:
-            if obs.x + obs.largura > self.x:
-                if obs.tipo in ['cano', 'goomba', 'tartaruga']:
-                    if obs_chao is None:
-                        obs_chao = obs
-                elif obs.tipo == 'bomba':
-                    if obs_ar is None:
-                        obs_ar = obs
-        
-        # Sensor 1: Distância até obstáculo no chão
-        if obs_chao:
-            dist_chao = (obs_chao.x - self.x) / LARGURA
-            dist_chao = max(0, min(1, dist_chao))
-            
-            # Sensor 2: Altura do obstáculo no chão
-            if obs_chao.tipo == 'cano':
-                altura_norm = obs_chao.altura / CANO_ALTURA_MAX
-            elif obs_chao.tipo == 'tartaruga':
-                altura_norm = 0.3
-            else:  # goomba
-                altura_norm = 0.2
-        else:
-            dist_chao = 1.0
-            altura_norm = 0.0
-        
-        # Sensor 3: Distância até obstáculo no ar
-        if obs_ar:
-            dist_ar = (obs_ar.x - self.x) / LARGURA
-            dist_ar = max(0, min(1, dist_ar))
-            tem_bomba = 1.0
-        else:
-            dist_ar = 1.0
-            tem_bomba = 0.0
-        
-        # Sensor 5: Velocidade do jogo
-        vel_norm = (velocidade_jogo - VELOCIDADE_INICIAL) / (VELOCIDADE_MAXIMA - VELOCIDADE_INICIAL)
-        vel_norm = max(0, min(1, vel_norm))
-        
+        return self.sensores_com_mundo(sensores_do_mundo(obstaculos, velocidade_jogo, self.x))
+
+    def sensores_com_mundo(self, mundo):
+        """Completa os 5 sensores do mundo (``sensores_do_mundo``) com a posição Y"""
         # Sensor 6: Posição Y
         y_norm = (CHAO_Y - self.y) / CHAO_Y
         y_norm = max(0, min(1, y_norm))
         
-        return [dist_chao, altura_norm, dist_ar, tem_bomba, vel_norm, y_norm]
+        return [*mundo, y_norm]
@@ -2,16 +2,48 @@
 Classes de obstáculos do jogo Mario
 """
 import math
-import pygame
 import random
+from itertools import islice
 
-from utils.assets import load_sprite
 from utils.constants import *
 
 
+def _load_sprite(filename, size=None):
+    """Carrega um sprite sob demanda; o pygame só é importado ao desenhar."""
+    from utils.assets import load_sprite
+
+    return load_sprite(filename, size)
+
+
+def _sprite_escalado(filename, size):
+    """Variante redimensionada vinda do atlas compartilhado de sprites."""
+    from utils.assets import SPRITE_ATLAS
+
+    return SPRITE_ATLAS.get(filename, size)
+
+
+def precarregar_sprites():
+    """Prepara no atlas todas as alturas de cano, evitando redimensionar durante o jogo."""
+    from utils.assets import SPRITE_ATLAS
+
+    SPRITE_ATLAS.preload(
+        "cano.png",
+        [(CANO_LARGURA, altura) for altura in range(CANO_ALTURA_MIN, CANO_ALTURA_MAX + 1)],
+    )
+
+
+TRILHA_BOMBA = 6  # Pontos guardados no rastro de cada bomba
+
+
 class Obstaculo:
     """Classe base para todos os obstáculos"""
-    def __init__(self, x, velocidade):
+    __slots__ = ('x', 'y', 'velocidade', 'passou', 'tipo', 'largura', 'altura')
+
+    def __init__(self, *args, **kwargs):
+        self.reiniciar(*args, **kwargs)
+
+    def reiniciar(self, x, velocidade):
+        """Define o estado inicial; também usado ao reaproveitar o objeto de um pool"""
         self.x = x
         self.velocidade = velocidade
         self.passou = False
@@ -24,137 +56,215 @@ class Obstaculo:
         """Verifica se o obstáculo saiu da tela"""
         return self.x + self.largura < 0
     
+    def get_caixa(self):
+        """Retorna a caixa de colisão (x, y, largura, altura) em pixels inteiros"""
+        return (int(self.x), int(self.y), self.largura, self.altura)
+
     def get_rect(self):
         """Retorna o retângulo de colisão"""
-        return pygame.Rect(self.x, self.y, self.largura, self.altura)
+        import pygame
+
+        return pygame.Rect(self.get_caixa())
 
 
 class Cano(Obstaculo):
     """Cano verde estilo Mario"""
-    SPRITE_BASE = None
+    __slots__ = ('sprite',)
 
-    def __init__(self, x, velocidade):
-        super().__init__(x, velocidade)
+    def reiniciar(self, x, velocidade, rng=random, altura=None):
+        super().reiniciar(x, velocidade)
         self.tipo = 'cano'
         self.largura = CANO_LARGURA
-        self.altura = random.randint(CANO_ALTURA_MIN, CANO_ALTURA_MAX)
+        if altura is None:
+            altura = rng.randint(CANO_ALTURA_MIN, CANO_ALTURA_MAX)
+        self.altura = altura
         self.y = CHAO_Y + 40 - self.altura
-        if Cano.SPRITE_BASE is None:
-            Cano.SPRITE_BASE = load_sprite("cano.png")
-        self.sprite = pygame.transform.smoothscale(
-            Cano.SPRITE_BASE, (self.largura, self.altura)
-        )
+        self.sprite = None
     
     def desenhar(self, tela):
-        tela.blit(self.sprite, (self.x, self.y))
+        if self.sprite is None:
+            self.sprite = _sprite_escalado("cano.png", (self.largura, self.altura))
+        return tela.blit(self.sprite, (self.x, self.y))
 
 
 class Goomba(Obstaculo):
     """Goomba - cogumelo inimigo marrom"""
     SPRITE = None
+    __slots__ = ('osc_offset',)
 
-    def __init__(self, x, velocidade):
-        super().__init__(x, velocidade)
+    def reiniciar(self, x, velocidade, rng=random, osc_offset=None):
+        super().reiniciar(x, velocidade)
         self.tipo = 'goomba'
         self.largura = GOOMBA_LARGURA
         self.altura = GOOMBA_ALTURA
         self.y = CHAO_Y + 40 - self.altura
-        if Goomba.SPRITE is None:
-            Goomba.SPRITE = load_sprite("Goomba.png", (self.largura, self.altura))
-        self.sprite = Goomba.SPRITE
-        self.osc_offset = random.randint(0, 20)
+        if osc_offset is None:
+            osc_offset = rng.randint(0, 20)
+        self.osc_offset = osc_offset
     
     def atualizar(self):
         super().atualizar()
     
     def desenhar(self, tela):
+        import pygame
+
+        if Goomba.SPRITE is None:
+            Goomba.SPRITE = _load_sprite("Goomba.png", (self.largura, self.altura))
         deslocamento = 2 * math.sin((pygame.time.get_ticks() + self.osc_offset) / 200)
-        tela.blit(self.sprite, (self.x, self.y + deslocamento))
+        return tela.blit(Goomba.SPRITE, (self.x, self.y + deslocamento))
 
 
 class Tartaruga(Obstaculo):
     """Koopa Troopa - tartaruga verde"""
     SPRITE = None
+    __slots__ = ('osc_offset',)
 
-    def __init__(self, x, velocidade):
-        super().__init__(x, velocidade)
+    def reiniciar(self, x, velocidade, rng=random, osc_offset=None):
+        super().reiniciar(x, velocidade)
         self.tipo = 'tartaruga'
         self.largura = TARTARUGA_LARGURA
         self.altura = TARTARUGA_ALTURA
         self.y = CHAO_Y + 40 - self.altura
-        if Tartaruga.SPRITE is None:
-            Tartaruga.SPRITE = load_sprite("koopa.png", (self.largura, self.altura))
-        self.sprite = Tartaruga.SPRITE
-        self.osc_offset = random.randint(0, 300)
+        if osc_offset is None:
+            osc_offset = rng.randint(0, 300)
+        self.osc_offset = osc_offset
     
     def atualizar(self):
         super().atualizar()
     
     def desenhar(self, tela):
+        import pygame
+
+        if Tartaruga.SPRITE is None:
+            Tartaruga.SPRITE = _load_sprite("koopa.png", (self.largura, self.altura))
         deslocamento = 1.5 * math.sin((pygame.time.get_ticks() + self.osc_offset) / 250)
-        tela.blit(self.sprite, (self.x, self.y + deslocamento))
+        return tela.blit(Tartaruga.SPRITE, (self.x, self.y + deslocamento))
 
 
 class Bomba(Obstaculo):
     """Bomba Bob-omb que voa no ar"""
     SPRITE = None
+    __slots__ = ('frame', 'trilha', 'altura_mode', 'velocidade_extra')
 
-    def __init__(self, x, velocidade, altura_mode: str = 'baixo'):
-        super().__init__(x, velocidade)
+    def reiniciar(self, x, velocidade, altura_mode: str = 'baixo', rng=random,
+                  y=None, velocidade_extra=None):
+        super().reiniciar(x, velocidade)
         self.tipo = 'bomba'
         self.largura = BOMBA_LARGURA
         self.altura = BOMBA_ALTURA
         self.frame = 0
-        self.trilha = []  # Pontos para rastro de fumaça
-        if Bomba.SPRITE is None:
-            Bomba.SPRITE = load_sprite("bomba.png", (self.largura, self.altura))
-        self.sprite = Bomba.SPRITE
+        # Buffer circular com os últimos pontos do rastro de fumaça (índice = frame % 6);
+        # pontos antigos de um objeto reaproveitado são ignorados porque frame volta a 0
+        if not hasattr(self, 'trilha'):
+            self.trilha = [None] * TRILHA_BOMBA
         self.altura_mode = altura_mode
-        self._definir_altura(altura_mode)
-        self.velocidade_extra = self._velocidade_por_altura(altura_mode)
+        if y is None:
+            self._definir_altura(altura_mode, rng)
+        else:
+            self.y = y
+        if velocidade_extra is None:
+            velocidade_extra = self._velocidade_por_altura(altura_mode, rng)
+        self.velocidade_extra = velocidade_extra
 
-    def _definir_altura(self, modo: str):
+    def _definir_altura(self, modo: str, rng=random):
         if modo == 'alto':
             min_y = CHAO_Y - BOMBA_ALTURA - 160
             max_y = CHAO_Y - BOMBA_ALTURA - 105
         else:
             min_y = CHAO_Y - BOMBA_ALTURA - 50
             max_y = CHAO_Y - BOMBA_ALTURA - 28
-        self.y = random.randint(min_y, max_y)
+        self.y = rng.randint(min_y, max_y)
 
-    def _velocidade_por_altura(self, modo: str) -> float:
+    def _velocidade_por_altura(self, modo: str, rng=random) -> float:
         if modo == 'alto':
-            return random.uniform(1.8, 3.8)
-        return random.uniform(0.4, 1.5)
+            return rng.uniform(1.8, 3.8)
+        return rng.uniform(0.4, 1.5)
     
     def atualizar(self):
         deslocamento = self.velocidade + self.velocidade_extra
         self.x -= deslocamento
+        self.trilha[self.frame % TRILHA_BOMBA] = (
+            self.x + self.largura / 2, self.y + self.altura / 2)
         self.frame += 1
-        centro = (self.x + self.largura / 2, self.y + self.altura / 2)
-        self.trilha.insert(0, centro)
-        if len(self.trilha) > 6:
-            self.trilha.pop()
+    
+    def pontos_trilha(self):
+        """Pontos do rastro, do mais recente para o mais antigo"""
+        for i in range(min(self.frame, TRILHA_BOMBA)):
+            yield self.trilha[(self.frame - 1 - i) % TRILHA_BOMBA]
     
     def desenhar(self, tela):
-        for i, (tx, ty) in enumerate(self.trilha[1:], start=1):
+        import pygame
+
+        if Bomba.SPRITE is None:
+            Bomba.SPRITE = _load_sprite("bomba.png", (self.largura, self.altura))
+        areas = []
+        for i, (tx, ty) in enumerate(islice(self.pontos_trilha(), 1, None), start=1):
             raio = max(1, (self.largura // 4) - i)
-            pygame.draw.circle(tela, (80, 80, 80), (int(tx), int(ty)), raio)
-        tela.blit(self.sprite, (self.x, self.y))
+            areas.append(pygame.draw.circle(tela, (80, 80, 80), (int(tx), int(ty)), raio))
+        return tela.blit(Bomba.SPRITE, (self.x, self.y)).unionall(areas)
+
+
+class PoolObstaculos:
+    """Guarda obstáculos que saíram da tela para reaproveitá-los em novos spawns"""
 
+    def __init__(self):
+        self.livres = {}
 
-def gerar_obstaculo(x, velocidade):
+    def devolver(self, obstaculo):
+        self.livres.setdefault(type(obstaculo), []).append(obstaculo)
+
+    def criar(self, classe, *args, **kwargs):
+        """Reinicia um obstáculo livre de ``classe`` ou cria um novo"""
+        livres = self.livres.get(classe)
+        if not livres:
+            return classe(*args, **kwargs)
+        obstaculo = livres.pop()
+        obstaculo.reiniciar(*args, **kwargs)
+        return obstaculo
+
+
+def _instanciar(pool, classe, *args, **kwargs):
+    if pool is None:
+        return classe(*args, **kwargs)
+    return pool.criar(classe, *args, **kwargs)
+
+
+def gerar_obstaculo(x, velocidade, rng=random, pool=None):
     """Gera um obstáculo terrestre aleatório"""
-    rand = random.random()
+    rand = rng.random()
 
     if rand < CHANCE_TARTARUGA:
-        return Tartaruga(x, velocidade)
+        return _instanciar(pool, Tartaruga, x, velocidade, rng)
     elif rand < CHANCE_TARTARUGA + 0.25:
-        return Goomba(x, velocidade)
+        return _instanciar(pool, Goomba, x, velocidade, rng)
     else:
-        return Cano(x, velocidade)
+        return _instanciar(pool, Cano, x, velocidade, rng)
 
 
-def criar_bomba(x, velocidade, altura_mode: str = 'baixo'):
+def criar_bomba(x, velocidade, altura_mode: str = 'baixo', rng=random, pool=None):
     """Cria uma bomba aérea com modo de altura configurável."""
-    return Bomba(x, velocidade, altura_mode=altura_mode)
+    return _instanciar(pool, Bomba, x, velocidade, altura_mode=altura_mode, rng=rng)
+
+
+def registrar_obstaculo(obstaculo):
+    """Resume um obstáculo recém-criado em uma tupla que o recria exatamente."""
+    if obstaculo.tipo == 'cano':
+        return ('cano', obstaculo.x, obstaculo.altura)
+    if obstaculo.tipo == 'bomba':
+        return ('bomba', obstaculo.x, obstaculo.altura_mode, obstaculo.y,
+                obstaculo.velocidade_extra)
+    return (obstaculo.tipo, obstaculo.x, obstaculo.osc_offset)
+
+
+def restaurar_obstaculo(registro, velocidade, pool=None):
+    """Recria o obstáculo descrito por ``registrar_obstaculo`` sem sortear nada."""
+    tipo, x = registro[0], registro[1]
+    if tipo == 'cano':
+        return _instanciar(pool, Cano, x, velocidade, altura=registro[2])
+    if tipo == 'goomba':
+        return _instanciar(pool, Goomba, x, velocidade, osc_offset=registro[2])
+    if tipo == 'tartaruga':
+        return _instanciar(pool, Tartaruga, x, velocidade, osc_offset=registro[2])
+    _, _, altura_mode, y, velocidade_extra = registro
+    return _instanciar(pool, Bomba, x, velocidade, altura_mode=altura_mode, y=y,
+                       velocidade_extra=velocidade_extra)
@@ -0,0 +1,320 @@
+"""
+Gravação e reprodução de rodadas como traces binários compactos.
+
+O percurso depende só da semente e os Marios não alteram o mundo, então uma
+rodada inteira fica descrita pela semente e pelos bits de ação de cada
+agente em cada frame. O arquivo tem um cabeçalho fixo, a chave do genoma
+de cada agente (o agente k é a k-ésima entrada, não o k-ésimo genoma da
+população: com o cache de fitness só os genomas reavaliados jogam) e um
+fluxo zlib de registros:
+
+- ``F``: um frame; bits de "ativo", "pular" e "abaixar" de todos os agentes;
+- ``C``: estado opcional (distância, y e velocidade vertical de quem seguiu
+  vivo), usado para conferir que a reprodução não divergiu;
+- ``E``: fim da rodada, com o fitness final de cada agente.
+
+A gravação e a leitura são feitas em fluxo, com memória limitada, e
+nenhuma das duas importa o pygame (só a reprodução com janela).
+"""
+import struct
+import zlib
+
+import numpy as np
+
+from utils.constants import *
+
+MAGICO = b"MRPL"
+VERSAO = 2
+# Versão 1: sem a tabela de chaves dos genomas
+VERSOES_LIDAS = (1, 2)
+# magico, versão, semente, agentes, geração, intervalo dos estados, frames, melhor agente
+_CABECALHO = struct.Struct("<4sBqIIIIi")
+_OFFSET_TOTAIS = 4 + 1 + 8 + 4 + 4 + 4
+_ESTADO = struct.Struct("<Id")
+_FIM = struct.Struct("<I")
+_CHAVES = np.dtype("<i8")
+_BLOCO_LEITURA = 1 << 16
+
+
+class ErroReplay(ValueError):
+    """Arquivo inválido ou reprodução que divergiu da gravação"""
+
+
+class GravadorReplay:
+    """
+    Grava uma rodada de ``agentes`` Marios em ``caminho``.
+
+    A cada frame, ``registrar`` (um agente) ou ``registrar_todos`` (arrays)
+    anotam a ação aplicada por quem ainda está na rodada, e ``concluir_frame``
+    envia o frame para o arquivo. Com ``intervalo_estados`` > 0, a cada tantos
+    frames ``registrar_estado`` guarda um retrato para conferência. ``chaves``
+    são as chaves dos genomas de cada agente (-1 quando omitidas).
+    """
+
+    def __init__(self, caminho, semente, agentes, geracao=1, intervalo_estados=0, nivel=6,
+                 chaves=None):
+        if semente is None:
+            raise ErroReplay("A gravação exige uma semente (o percurso precisa ser reprodutível)")
+        self.agentes = agentes
+        self.intervalo_estados = max(0, intervalo_estados)
+        self.frames = 0
+        self._bits = np.zeros((3, agentes), dtype=bool)
+        self._compressor = zlib.compressobj(nivel)
+        self._arquivo = open(caminho, "wb")
+        self._arquivo.write(_CABECALHO.pack(
+            MAGICO, VERSAO, semente, agentes, geracao, self.intervalo_estados, 0, -1
+        ))
+        if chaves is None:
+            chaves = np.full(agentes, -1)
+        if len(chaves) != agentes:
+            raise ErroReplay(f"{len(chaves)} chaves de genoma para {agentes} agentes")
+        self._arquivo.write(np.asarray(chaves, dtype=_CHAVES).tobytes())
+
+    def _escrever(self, dados):
+        self._arquivo.write(self._compressor.compress(dados))
+
+    def registrar(self, agente, pular, abaixar):
+        self._bits[0, agente] = True
+        self._bits[1, agente] = pular
+        self._bits[2, agente] = abaixar
+
+    def registrar_todos(self, ativos, pular, abaixar):
+        self._bits[0] = ativos
+        self._bits[1] = pular & ativos
+        self._bits[2] = abaixar & ativos
+
+    def concluir_frame(self):
+        self.frames += 1
+        self._escrever(b"F" + np.packbits(self._bits).tobytes())
+        self._bits[:] = False
+
+    def precisa_estado(self):
+        return self.intervalo_estados > 0 and self.frames % self.intervalo_estados == 0
+
+    def registrar_estado(self, distancia, vivos, y, velocidade_y):
+        """Retrato depois do frame atual; ``vivos`` é a máscara de quem segue na rodada"""
+        vivos = np.asarray(vivos, dtype=bool)
+        self._escrever(
+            b"C"
+            + _ESTADO.pack(self.frames, distancia)
+            + np.packbits(vivos).tobytes()
+            + np.asarray(y, dtype=np.float64)[vivos].tobytes()
+            + np.asarray(velocidade_y, dtype=np.float64)[vivos].tobytes()
+        )
+
+    def fechar(self, fitness=None):
+        """Grava o fim da rodada e completa o cabeçalho com o total de frames e o melhor agente"""
+        if self._arquivo is None:
+            return
+        if fitness is None:
+            fitness = np.full(self.agentes, np.nan)
+        fitness = np.asarray(fitness, dtype=np.float64)
+        melhor = int(np.nanargmax(fitness)) if not np.isnan(fitness).all() else -1
+        self._escrever(b"E" + _FIM.pack(self.frames) + fitness.tobytes())
+        self._arquivo.write(self._compressor.flush())
+        self._arquivo.seek(_OFFSET_TOTAIS)
+        self._arquivo.write(struct.pack("<Ii", self.frames, melhor))
+        self._arquivo.close()
+        self._arquivo = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.fechar()
+
+
+class LeitorReplay:
+    """
+    Lê o cabeçalho e percorre os registros de um trace em fluxo.
+
+    ``chaves`` traz a chave do genoma de cada agente (None em traces da versão 1).
+    """
+
+    def __init__(self, caminho):
+        self.caminho = caminho
+        with open(caminho, "rb") as arquivo:
+            cabecalho = arquivo.read(_CABECALHO.size)
+        if len(cabecalho) < _CABECALHO.size or cabecalho[:4] != MAGICO:
+            raise ErroReplay(f"{caminho} não é um trace de replay")
+        (_, versao, self.semente, self.agentes, self.geracao,
+         self.intervalo_estados, self.frames, self.melhor) = _CABECALHO.unpack(cabecalho)
+        if versao not in VERSOES_LIDAS:
+            raise ErroReplay(f"Versão de trace não suportada: {versao}")
+        self.chaves = None
+        self._inicio_registros = _CABECALHO.size
+        if versao >= 2:
+            tamanho = self.agentes * _CHAVES.itemsize
+            with open(caminho, "rb") as arquivo:
+                arquivo.seek(_CABECALHO.size)
+                dados = arquivo.read(tamanho)
+            if len(dados) < tamanho:
+                raise ErroReplay(f"{caminho} terminou antes da tabela de genomas")
+            self.chaves = np.frombuffer(dados, _CHAVES)
+            self._inicio_registros += tamanho
+        self._bytes_frame = (3 * self.agentes + 7) // 8
+        self._bytes_mascara = (self.agentes + 7) // 8
+
+    def _fluxo(self):
+        """Bytes descomprimidos do fluxo de registros, em blocos"""
+        descompressor = zlib.decompressobj()
+        with open(self.caminho, "rb") as arquivo:
+            arquivo.seek(self._inicio_registros)
+            while True:
+                bloco = arquivo.read(_BLOCO_LEITURA)
+                if not bloco:
+                    break
+                yield descompressor.decompress(bloco)
+        yield descompressor.flush()
+
+    def registros(self):
+        """
+        Gera ``('F', ativos, pular, abaixar)``, ``('C', frame, distancia,
+        vivos, y, velocidade_y)`` e ``('E', frames, fitness)``
+        """
+        n = self.agentes
+        pendente = bytearray()
+        posicao = 0
+        for dados in self._fluxo():
+            pendente += dados
+            while posicao < len(pendente):
+                tag = pendente[posicao:posicao + 1]
+                if tag == b"F":
+                    tamanho = 1 + self._bytes_frame
+                elif tag == b"C":
+                    if posicao + 1 + _ESTADO.size + self._bytes_mascara > len(pendente):
+                        break
+                    inicio = posicao + 1 + _ESTADO.size
+                    mascara = bytes(pendente[inicio:inicio + self._bytes_mascara])
+                    mascara = np.unpackbits(np.frombuffer(mascara, np.uint8), count=n).astype(bool)
+                    tamanho = 1 + _ESTADO.size + self._bytes_mascara + 16 * int(mascara.sum())
+                elif tag == b"E":
+                    tamanho = 1 + _FIM.size + 8 * n
+                else:
+                    raise ErroReplay(f"Registro desconhecido no trace: {tag!r}")
+                if posicao + tamanho > len(pendente):
+                    break
+
+                corpo = bytes(pendente[posicao + 1:posicao + tamanho])
+                posicao += tamanho
+                if tag == b"F":
+                    bits = np.unpackbits(np.frombuffer(corpo, np.uint8), count=3 * n)
+                    bits = bits.astype(bool).reshape(3, n)
+                    yield ('F', bits[0], bits[1], bits[2])
+                elif tag == b"C":
+                    frame, distancia = _ESTADO.unpack_from(corpo)
+                    valores = np.frombuffer(corpo, np.float64, offset=_ESTADO.size + self._bytes_mascara)
+                    metade = len(valores) // 2
+                    yield ('C', frame, distancia, mascara, valores[:metade], valores[metade:])
+                else:
+                    (frames,) = _FIM.unpack_from(corpo)
+                    yield ('E', frames, np.frombuffer(corpo, np.float64, offset=_FIM.size))
+                    return
+            del pendente[:posicao]
+            posicao = 0
+        raise ErroReplay(f"{self.caminho} terminou antes do registro final")
+
+
+def reproduzir(caminho, render=False, apenas_melhor=False, agente=None, perfil=None,
+               genoma=None):
+    """
+    Reproduz um trace e retorna um resumo da rodada.
+
+    Sem ``render`` a rodada é simulada em velocidade máxima, sem pygame;
+    com ``render`` ela é desenhada a ``FPS`` quadros por segundo. Com
+    ``apenas_melhor`` (ou ``agente``, ou a chave ``genoma``) só aquele Mario
+    é simulado e desenhado.
+    Os estados gravados são conferidos contra a reprodução: qualquer
+    diferença levanta ``ErroReplay``.
+    """
+    from game.track import obter_pista
+
+    leitor = LeitorReplay(caminho)
+    if genoma is not None:
+        encontrados = [] if leitor.chaves is None else np.flatnonzero(leitor.chaves == genoma)
+        if not len(encontrados):
+            raise ErroReplay(f"O genoma {genoma} não jogou esta rodada")
+        agente = int(encontrados[0])
+    if apenas_melhor and agente is None:
+        agente = leitor.melhor if leitor.melhor >= 0 else None
+    if agente is not None and not 0 <= agente < leitor.agentes:
+        raise ErroReplay(f"O trace tem {leitor.agentes} agentes; {agente} não existe")
+
+    if render:
+        from game.game import JogoMario
+
+        jogo = JogoMario(modo='ia', render=True, semente=leitor.semente, perfil=perfil)
+    else:
+        from game.simulation import SimulacaoMario
+
+        jogo = SimulacaoMario(modo='ia', semente=leitor.semente)
+    jogo.usar_pista(obter_pista(leitor.semente))
+    jogo.geracao = leitor.geracao
+    marios = jogo.reutilizar_marios(leitor.agentes)
+    selecionados = np.ones(leitor.agentes, dtype=bool)
+    if agente is not None:
+        selecionados[:] = False
+        selecionados[agente] = True
+    colidiram = np.zeros(leitor.agentes, dtype=bool)
+    ativos = np.zeros(leitor.agentes, dtype=bool)
+    frames = 0
+    estados = 0
+    fitness = None
+
+    for registro in leitor.registros():
+        if registro[0] == 'F':
+            _, ativos, pular, abaixar = registro
+            ativos = ativos & selecionados
+            frames += 1
+            if render and not jogo.processar_eventos():
+                jogo.encerrar()
+            jogo.atualizar()
+            for k in np.flatnonzero(ativos):
+                mario = marios[k]
+                mario.aplicar_comandos(pular=bool(pular[k]), abaixar=bool(abaixar[k]))
+                mario.atualizar()
+                if jogo.verificar_colisao(mario):
+                    colidiram[k] = True
+            # Como na avaliação, quem colide sai de cena no mesmo frame
+            jogo.marios = [marios[k] for k in np.flatnonzero(ativos & ~colidiram)]
+            jogo.vivos = len(jogo.marios)
+            if render:
+                jogo.desenhar()
+                jogo.relogio.tick(FPS)
+        elif registro[0] == 'C':
+            _, frame, distancia, vivos, y, velocidade_y = registro
+            _conferir_estado(frame, frames, jogo, marios, ativos & ~colidiram,
+                             vivos, y, velocidade_y, selecionados, distancia)
+            estados += 1
+        else:
+            fitness = registro[2]
+
+    melhor = leitor.melhor if leitor.melhor >= 0 else None
+    melhor_genoma = None
+    if melhor is not None and leitor.chaves is not None and leitor.chaves[melhor] >= 0:
+        melhor_genoma = int(leitor.chaves[melhor])
+    return {
+        'semente': leitor.semente,
+        'geracao': leitor.geracao,
+        'agentes': leitor.agentes,
+        'frames': frames,
+        'distancia': jogo.distancia_percorrida,
+        'vitoria': jogo.vitoria,
+        'sobreviventes': int((ativos & ~colidiram).sum()),
+        'estados_conferidos': estados,
+        'melhor_agente': melhor,
+        'melhor_genoma': melhor_genoma,
+        'melhor_fitness': None if melhor is None else float(fitness[melhor]),
+    }
+
+
+def _conferir_estado(frame, frames, jogo, marios, sobreviventes, vivos, y, velocidade_y,
+                     selecionados, distancia):
+    """Compara a reprodução com um retrato gravado"""
+    if frame != frames or jogo.distancia_percorrida != distancia:
+        raise ErroReplay(f"O mundo divergiu da gravação no frame {frame}")
+    for k, yk, vyk in zip(np.flatnonzero(vivos), y, velocidade_y):
+        if not selecionados[k]:
+            continue
+        if not sobreviventes[k] or marios[k].y != yk or marios[k].velocidade_y != vyk:
+            raise ErroReplay(f"A reprodução divergiu da gravação no frame {frame} (agente {k})")
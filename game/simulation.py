@@ -0,0 +1,240 @@
+"""
+Núcleo de simulação do jogo Mario, sem dependência do pygame.
+
+Contém o estado do mundo (obstáculos, velocidade, pontuação), a geração de
+obstáculos, a colisão e a física. A renderização fica em ``game.game``.
+"""
+import random
+
+from game.mario import Mario, sensores_do_mundo
+from game.obstacles import (
+    PoolObstaculos,
+    criar_bomba,
+    gerar_obstaculo,
+    registrar_obstaculo,
+    restaurar_obstaculo,
+)
+from game.spatial import IndiceObstaculos
+from utils.constants import *
+
+
+def colide(a, b):
+    """Testa a interseção de duas caixas (x, y, largura, altura).
+
+    Segue a mesma regra de ``pygame.Rect.colliderect``: bordas que apenas se
+    tocam não colidem e caixas de tamanho zero nunca colidem.
+    """
+    ax, ay, al, aa = a
+    bx, by, bl, ba = b
+    if not (al and aa and bl and ba):
+        return False
+    return ax < bx + bl and bx < ax + al and ay < by + ba and by < ay + aa
+
+
+class SimulacaoMario:
+    def __init__(self, modo='manual', semente=None):
+        """
+        Inicializa a simulação sem janela, fontes ou sprites
+        modo: 'manual' para jogar manualmente, 'ia' para treinamento NEAT
+        semente: semente do gerador de obstáculos (None = percurso aleatório)
+        """
+        self.modo = modo
+        self.semente = semente
+        self.pista = None
+        self.gravacao = None
+        # Objetos reaproveitados entre frames e entre resets
+        self.pool_obstaculos = PoolObstaculos()
+        self.obstaculos = IndiceObstaculos()
+        self.mario = Mario(100, CHAO_Y)
+        self._marios_criados = []
+        self._sensores_mundo = {}
+        self.resetar()
+
+    def resetar(self):
+        """Reseta o jogo para o início, reaproveitando Mario e obstáculos"""
+        # Mesma semente => mesmo percurso, em qualquer processo
+        self.rng = random.Random(self.semente)
+        self.mario.resetar(100, CHAO_Y)
+        self.marios = [self.mario] if self.modo == 'manual' else []
+        for obstaculo in self.obstaculos.esvaziar():
+            self.pool_obstaculos.devolver(obstaculo)
+        self.pontuacao = 0
+        self.distancia_percorrida = 0
+        self.velocidade = VELOCIDADE_INICIAL
+        self.ultimo_obstaculo_x = LARGURA
+        self.ultimo_bomba_x = LARGURA
+        self.frames_desde_obstaculo_chao = 999
+        self.jogo_ativo = True
+        self.vitoria = False
+        self.pausado = False
+        self.geracao = 1
+        self.vivos = 1
+        self.frame = 0
+        self._indice_pista = 0
+        self._sensores_mundo.clear()
+
+    def adicionar_mario(self, mario):
+        """Adiciona um Mario (usado no modo IA)"""
+        self.marios.append(mario)
+
+    def reutilizar_marios(self, quantidade, x=100, y=CHAO_Y):
+        """Coloca ``quantidade`` Marios no início, reaproveitando os de gerações anteriores"""
+        while len(self._marios_criados) < quantidade:
+            self._marios_criados.append(Mario(x, y))
+        marios = self._marios_criados[:quantidade]
+        for mario in marios:
+            mario.resetar(x, y)
+        self.marios = list(marios)
+        return marios
+
+    def usar_pista(self, pista):
+        """Reproduz uma ``Pista`` pré-calculada em vez de sortear os obstáculos"""
+        self.pista = pista
+        self._indice_pista = 0
+
+    def _adicionar_obstaculo(self, obstaculo):
+        self.obstaculos.append(obstaculo)
+        self._sensores_mundo.clear()
+        if self.gravacao is not None:
+            self.gravacao.append((self.frame, registrar_obstaculo(obstaculo)))
+
+    def _gerar_da_pista(self):
+        """Cria os obstáculos agendados para o frame atual"""
+        eventos = self.pista.eventos_ate(self.frame)
+        while self._indice_pista < len(eventos) and eventos[self._indice_pista][0] == self.frame:
+            registro = eventos[self._indice_pista][1]
+            self._adicionar_obstaculo(
+                restaurar_obstaculo(registro, self.velocidade, self.pool_obstaculos))
+            self._indice_pista += 1
+
+    def gerar_obstaculo(self):
+        """Gera novos obstáculos"""
+        if self.ultimo_obstaculo_x < LARGURA - self.rng.randint(
+            DISTANCIA_MIN_OBSTACULOS, DISTANCIA_MAX_OBSTACULOS):
+            obstaculo = gerar_obstaculo(
+                LARGURA, self.velocidade, self.rng, self.pool_obstaculos)
+            self._adicionar_obstaculo(obstaculo)
+            self.ultimo_obstaculo_x = LARGURA
+            if obstaculo.tipo in {'cano', 'goomba', 'tartaruga'}:
+                self.frames_desde_obstaculo_chao = 0
+
+        bomba_intervalo = self.rng.randint(320, 520)
+        if (
+            self.frames_desde_obstaculo_chao > 45
+            and self.ultimo_bomba_x < LARGURA - bomba_intervalo
+            and not self._tem_obstaculo_chao_proximo(260)
+            and self.rng.random() < CHANCE_BOMBA
+        ):
+            altura_mode = 'alto' if self.rng.random() < 0.4 else 'baixo'
+            if altura_mode == 'alto' and self.frames_desde_obstaculo_chao < 90:
+                altura_mode = 'baixo'
+
+            bomba_x = LARGURA + 20
+            if self._conflito_com_obstaculo_chao(bomba_x, altura_mode):
+                return
+
+            bomba = criar_bomba(
+                bomba_x, self.velocidade, altura_mode=altura_mode, rng=self.rng,
+                pool=self.pool_obstaculos,
+            )
+            self._adicionar_obstaculo(bomba)
+            self.ultimo_bomba_x = LARGURA
+
+    def _tem_obstaculo_chao_proximo(self, distancia_limite=220):
+        """Retorna True se existir obstáculo terrestre perto da borda direita."""
+        # O obstáculo do chão mais à direita é o último da faixa
+        obs = self.obstaculos.ultimo_chao()
+        return obs is not None and LARGURA - obs.x < distancia_limite
+
+    def _conflito_com_obstaculo_chao(self, bomba_x, altura_mode):
+        """Evita bombas no mesmo alinhamento horizontal que obstáculos terrestres."""
+        separacao = 320 if altura_mode == 'alto' else 260
+        for obs in self.obstaculos.na_faixa_x(bomba_x - separacao, bomba_x + separacao):
+            if obs.tipo in {'cano', 'goomba', 'tartaruga'}:
+                centro_obs = obs.x + obs.largura / 2
+                if abs(centro_obs - bomba_x) < separacao:
+                    return True
+        return False
+
+    def atualizar(self):
+        """Atualiza o estado do jogo"""
+        if not self.jogo_ativo or self.pausado:
+            return
+        self.frame += 1
+        self._sensores_mundo.clear()
+
+        # Atualizar obstáculos
+        for obstaculo in self.obstaculos:
+            obstaculo.atualizar()
+
+        # Remover obstáculos fora da tela e contar pontos
+        for obstaculo in self.obstaculos:
+            if (not obstaculo.passou and not obstaculo.fora_da_tela()
+                    and obstaculo.x + obstaculo.largura < self.mario.x):
+                obstaculo.passou = True
+                self.pontuacao += PONTOS_INIMIGO
+        for obstaculo in self.obstaculos.remover_expirados():
+            self.pool_obstaculos.devolver(obstaculo)
+
+        # Gerar novos obstáculos
+        if self.pista is not None:
+            self._gerar_da_pista()
+        else:
+            self.gerar_obstaculo()
+        self.ultimo_obstaculo_x -= self.velocidade
+        self.ultimo_bomba_x -= self.velocidade
+        self.frames_desde_obstaculo_chao += 1
+
+        # Aumentar velocidade gradualmente
+        if self.velocidade < VELOCIDADE_MAXIMA:
+            self.velocidade += ACELERACAO
+            for obs in self.obstaculos:
+                obs.velocidade = self.velocidade
+
+        # Aumentar distância e pontuação
+        self.distancia_percorrida += self.velocidade
+        self.pontuacao += PONTOS_POR_FRAME
+
+        # Verificar vitória
+        if self.distancia_percorrida >= DISTANCIA_PARA_VENCER:
+            self.vitoria = True
+            self.jogo_ativo = False
+
+    def sensores_mundo(self, x=100):
+        """
+        Sensores 1 a 5 (``sensores_do_mundo``) para um Mario em ``x``, calculados
+        uma vez por frame e compartilhados por todos os Marios nessa posição
+        """
+        mundo = self._sensores_mundo.get(x)
+        if mundo is None:
+            mundo = sensores_do_mundo(self.obstaculos, self.velocidade, x)
+            self._sensores_mundo[x] = mundo
+        return mundo
+
+    def sensores(self, mario):
+        """Os 6 sensores de ``Mario.get_sensores``, a partir do retrato do frame"""
+        return mario.sensores_com_mundo(self.sensores_mundo(mario.x))
+
+    def verificar_colisao(self, mario):
+        """Verifica colisão do Mario com obstáculos"""
+        if not mario.vivo:
+            return False
+
+        caixa = mario.get_caixa()
+        # Só os obstáculos que alcançam a faixa horizontal do Mario
+        for obstaculo in self.obstaculos.na_faixa_x(caixa[0], caixa[0] + caixa[2]):
+            if colide(caixa, obstaculo.get_caixa()):
+                return True
+        return False
+
+    def atualizar_mario(self, mario=None):
+        """Atualiza um Mario específico"""
+        if mario is None:
+            mario = self.mario
+
+        mario.atualizar()
+
+        if self.verificar_colisao(mario):
+            mario.morrer()
+            if self.modo == 'manual':
+                self.jogo_ativo = False
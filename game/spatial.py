@@ -0,0 +1,103 @@
+"""
+Índice espacial dos obstáculos por faixa (chão e ar).
+
+Os obstáculos do chão nascem na borda direita, com pelo menos
+``DISTANCIA_MIN_OBSTACULOS`` entre eles, e andam todos na mesma velocidade;
+por isso a faixa do chão, em ordem de criação, também está ordenada por x
+(e pela borda direita) e aceita busca binária. Bombas têm velocidade extra
+e podem ultrapassar umas às outras: a faixa do ar é pequena e fica em ordem
+de criação, percorrida linearmente.
+"""
+from utils.constants import *
+
+TIPOS_CHAO = ('cano', 'goomba', 'tartaruga')
+
+
+def _primeiro_a_direita(faixa, x):
+    """Índice do primeiro obstáculo cuja borda direita passa de ``x``"""
+    inicio, fim = 0, len(faixa)
+    while inicio < fim:
+        meio = (inicio + fim) // 2
+        obs = faixa[meio]
+        if obs.x + obs.largura > x:
+            fim = meio
+        else:
+            inicio = meio + 1
+    return inicio
+
+
+class IndiceObstaculos(list):
+    """
+    Lista dos obstáculos em ordem de criação, com as faixas ``chao`` e ``ar``.
+
+    Continua sendo uma lista para quem só percorre os obstáculos (desenho,
+    sensores vetorizados); inclusões e remoções devem passar por ``append``
+    e ``remover_expirados`` para manter as faixas em dia.
+    """
+
+    def __init__(self, obstaculos=()):
+        super().__init__()
+        self.chao = []
+        self.ar = []
+        for obstaculo in obstaculos:
+            self.append(obstaculo)
+
+    def append(self, obstaculo):
+        super().append(obstaculo)
+        if obstaculo.tipo in TIPOS_CHAO:
+            self.chao.append(obstaculo)
+        else:
+            self.ar.append(obstaculo)
+
+    def remover_expirados(self):
+        """Tira os obstáculos que saíram pela esquerda e os retorna, em uma única passada"""
+        # No chão, os que saíram formam um prefixo da faixa
+        quantidade = 0
+        while quantidade < len(self.chao) and self.chao[quantidade].fora_da_tela():
+            quantidade += 1
+        expirados = self.chao[:quantidade]
+        del self.chao[:quantidade]
+
+        expirados += [obs for obs in self.ar if obs.fora_da_tela()]
+        if expirados:
+            self.ar = [obs for obs in self.ar if not obs.fora_da_tela()]
+            self[:] = [obs for obs in self if not obs.fora_da_tela()]
+        return expirados
+
+    def esvaziar(self):
+        """Remove todos os obstáculos e os retorna"""
+        obstaculos = list(self)
+        self.clear()
+        self.chao.clear()
+        self.ar.clear()
+        return obstaculos
+
+    def proximo_chao(self, x):
+        """Primeiro obstáculo do chão que ainda não ficou para trás de ``x``"""
+        # A faixa está ordenada: o laço só passa pelos que já ficaram para trás
+        for obs in self.chao:
+            if obs.x + obs.largura > x:
+                return obs
+        return None
+
+    def proximo_ar(self, x):
+        """Primeira bomba (em ordem de criação) que ainda não ficou para trás de ``x``"""
+        for obs in self.ar:
+            if obs.x + obs.largura > x:
+                return obs
+        return None
+
+    def ultimo_chao(self):
+        """Obstáculo do chão mais à direita (o criado por último)"""
+        return self.chao[-1] if self.chao else None
+
+    def na_faixa_x(self, inicio, fim):
+        """Obstáculos que podem ocupar algum ponto do intervalo [inicio, fim)"""
+        # Margem de 1 px cobre o truncamento para inteiro de get_caixa
+        indice = _primeiro_a_direita(self.chao, inicio - 1)
+        while indice < len(self.chao) and self.chao[indice].x < fim + 1:
+            yield self.chao[indice]
+            indice += 1
+        for obs in self.ar:
+            if obs.x < fim + 1 and obs.x + obs.largura > inicio - 1:
+                yield obs
@@ -0,0 +1,48 @@
+"""
+Pistas de obstáculos pré-calculadas a partir de uma semente.
+
+O percurso não depende dos Marios, então a sequência de obstáculos de uma
+semente pode ser calculada uma vez e reproduzida por quantos mundos forem
+necessários (fatias da população, processos, episódios), sem sortear nada
+nem executar a lógica de spawn no laço principal.
+"""
+from functools import lru_cache
+
+from game.simulation import SimulacaoMario
+
+
+class Pista:
+    """Agenda de spawns (frame, registro do obstáculo) de uma semente.
+
+    A agenda é estendida sob demanda: só são calculados os frames que algum
+    mundo já pediu, e o percurso completo pode ser gerado com ``completar``.
+    """
+
+    def __init__(self, semente):
+        self.semente = semente
+        self.eventos = []
+        self._gerador = SimulacaoMario(modo='ia', semente=semente)
+        self._gerador.gravacao = self.eventos
+
+    @property
+    def completa(self):
+        return not self._gerador.jogo_ativo
+
+    def eventos_ate(self, frame):
+        """Garante que todos os spawns até ``frame`` foram calculados"""
+        gerador = self._gerador
+        while gerador.frame < frame and gerador.jogo_ativo:
+            gerador.atualizar()
+        return self.eventos
+
+    def completar(self):
+        """Calcula o percurso inteiro, até a linha de chegada"""
+        while self._gerador.jogo_ativo:
+            self._gerador.atualizar()
+        return self
+
+
+@lru_cache(maxsize=16)
+def obter_pista(semente):
+    """Pista compartilhada de uma semente (reaproveitada dentro do processo)."""
+    return Pista(semente)
@@ -0,0 +1,140 @@
+"""
+População de Marios em arrays NumPy.
+
+Mantém posição, velocidade e estados (no chão, agachado, vivo) de todos os
+agentes em vetores e calcula física, sensores e colisões AABB contra os
+obstáculos em um único passo por frame. Reproduz exatamente ``Mario``:
+mesmas regras de pulo/agachamento, mesmos seis sensores e o mesmo
+truncamento de coordenadas usado em ``Mario.get_caixa``.
+"""
+import numpy as np
+
+from game.spatial import TIPOS_CHAO
+from utils.constants import *
+
+
+class ObstaculosVetorizados:
+    """Fotografia dos obstáculos de um frame em arrays (na ordem da lista)."""
+
+    def __init__(self, obstaculos):
+        quantidade = len(obstaculos)
+        self.x = np.empty(quantidade)
+        self.largura = np.empty(quantidade)
+        self.caixas = np.empty((quantidade, 4))
+        self.chao = np.zeros(quantidade, dtype=bool)
+        self.ar = np.zeros(quantidade, dtype=bool)
+        self.altura_sensor = np.zeros(quantidade)
+        for i, obs in enumerate(obstaculos):
+            self.x[i] = obs.x
+            self.largura[i] = obs.largura
+            self.caixas[i] = obs.get_caixa()
+            if obs.tipo in TIPOS_CHAO:
+                self.chao[i] = True
+                if obs.tipo == 'cano':
+                    self.altura_sensor[i] = obs.altura / CANO_ALTURA_MAX
+                elif obs.tipo == 'tartaruga':
+                    self.altura_sensor[i] = 0.3
+                else:  # goomba
+                    self.altura_sensor[i] = 0.2
+            elif obs.tipo == 'bomba':
+                self.ar[i] = True
+
+
+class PopulacaoVetorizada:
+    def __init__(self, quantidade, x=100, y=CHAO_Y):
+        self.resetar(quantidade, x, y)
+
+    def resetar(self, quantidade, x=100, y=CHAO_Y):
+        """Coloca ``quantidade`` Marios parados no ponto inicial"""
+        self.quantidade = quantidade
+        self.x = np.full(quantidade, float(x))
+        self.y = np.full(quantidade, float(y))
+        self.velocidade_x = np.zeros(quantidade)
+        self.velocidade_y = np.zeros(quantidade)
+        self.no_chao = np.ones(quantidade, dtype=bool)
+        self.agachado = np.zeros(quantidade, dtype=bool)
+        self.vivo = np.ones(quantidade, dtype=bool)
+
+    def remover(self, mascara):
+        """Retira os agentes marcados da simulação"""
+        self.vivo &= ~mascara
+
+    def aplicar_comandos(self, pular, abaixar):
+        """Equivalente vetorizado de ``Mario.aplicar_comandos``"""
+        pula = pular & self.no_chao & self.vivo
+        self.velocidade_y[pula] = FORCA_PULO
+        self.no_chao &= ~pula
+        self.agachado &= ~pula
+
+        abaixa = abaixar & self.no_chao & self.vivo
+        self.agachado = np.where(abaixar, self.agachado | abaixa, False)
+
+    def atualizar(self):
+        """Equivalente vetorizado de ``Mario.atualizar``"""
+        vivo = self.vivo
+        self.velocidade_y = np.where(vivo, self.velocidade_y + GRAVIDADE, self.velocidade_y)
+        self.y = np.where(vivo, self.y + self.velocidade_y, self.y)
+        x = np.clip(self.x + self.velocidade_x, 0, LARGURA - MARIO_LARGURA)
+        self.x = np.where(vivo, x, self.x)
+
+        no_chao = vivo & (self.y >= CHAO_Y)
+        no_ar = vivo & ~no_chao
+        self.y[no_chao] = CHAO_Y
+        self.velocidade_y[no_chao] = 0
+        self.no_chao |= no_chao
+        self.agachado &= ~no_ar
+
+    def caixas(self):
+        """Caixas de colisão (N, 4) truncadas como em ``Mario.get_caixa``"""
+        offset = np.where(self.agachado, MARIO_AGACHADO_OFFSET, 0)
+        altura = np.where(self.agachado, MARIO_AGACHADO_ALTURA, MARIO_ALTURA)
+        return (
+            np.trunc(self.x + 4),
+            np.trunc(self.y + offset),
+            np.full(self.quantidade, MARIO_LARGURA - 8),
+            altura,
+        )
+
+    def colisoes(self, obstaculos):
+        """Máscara dos agentes vivos que colidem com algum obstáculo"""
+        if not isinstance(obstaculos, ObstaculosVetorizados):
+            obstaculos = ObstaculosVetorizados(obstaculos)
+        if not len(obstaculos.x):
+            return np.zeros(self.quantidade, dtype=bool)
+
+        ax, ay, al, aa = (v[:, None] for v in self.caixas())
+        bx, by, bl, ba = (obstaculos.caixas[:, i][None, :] for i in range(4))
+        colide = (ax < bx + bl) & (bx < ax + al) & (ay < by + ba) & (by < ay + aa)
+        # Caixas de tamanho zero nunca colidem (regra do pygame.Rect)
+        colide &= (bl > 0) & (ba > 0)
+        return self.vivo & colide.any(axis=1)
+
+    def sensores(self, obstaculos, velocidade_jogo):
+        """Matriz (N, 6) com os sensores de ``Mario.get_sensores`` de cada agente"""
+        if not isinstance(obstaculos, ObstaculosVetorizados):
+            obstaculos = ObstaculosVetorizados(obstaculos)
+
+        sensores = np.empty((self.quantidade, SENSOR_COUNT))
+        sensores[:, 0] = 1.0
+        sensores[:, 1] = 0.0
+        sensores[:, 2] = 1.0
+        sensores[:, 3] = 0.0
+
+        if len(obstaculos.x):
+            # O primeiro da lista que ainda não ficou para trás, como no laço original
+            a_frente = (obstaculos.x + obstaculos.largura)[None, :] > self.x[:, None]
+            for faixa, col_dist in ((obstaculos.chao, 0), (obstaculos.ar, 2)):
+                candidatos = a_frente & faixa[None, :]
+                existe = candidatos.any(axis=1)
+                indice = candidatos.argmax(axis=1)
+                dist = np.clip((obstaculos.x[indice] - self.x) / LARGURA, 0, 1)
+                sensores[:, col_dist] = np.where(existe, dist, 1.0)
+                if col_dist == 0:
+                    sensores[:, 1] = np.where(existe, obstaculos.altura_sensor[indice], 0.0)
+                else:
+                    sensores[:, 3] = existe
+
+        vel_norm = (velocidade_jogo - VELOCIDADE_INICIAL) / (VELOCIDADE_MAXIMA - VELOCIDADE_INICIAL)
+        sensores[:, 4] = max(0, min(1, vel_norm))
+        sensores[:, 5] = np.clip((CHAO_Y - self.y) / CHAO_Y, 0, 1)
+        return sensores
@@ -5,10 +5,21 @@ Execute este arquivo para jogar manualmente.
 Use as setas ou WASD para controlar o Mario.
 """
 
+import argparse
+
 from game.game import JogoMario
+from utils.profiling import PerfilFrames
 
 
 def main():
+    parser = argparse.ArgumentParser(description="Super Mario Runner - Modo Manual")
+    parser.add_argument("--profile", action="store_true",
+                        help="Mostra p50/p95/p99 de cada etapa do frame na tela")
+    parser.add_argument("--profile-trace", default="",
+                        help="Grava os tempos de cada frame em um arquivo JSON Lines")
+    args = parser.parse_args()
+    
+
     print("=" * 50)
     print("SUPER MARIO RUNNER - Modo Manual")
     print("=" * 50)
@@ -25,7 +36,11 @@ def main():
     print("\n" + "=" * 50)
     print("Iniciando jogo...\n")
     
-    jogo = JogoMario(modo='manual')
+    perfil = None
+    if args.profile or args.profile_trace:
+        perfil = PerfilFrames(arquivo_trace=args.profile_trace, overlay=args.profile)
+    
+    jogo = JogoMario(modo='manual', perfil=perfil)
     jogo.executar()
 
 
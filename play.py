@@ -0,0 +1,64 @@
+"""
+Joga com o melhor genoma salvo pelo treinamento (``melhor_genoma.pkl``).
+
+    python play.py                              # um episódio na janela
+    python play.py --episodes 200 --headless    # avaliação em lote por semente
+"""
+
+import argparse
+
+from ai.playback import avaliar_sementes, carregar_campeao, compilar_campeao, jogar, resumir
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Super Mario Runner - Campeão do NEAT")
+    parser.add_argument("--genome", default="melhor_genoma.pkl",
+                        help="Genoma salvo por app.py --best-path")
+    parser.add_argument("--config", default="config-feedforward.txt",
+                        help="Configuração NEAT usada no treinamento")
+    parser.add_argument("--seed", type=int, default=0,
+                        help="Semente do primeiro percurso (os demais usam as seguintes)")
+    parser.add_argument("--episodes", type=int, default=1,
+                        help="Quantidade de percursos (sementes consecutivas)")
+    parser.add_argument("--headless", action="store_true",
+                        help="Não abre janela: simula todos os episódios em lote")
+    parser.add_argument("--max-score", type=int, default=50000,
+                        help="Pontuação máxima por episódio, como no treinamento")
+    parser.add_argument("--decision-interval", type=int, default=1,
+                        help="Consulta a rede a cada K frames (use o valor do treinamento)")
+    args = parser.parse_args()
+
+    genome, config = carregar_campeao(args.genome, args.config)
+    sementes = range(args.seed, args.seed + max(1, args.episodes))
+    intervalo = max(1, args.decision_interval)
+    print(f"Genoma: {args.genome} (fitness {genome.fitness}, "
+          f"{len(genome.nodes)} nós, {len(genome.connections)} conexões)")
+
+    if args.headless:
+        resultados = avaliar_sementes(genome, config, sementes, args.max_score, intervalo)
+    else:
+        rede = compilar_campeao(genome, config)
+        resultados = []
+        for semente in sementes:
+            resultado = jogar(rede, semente, True, args.max_score, intervalo)
+            if resultado["interrompido"]:
+                # ESC ou janela fechada: encerra todos os episódios
+                break
+            resultados.append(resultado)
+        if not resultados:
+            return
+
+    for r in resultados[:20]:
+        estado = "vitória" if r["vitoria"] else "derrota"
+        print(f"  semente {r['semente']}: {estado}, distância {r['distancia']:.0f}, "
+              f"{r['frames']} frames")
+    resumo = resumir(resultados)
+    print(
+        f"Vitórias: {resumo['taxa_vitoria']:.0%} de {resumo['episodios']} | "
+        f"distância média {resumo['distancia_media']:.0f} (mínima {resumo['distancia_minima']:.0f}) | "
+        f"{resumo['ms_por_episodio']:.2f} ms por episódio"
+    )
+
+
+if __name__ == '__main__':
+    main()
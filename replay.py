@@ -0,0 +1,50 @@
+"""
+Reproduz rodadas gravadas com ``app.py --record-dir``.
+
+    python replay.py replays/geracao-0012.mrpl            # janela a 60 FPS
+    python replay.py replays/geracao-0012.mrpl --best     # só o melhor genoma
+    python replay.py replays/*.mrpl --turbo               # confere sem desenhar
+"""
+
+import argparse
+
+from game.replay import ErroReplay, reproduzir
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Super Mario Runner - Replay de rodadas gravadas")
+    parser.add_argument("traces", nargs="+", help="Arquivos .mrpl gravados no treinamento")
+    parser.add_argument("--best", action="store_true",
+                        help="Mostra só o Mario com o maior fitness da rodada")
+    parser.add_argument("--agent", type=int, default=None,
+                        help="Mostra só o Mario de índice N")
+    parser.add_argument("--genome", type=int, default=None,
+                        help="Mostra só o Mario do genoma de chave N")
+    parser.add_argument("--turbo", action="store_true",
+                        help="Re-simula sem janela e sem limite de FPS (confere os estados gravados)")
+    args = parser.parse_args()
+
+    for caminho in args.traces:
+        try:
+            resumo = reproduzir(caminho, render=not args.turbo,
+                                apenas_melhor=args.best, agente=args.agent,
+                                genoma=args.genome)
+        except ErroReplay as erro:
+            print(f"{caminho}: {erro}")
+            continue
+        melhor = resumo['melhor_agente']
+        linha = (
+            f"{caminho}: geração {resumo['geracao']}, semente {resumo['semente']}, "
+            f"{resumo['frames']} frames, distância {resumo['distancia']:.0f}, "
+            f"{resumo['estados_conferidos']} estados conferidos"
+        )
+        if melhor is not None:
+            genoma = resumo['melhor_genoma']
+            linha += f", melhor agente {melhor}"
+            linha += f" (genoma {genoma}, " if genoma is not None else " ("
+            linha += f"fitness {resumo['melhor_fitness']:.2f})"
+        print(linha)
+
+
+if __name__ == '__main__':
+    main()
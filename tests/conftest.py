@@ -0,0 +1,49 @@
+"""Fixtures compartilhadas: configuração NEAT e uma população pequena já mutada."""
+
+import random
+import sys
+from pathlib import Path
+
+import neat
+import pytest
+
+RAIZ = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(RAIZ))
+
+from ai.config import carregar_config  # noqa: E402
+
+AJUSTES_BASE = {"render": False, "turbo": True, "preview_every": 0, "max_score": 50000}
+
+
+def nova_config():
+    """Configuração do jogo com uma população menor.
+
+    O contador de nós fica na configuração: execuções que precisam começar
+    do mesmo estado usam cada uma a sua.
+    """
+
+    config = carregar_config(RAIZ / "config-feedforward.txt")
+    config.pop_size = 24
+    return config
+
+
+@pytest.fixture
+def config():
+    return nova_config()
+
+
+@pytest.fixture
+def genomas(config):
+    """Genomas com topologias e pesos variados (alguns com nós ocultos)."""
+
+    estado = random.getstate()
+    random.seed(1)
+    try:
+        populacao = neat.Population(config)
+        genomas = list(populacao.population.values())
+        for genome in genomas:
+            for _ in range(random.randint(0, 20)):
+                genome.mutate(config.genome_config)
+    finally:
+        random.setstate(estado)
+    return genomas
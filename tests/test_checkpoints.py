@@ -0,0 +1,96 @@
+"""Checkpoints em segundo plano: limpeza dos antigos e retomada do treinamento."""
+
+import random
+
+import neat
+
+from ai.checkpoints import CheckpointerAssincrono, ultimo_checkpoint
+from conftest import nova_config
+
+
+def _fitness_por_geracao(valores):
+    """Função de avaliação que dá a todos os genomas o próximo valor de ``valores``."""
+
+    restantes = iter(valores)
+
+    def avaliar(genomes, config):
+        valor = next(restantes)
+        for _, genome in genomes:
+            genome.fitness = valor
+
+    return avaliar
+
+
+def _fitness_estrutural(historico):
+    """Fitness determinístico pela estrutura do genoma; anota cada geração em ``historico``."""
+
+    def avaliar(genomes, config):
+        geracao = []
+        for chave, genome in genomes:
+            pesos = sum(abs(conexao.weight) for conexao in genome.connections.values())
+            genome.fitness = pesos + len(genome.nodes)
+            geracao.append((chave, genome.fitness))
+        historico.append(geracao)
+
+    return avaliar
+
+
+def _checkpoints_no_disco(pasta):
+    return sorted(
+        int(arquivo.name.rsplit("-", 1)[1])
+        for arquivo in pasta.glob("neat-checkpoint-*")
+        if arquivo.name.rsplit("-", 1)[1].isdigit()
+    )
+
+
+def _checkpointer(pasta, manter):
+    return CheckpointerAssincrono(1, str(pasta / "neat-checkpoint-"), manter=manter)
+
+
+def test_mantem_o_melhor_e_os_ultimos(config, tmp_path):
+    populacao = neat.Population(config)
+    checkpointer = _checkpointer(tmp_path, manter=2)
+    populacao.add_reporter(checkpointer)
+    # O checkpoint da geração g tem o sufixo g + 1; a geração 2 é a melhor
+    populacao.run(_fitness_por_geracao([1, 5, 100, 2, 3, 4, 6]), 7)
+    checkpointer.fechar()
+
+    assert _checkpoints_no_disco(tmp_path) == [3, 6, 7]
+
+
+def test_limpeza_continua_depois_de_retomar(config, tmp_path):
+    populacao = neat.Population(config)
+    checkpointer = _checkpointer(tmp_path, manter=2)
+    populacao.add_reporter(checkpointer)
+    populacao.run(_fitness_por_geracao([1, 5, 100, 2, 3]), 5)
+    checkpointer.fechar()
+
+    retomada = neat.Checkpointer.restore_checkpoint(str(ultimo_checkpoint(tmp_path)))
+    checkpointer = _checkpointer(tmp_path, manter=2)
+    checkpointer.last_generation_checkpoint = retomada.generation
+    retomada.add_reporter(checkpointer)
+    retomada.run(_fitness_por_geracao([1, 1, 1]), 3)
+    checkpointer.fechar()
+
+    # O melhor (geração 2) veio do índice gravado antes da retomada
+    assert _checkpoints_no_disco(tmp_path) == [3, 7, 8]
+
+
+def test_retomada_segue_como_sem_interrupcao(tmp_path):
+    random.seed(4)
+    continuo = []
+    neat.Population(nova_config()).run(_fitness_estrutural(continuo), 6)
+
+    random.seed(4)
+    interrompido = []
+    populacao = neat.Population(nova_config())
+    checkpointer = CheckpointerAssincrono(3, str(tmp_path / "neat-checkpoint-"))
+    populacao.add_reporter(checkpointer)
+    populacao.run(_fitness_estrutural(interrompido), 3)
+    checkpointer.fechar()
+
+    retomada = neat.Checkpointer.restore_checkpoint(str(tmp_path / "neat-checkpoint-3"))
+    assert retomada.generation == 3
+    retomada.run(_fitness_estrutural(interrompido), 3)
+
+    assert interrompido == continuo
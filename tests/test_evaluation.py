@@ -0,0 +1,72 @@
+"""Todos os caminhos de avaliação dão o mesmo fitness para a mesma semente."""
+
+import numpy as np
+import pytest
+
+from ai.episodes import agregar, avaliar_episodios, sementes_episodios
+from ai.evaluation import avaliar_genomas
+from ai.parallel import AvaliadorParalelo
+from conftest import AJUSTES_BASE
+
+SEMENTE = 11
+
+
+def _avaliar(genomas, config, semente=SEMENTE, **ajustes):
+    frames = avaliar_genomas(genomas, config, dict(AJUSTES_BASE, **ajustes), semente)
+    return [genome.fitness for genome in genomas], frames
+
+
+@pytest.mark.parametrize(
+    "ajustes",
+    [{"vectorized": True}, {"vectorized": True, "batched_nn": True}],
+    ids=["vetorizado", "rede-em-lote"],
+)
+def test_caminhos_iguais_ao_serial(config, genomas, ajustes):
+    serial = _avaliar(genomas, config)
+    assert _avaliar(genomas, config, **ajustes) == serial
+
+
+def test_paralelo_igual_ao_serial(config, genomas):
+    serial, frames = _avaliar(genomas, config)
+    avaliador = AvaliadorParalelo(2, config, AJUSTES_BASE)
+    try:
+        frames_paralelo = avaliador.avaliar(genomas, SEMENTE, 1)
+    finally:
+        avaliador.fechar()
+    assert [genome.fitness for genome in genomas] == serial
+    # Cada processo simula a geração inteira para a sua fatia
+    assert frames_paralelo >= frames
+
+
+def test_fatia_da_populacao_nao_muda_o_fitness(config, genomas):
+    serial, _ = _avaliar(genomas, config)
+    metade, _ = _avaliar(genomas[::2], config)
+    assert metade == serial[::2]
+
+
+@pytest.mark.parametrize("intervalo", [1, 3])
+def test_intervalo_de_decisao_igual_nos_caminhos(config, genomas, intervalo):
+    serial = _avaliar(genomas, config, decision_interval=intervalo)
+    vetorizado = _avaliar(genomas, config, decision_interval=intervalo, batched_nn=True, vectorized=True)
+    assert vetorizado == serial
+
+
+def test_episodios_em_lockstep_iguais_aos_sequenciais(config, genomas):
+    sementes = sementes_episodios(SEMENTE, 3)
+    por_episodio = []
+    frames = 0
+    for semente in sementes:
+        fitness, quadros = _avaliar(genomas, config, semente, vectorized=True)
+        por_episodio.append(fitness)
+        frames += quadros
+
+    ajustes = dict(AJUSTES_BASE, vectorized=True, batched_nn=True, episode_aggregate="q25")
+    assert avaliar_episodios(genomas, config, ajustes, sementes) == frames
+    esperado = agregar(np.array(por_episodio), "q25").tolist()
+    assert [genome.fitness for genome in genomas] == esperado
+
+
+@pytest.mark.parametrize("orcamento", [{"cull": True, "top_k": 5}, {"stable_frames": 40}])
+def test_orcamento_igual_nos_caminhos(config, genomas, orcamento):
+    serial = _avaliar(genomas, config, **orcamento)
+    assert _avaliar(genomas, config, vectorized=True, **orcamento) == serial
@@ -0,0 +1,116 @@
+"""Cache de fitness: acertos só com o mesmo genoma no mesmo contexto."""
+
+import pytest
+
+from ai.fitness_cache import CacheFitness, cache_compativel, contexto_avaliacao
+from ai.training import AJUSTES_PADRAO, AvaliadorGeracoes
+from conftest import AJUSTES_BASE
+
+AJUSTES = dict(AJUSTES_PADRAO, **AJUSTES_BASE, seed=5, fixed_track=True)
+
+
+def test_acerta_o_mesmo_genoma_no_mesmo_contexto(genomas):
+    cache = CacheFitness()
+    contexto = contexto_avaliacao([5], AJUSTES)
+    assert cache.obter(genomas[0], contexto) is None
+    cache.guardar(genomas[0], contexto, 12.5)
+    assert cache.obter(genomas[0], contexto) == 12.5
+    assert (cache.acertos, cache.faltas) == (1, 1)
+
+
+@pytest.mark.parametrize(
+    "sementes, mudanca",
+    [
+        ([6], {}),
+        ([5], {"vectorized": True}),
+        ([5], {"batched_nn": True}),
+        ([5], {"decision_interval": 2}),
+        ([5], {"max_score": 100}),
+    ],
+    ids=["semente", "vetorizado", "rede-em-lote", "intervalo", "pontuacao"],
+)
+def test_contexto_diferente_nao_acerta(genomas, sementes, mudanca):
+    cache = CacheFitness()
+    cache.guardar(genomas[0], contexto_avaliacao([5], AJUSTES), 12.5)
+    assert cache.obter(genomas[0], contexto_avaliacao(sementes, dict(AJUSTES, **mudanca))) is None
+
+
+def test_pesos_diferentes_nao_acertam(genomas):
+    cache = CacheFitness()
+    contexto = contexto_avaliacao([5], AJUSTES)
+    genome = genomas[0]
+    cache.guardar(genome, contexto, 12.5)
+    conexao = next(iter(genome.connections.values()))
+    conexao.weight += 1e-12
+    assert cache.obter(genome, contexto) is None
+
+
+def test_a_chave_do_genoma_nao_entra(genomas):
+    cache = CacheFitness()
+    contexto = contexto_avaliacao([5], AJUSTES)
+    cache.guardar(genomas[0], contexto, 12.5)
+    genomas[0].key = -1
+    assert cache.obter(genomas[0], contexto) == 12.5
+
+
+def test_descarta_o_usado_ha_mais_tempo(genomas):
+    cache = CacheFitness(capacidade=2)
+    contexto = contexto_avaliacao([5], AJUSTES)
+    a, b, c = genomas[:3]
+    cache.guardar(a, contexto, 1.0)
+    cache.guardar(b, contexto, 2.0)
+    cache.obter(a, contexto)
+    cache.guardar(c, contexto, 3.0)
+    assert len(cache) == 2
+    assert cache.obter(b, contexto) is None
+    assert cache.obter(a, contexto) == 1.0
+
+
+def test_salvar_e_carregar(genomas, tmp_path):
+    contexto = contexto_avaliacao([5], AJUSTES)
+    cache = CacheFitness(caminho=tmp_path / "fitness-cache.pkl")
+    for valor, genome in enumerate(genomas):
+        cache.guardar(genome, contexto, float(valor))
+    cache.salvar()
+
+    carregado = CacheFitness(capacidade=5)
+    assert not carregado.carregar(tmp_path / "ausente.pkl")
+    assert carregado.carregar(tmp_path / "fitness-cache.pkl")
+    # Com capacidade menor ficam os mais recentes
+    assert len(carregado) == 5
+    assert carregado.obter(genomas[-1], contexto) == float(len(genomas) - 1)
+    assert carregado.obter(genomas[0], contexto) is None
+
+
+def test_separar_aplica_o_fitness_guardado(genomas):
+    cache = CacheFitness()
+    contexto = contexto_avaliacao([5], AJUSTES)
+    for genome in genomas[::2]:
+        cache.guardar(genome, contexto, 7.0)
+    for genome in genomas:
+        genome.fitness = None
+
+    pendentes = cache.separar(genomas, contexto)
+    assert pendentes == genomas[1::2]
+    assert all(genome.fitness == 7.0 for genome in genomas[::2])
+
+
+def test_geracao_com_cache_igual_sem_cache(config, genomas):
+    AvaliadorGeracoes(dict(AJUSTES))([(g.key, g) for g in genomas], config)
+    sem_cache = [genome.fitness for genome in genomas]
+
+    cache = CacheFitness()
+    avaliador = AvaliadorGeracoes(dict(AJUSTES), cache=cache)
+    for _ in range(2):
+        for genome in genomas:
+            genome.fitness = None
+        avaliador([(g.key, g) for g in genomas], config)
+        assert [genome.fitness for genome in genomas] == sem_cache
+    assert (cache.acertos, cache.faltas) == (len(genomas), len(genomas))
+
+
+def test_orcamento_desativa_o_cache():
+    assert cache_compativel(AJUSTES)
+    assert not cache_compativel(dict(AJUSTES, cull=True))
+    assert not cache_compativel(dict(AJUSTES, stable_frames=40))
+    assert not cache_compativel(dict(AJUSTES, max_eval_seconds=1.0))
@@ -0,0 +1,53 @@
+"""Gravação de uma geração e reprodução do trace."""
+
+import numpy as np
+import pytest
+
+from ai.evaluation import avaliar_genomas
+from conftest import AJUSTES_BASE
+from game.replay import ErroReplay, GravadorReplay, LeitorReplay, reproduzir
+
+
+@pytest.mark.parametrize("vetorizado", [False, True], ids=["objetos", "vetorizado"])
+def test_reproducao_segue_a_gravacao(config, genomas, tmp_path, vetorizado):
+    ajustes = dict(
+        AJUSTES_BASE,
+        vectorized=vetorizado,
+        record_dir=str(tmp_path),
+        record_state_every=10,
+    )
+    frames = avaliar_genomas(genomas, config, ajustes, 7, geracao=3)
+    caminho = tmp_path / "geracao-0003.mrpl"
+    fitness = [genome.fitness for genome in genomas]
+
+    leitor = LeitorReplay(caminho)
+    assert (leitor.semente, leitor.geracao, leitor.frames) == (7, 3, frames)
+    assert leitor.chaves.tolist() == [genome.key for genome in genomas]
+
+    resumo = reproduzir(caminho)
+    melhor = int(np.argmax(fitness))
+    assert resumo["frames"] == frames
+    assert resumo["estados_conferidos"] == frames // 10
+    assert resumo["melhor_agente"] == melhor
+    assert resumo["melhor_genoma"] == genomas[melhor].key
+    assert resumo["melhor_fitness"] == fitness[melhor]
+
+    so_o_melhor = reproduzir(caminho, genoma=genomas[melhor].key)
+    assert so_o_melhor["estados_conferidos"] == resumo["estados_conferidos"]
+
+
+def test_estado_divergente_e_detectado(tmp_path):
+    caminho = tmp_path / "falso.mrpl"
+    with GravadorReplay(caminho, 5, 2, intervalo_estados=1) as gravador:
+        gravador.registrar_todos(np.ones(2, dtype=bool), np.zeros(2, dtype=bool), np.zeros(2, dtype=bool))
+        gravador.concluir_frame()
+        gravador.registrar_estado(0.0, np.ones(2, dtype=bool), [1.0, 2.0], [0.0, 0.0])
+    with pytest.raises(ErroReplay):
+        reproduzir(caminho)
+
+
+def test_genoma_ausente(config, genomas, tmp_path):
+    ajustes = dict(AJUSTES_BASE, record_dir=str(tmp_path))
+    avaliar_genomas(genomas[:3], config, ajustes, 7)
+    with pytest.raises(ErroReplay):
+        reproduzir(tmp_path / "geracao-0001.mrpl", genoma=-5)
@@ -2,6 +2,7 @@
 
 from __future__ import annotations
 
+from collections import OrderedDict
 from functools import lru_cache
 from pathlib import Path
 
@@ -27,3 +28,62 @@ def load_sprite(filename: str, size: tuple[int, int] | None = None) -> pygame.Su
     if size is not None:
         imagem = pygame.transform.scale(imagem, size)
     return imagem
+
+
+class SpriteAtlas:
+    """Cache LRU de variantes redimensionadas de sprites, com limite de memória.
+
+    Cada variante (arquivo, tamanho, suavização) é redimensionada uma única vez
+    e convertida com ``convert_alpha`` quando já existe uma janela. Ao passar
+    de ``max_bytes``, as variantes usadas há mais tempo são descartadas.
+    """
+
+    def __init__(self, max_bytes: int = 4 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.bytes_usados = 0
+        self._variantes: OrderedDict[tuple, pygame.Surface] = OrderedDict()
+
+    def __len__(self) -> int:
+        return len(self._variantes)
+
+    def get(self, filename: str, size: tuple[int, int], smooth: bool = True) -> pygame.Surface:
+        """Retorna a variante pedida, criando-a na primeira vez."""
+
+        chave = (filename, tuple(size), smooth)
+        sprite = self._variantes.get(chave)
+        if sprite is not None:
+            self._variantes.move_to_end(chave)
+            return sprite
+
+        base = load_sprite(filename)
+        escalar = pygame.transform.smoothscale if smooth else pygame.transform.scale
+        sprite = escalar(base, chave[1])
+        if pygame.display.get_surface():
+            sprite = sprite.convert_alpha()
+        self._guardar(chave, sprite)
+        return sprite
+
+    def preload(self, filename: str, sizes, smooth: bool = True) -> None:
+        """Cria antecipadamente as variantes de ``sizes``."""
+
+        for size in sizes:
+            self.get(filename, size, smooth)
+
+    def clear(self) -> None:
+        self._variantes.clear()
+        self.bytes_usados = 0
+
+    def _guardar(self, chave, sprite: pygame.Surface) -> None:
+        self._variantes[chave] = sprite
+        self.bytes_usados += _tamanho_em_bytes(sprite)
+        while self.bytes_usados > self.max_bytes and len(self._variantes) > 1:
+            _, antigo = self._variantes.popitem(last=False)
+            self.bytes_usados -= _tamanho_em_bytes(antigo)
+
+
+def _tamanho_em_bytes(sprite: pygame.Surface) -> int:
+    largura, altura = sprite.get_size()
+    return largura * altura * sprite.get_bytesize()
+
+
+SPRITE_ATLAS = SpriteAtlas()
@@ -0,0 +1,113 @@
+"""Instrumentação de tempo por etapa do frame."""
+
+from __future__ import annotations
+
+import json
+import time
+from collections import deque
+from contextlib import contextmanager, nullcontext
+
+
+def _percentil(ordenados, fracao: float) -> float:
+    """Percentil por posição mais próxima em uma lista já ordenada."""
+
+    if not ordenados:
+        return 0.0
+    indice = min(len(ordenados) - 1, max(0, int(round(fracao * (len(ordenados) - 1)))))
+    return ordenados[indice]
+
+
+def relogio_desligado() -> float:
+    """Substitui ``time.perf_counter`` quando não há perfil ativo."""
+
+    return 0.0
+
+
+def medir_etapa(perfil, etapa: str):
+    """Context manager que mede ``etapa`` em ``perfil`` (ou nada, se for None)."""
+
+    if perfil is None:
+        return nullcontext()
+    return perfil.medir(etapa)
+
+
+class PerfilFrames:
+    """Acumula o tempo gasto em cada etapa de um frame.
+
+    Cada etapa soma os tempos registrados durante o frame (por exemplo, os
+    sensores de todos os Marios). Ao fechar o frame, os totais entram em
+    janelas deslizantes usadas para os percentis p50/p95/p99 e, se houver
+    ``arquivo_trace``, viram uma linha JSON no arquivo.
+    """
+
+    relogio = staticmethod(time.perf_counter)
+
+    def __init__(self, janela: int = 600, arquivo_trace: str = "", overlay: bool = False):
+        self.janela = janela
+        self.overlay = overlay
+        self.amostras = {}
+        self.frame = 0
+        self._atual = {}
+        self._inicio_frame = None
+        self._trace = open(arquivo_trace, "w", encoding="utf-8") if arquivo_trace else None
+
+    def iniciar_frame(self) -> None:
+        self._atual = {}
+        self._inicio_frame = self.relogio()
+
+    def registrar(self, etapa: str, segundos: float) -> None:
+        self._atual[etapa] = self._atual.get(etapa, 0.0) + segundos
+
+    @contextmanager
+    def medir(self, etapa: str):
+        inicio = self.relogio()
+        try:
+            yield
+        finally:
+            self.registrar(etapa, self.relogio() - inicio)
+
+    def finalizar_frame(self, **extras) -> None:
+        """Fecha o frame; ``extras`` (ex.: vivos=70) vão apenas para o trace."""
+
+        self.frame += 1
+        if self._inicio_frame is not None:
+            self._atual["total"] = self.relogio() - self._inicio_frame
+        for etapa, segundos in self._atual.items():
+            if etapa not in self.amostras:
+                self.amostras[etapa] = deque(maxlen=self.janela)
+            self.amostras[etapa].append(segundos)
+        if self._trace is not None:
+            registro = {
+                "frame": self.frame,
+                "ms": {etapa: round(s * 1000, 4) for etapa, s in self._atual.items()},
+            }
+            registro.update(extras)
+            self._trace.write(json.dumps(registro) + "\n")
+        self._inicio_frame = None
+
+    def percentis(self, etapa: str) -> tuple[float, float, float]:
+        """(p50, p95, p99) em milissegundos na janela atual."""
+
+        ordenados = sorted(self.amostras.get(etapa, ()))
+        return tuple(_percentil(ordenados, p) * 1000 for p in (0.50, 0.95, 0.99))
+
+    def resumo(self) -> dict:
+        return {etapa: self.percentis(etapa) for etapa in self.amostras}
+
+    def linhas_resumo(self) -> list[str]:
+        """Resumo formatado, uma linha por etapa (ordem de inserção)."""
+
+        linhas = []
+        for etapa, (p50, p95, p99) in self.resumo().items():
+            linhas.append(f"{etapa:<10} p50 {p50:7.3f}  p95 {p95:7.3f}  p99 {p99:7.3f} ms")
+        return linhas
+
+    def imprimir_resumo(self, titulo: str = "Perfil do frame") -> None:
+        print(f"{titulo} (últimos {self.janela} frames):")
+        for linha in self.linhas_resumo():
+            print(f"  {linha}")
+
+    def fechar(self) -> None:
+        if self._trace is not None:
+            self._trace.close()
+            self._trace = None